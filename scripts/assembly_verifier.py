@@ -0,0 +1,325 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Gibson组装的计算机模拟验证
+
+按设计结果模拟每一步实验，检查得到的环状构建体是否与预期序列一致:
+    1. 用每个片段的引物对模拟PCR：引物3'端在模板两条链上的结合位点通过字符串查找定位，
+       再逐个碱基向5'方向延伸确定结合长度；
+    2. 线性化载体：限制酶切按识别位点在环状载体上的所有切割位置模拟酶切，
+       PCR线性化用载体引物在环状模板上模拟PCR；
+    3. 按产物之间的重叠区把所有产物连接成环：以每个产物5'端的前min_overlap个碱基建立哈希索引，
+       只用每个产物3'端的k-mer查表，不对产物两两做字符串扫描；
+    4. 各产物去掉与下一个产物的重叠区后一次拼接（"".join），与预期的环状序列比较。
+
+整个过程对序列长度是线性的，20个以上片段、200 kb的构建体也可以在批量设计中逐个验证。
+"""
+
+from scoring import reverse_complement
+from vector_profile import ENZYME_SITES
+
+# 引物3'端至少有这么多碱基与模板完全匹配才算一个结合位点
+DEFAULT_MIN_BINDING = 15
+
+# 产物之间至少需要的重叠长度，以及在产物3'端查找重叠区的最大长度
+DEFAULT_MIN_OVERLAP = 15
+DEFAULT_MAX_OVERLAP = 200
+
+
+def _binding_sites(template, primer, min_binding):
+    """引物在模板（正向链）上的结合位点
+
+    以引物3'端的min_binding个碱基为锚点查找，再向5'方向延伸。
+
+    返回:
+        [(引物3'端之后的模板位置, 结合长度)]
+    """
+    anchor = primer[-min_binding:]
+    sites = []
+    pos = template.find(anchor)
+    while pos != -1:
+        end = pos + min_binding
+        length = min_binding
+        while length < len(primer) and end - length > 0 and template[end - length - 1] == primer[-length - 1]:
+            length += 1
+        sites.append((end, length))
+        pos = template.find(anchor, pos + 1)
+    return sites
+
+
+def simulate_pcr(template, fw_primer, rv_primer, circular=False, min_binding=DEFAULT_MIN_BINDING):
+    """模拟一对引物在模板上的PCR
+
+    参数:
+        template: 模板序列（大写）
+        fw_primer: 正向引物
+        rv_primer: 反向引物
+        circular: 模板是否为环状（环状模板上的产物可以跨越序列起点）
+        min_binding: 引物3'端与模板完全匹配的最短长度
+
+    返回:
+        字典:
+            product: PCR产物序列，不能得到唯一产物时为None
+            fw_sites / rv_sites: 正向/反向引物在模板两条链上的结合位点数
+            fw_binding / rv_binding: 产生产物的结合区长度
+            error: 不能得到唯一产物时的原因
+    """
+    fw_primer = fw_primer.upper()
+    rv_primer = rv_primer.upper()
+    length = len(template)
+    report = {"product": None, "fw_sites": 0, "rv_sites": 0, "fw_binding": 0, "rv_binding": 0, "error": None}
+    if min(len(fw_primer), len(rv_primer)) < min_binding or length < min_binding:
+        report["error"] = "引物或模板短于最短结合长度"
+        return report
+
+    # 环状模板在末尾接上起点的一段，才能找到跨越起点的结合位点
+    search = template
+    if circular:
+        search = template + template[:max(len(fw_primer), len(rv_primer)) - 1]
+    rc_search = reverse_complement(search)
+
+    # 正向引物结合在反向链上（与正向链序列相同），反向引物结合在正向链上（与反向链序列相同）
+    fw_sites = _binding_sites(search, fw_primer, min_binding)
+    rv_sites = _binding_sites(rc_search, rv_primer, min_binding)
+    fw_other = _binding_sites(rc_search, fw_primer, min_binding)
+    rv_other = _binding_sites(search, rv_primer, min_binding)
+    if circular:
+        # 只保留起点在模板内的位点，去掉接上的一段中重复出现的位点
+        size = len(search)
+        fw_sites = [(end, bound) for end, bound in fw_sites if end - min_binding < length]
+        rv_sites = [(end, bound) for end, bound in rv_sites if size - end < length]
+        fw_other = [(end, bound) for end, bound in fw_other if size - end < length]
+        rv_other = [(end, bound) for end, bound in rv_other if end - min_binding < length]
+    report["fw_sites"] = len(fw_sites) + len(fw_other)
+    report["rv_sites"] = len(rv_sites) + len(rv_other)
+    if len(fw_sites) != 1 or len(rv_sites) != 1:
+        report["error"] = (f"引物在模板上的结合位点数不唯一"
+                           f"（正向引物{len(fw_sites)}个，反向引物{len(rv_sites)}个）")
+        return report
+
+    fw_end, fw_binding = fw_sites[0]
+    rc_end, rv_binding = rv_sites[0]
+    # 反向引物3'端在正向链上的位置：反向链上的结合区结束于rc_end，对应正向链上从size-rc_end开始
+    rv_start = len(search) - rc_end
+    rv_tail = reverse_complement(rv_primer)
+    if circular:
+        fw_end %= length
+        between = (rv_start - fw_end) % length
+        # 超过去掉两个结合区后的长度时，实际是两个结合区在模板上重叠
+        if between > length - fw_binding - rv_binding:
+            between -= length
+        middle = _circular_slice(template, fw_end, between) if between > 0 else ""
+    else:
+        between = rv_start - fw_end
+        middle = template[fw_end:rv_start] if between > 0 else ""
+    if between < 0:
+        # 结合区重叠（非常短的模板），反向引物的反向互补去掉重叠的部分
+        if -between > rv_binding:
+            report["error"] = "反向引物结合在正向引物上游，不能得到产物"
+            return report
+        rv_tail = rv_tail[-between:]
+
+    report["product"] = fw_primer + middle + rv_tail
+    report["fw_binding"] = fw_binding
+    report["rv_binding"] = rv_binding
+    return report
+
+
+def digest(sequence, enzyme):
+    """模拟限制酶切环状载体
+
+    参数:
+        sequence: 大写的环状载体序列
+        enzyme: ENZYME_SITES中的限制酶名称
+
+    返回:
+        按切割位置排列的切割位置列表（0起始，切在该位置之前）
+    """
+    site_seq, cut_offset = ENZYME_SITES[enzyme]
+    length = len(sequence)
+    circular = sequence + sequence[:len(site_seq) - 1]
+    cuts = []
+    pos = circular.find(site_seq)
+    while pos != -1 and pos < length:
+        cuts.append((pos + cut_offset) % length)
+        pos = circular.find(site_seq, pos + 1)
+    return sorted(cuts)
+
+
+def _circular_slice(sequence, start, length):
+    """环状序列上从start开始的length个碱基（length可以等于全长）"""
+    start %= len(sequence)
+    end = start + length
+    if end <= len(sequence):
+        return sequence[start:end]
+    return sequence[start:] + sequence[:end - len(sequence)]
+
+
+def _vector_product(vector_seq, result, min_binding, errors, record):
+    """线性化载体的模拟产物和设计预期的线性化载体，酶切次数或引物结合位点数写入record"""
+    info = result.get("linearization_info", {})
+    length = len(vector_seq)
+    method = info.get("method")
+    if method == "restriction":
+        enzyme = info.get("enzyme")
+        expected = _circular_slice(vector_seq, info["cut_position"], length)
+        cuts = digest(vector_seq, enzyme) if enzyme in ENZYME_SITES else []
+        record["cuts"] = len(cuts)
+        if not cuts:
+            errors.append(f"载体中没有{enzyme}酶切位点")
+            return None, expected
+        if len(cuts) > 1:
+            errors.append(f"{enzyme}在载体上切割{len(cuts)}次，酶切产物不是完整的线性化载体")
+        # 设计所用切割位置到下一个切割位置之间的片段
+        cut = info["cut_position"]
+        following = [position for position in cuts if position > cut] + [position + length for position in cuts]
+        return _circular_slice(vector_seq, cut, following[0] - cut), expected
+
+    # PCR线性化（手动提供或自动设计的载体引物）
+    expected = _circular_slice(vector_seq, info["fw_position"], info["pcr_product_length"])
+    pcr = simulate_pcr(vector_seq, info["fw_primer"], info["rv_primer"], circular=True, min_binding=min_binding)
+    record["fw_sites"] = pcr["fw_sites"]
+    record["rv_sites"] = pcr["rv_sites"]
+    if pcr["error"]:
+        errors.append(f"载体PCR: {pcr['error']}")
+    return pcr["product"], expected
+
+
+def _find_overlaps(products, min_overlap, max_overlap):
+    """查找每个产物3'端与其他产物5'端的重叠区
+
+    以每个产物的前min_overlap个碱基为键建立哈希索引，在产物3'端最后max_overlap个碱基中
+    逐个位置取k-mer查表，命中后核对整个重叠区。
+
+    返回:
+        每个产物的{后继产物下标: 最长重叠长度}
+    """
+    index = {}
+    for i, product in enumerate(products):
+        if len(product) >= min_overlap:
+            index.setdefault(product[:min_overlap], []).append(i)
+
+    overlaps = []
+    for i, product in enumerate(products):
+        found = {}
+        size = len(product)
+        for offset in range(max(0, size - max_overlap), size - min_overlap + 1):
+            for j in index.get(product[offset:offset + min_overlap], ()):
+                overlap = size - offset
+                if j != i and j not in found and len(products[j]) > overlap and products[j].startswith(
+                        product[offset:]):
+                    # offset从小到大，第一次命中即为最长的重叠区
+                    found[j] = overlap
+        overlaps.append(found)
+    return overlaps
+
+
+def _first_mismatch(actual, expected):
+    """两个序列第一个不同的位置（二分查找，只比较切片）"""
+    low, high = 0, min(len(actual), len(expected))
+    if actual[:high] == expected[:high]:
+        return high
+    while low < high:
+        middle = (low + high) // 2
+        if actual[low:middle + 1] == expected[low:middle + 1]:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def verify_assembly(result, fragments, vector, min_binding=DEFAULT_MIN_BINDING, min_overlap=DEFAULT_MIN_OVERLAP,
+                    max_overlap=DEFAULT_MAX_OVERLAP, keep_sequence=False):
+    """模拟PCR和Gibson组装，检查设计结果能否得到预期的环状构建体
+
+    参数:
+        result: design_gibson_primers的结果（默认的完整同源臂模式或拆分重叠区模式）
+        fragments: 设计时使用的插入片段列表（顺序相同）
+        vector: 设计时使用的载体序列记录或VectorProfile
+        min_binding: 引物3'端与模板完全匹配的最短长度
+        min_overlap: 产物之间最短的重叠长度
+        max_overlap: 在产物3'端查找重叠区的最大长度
+        keep_sequence: 是否在结果中保留组装得到的构建体序列
+
+    返回:
+        字典:
+            ok: 组装得到的环状序列是否与预期一致，且没有错误
+            errors: 错误列表（引物结合位点不唯一、产物不能连接成环、序列不一致等）
+            products: 各产物的name、length和引物结合位点数fw_sites、rv_sites；
+                      第一个为线性化载体，限制酶切时记录切割次数cuts
+            overlaps: 组装路径上相邻产物的left、right和重叠长度length
+            construct_length / expected_length: 组装得到的和预期的构建体长度
+            first_mismatch: 与预期序列第一个不同的位置，一致时为None
+            sequence: keep_sequence为True时为组装得到的构建体序列
+    """
+    errors = []
+    vector_seq = str(vector.seq).upper()
+    vector_name = getattr(vector, "id", "") or "Vector"
+    vector_record = {"name": vector_name}
+    product, expected_vector = _vector_product(vector_seq, result, min_binding, errors, vector_record)
+    vector_record["length"] = len(product) if product else 0
+    products = [product]
+    names = [vector_name]
+    records = [vector_record]
+
+    fragment_primers = result["fragment_primers"]
+    if len(fragment_primers) != len(fragments):
+        raise ValueError("设计结果中的片段数与提供的片段数不一致")
+    fragment_seqs = []
+    for fragment, primer_info in zip(fragments, fragment_primers):
+        template = str(fragment.seq).upper()
+        fragment_seqs.append(template)
+        pcr = simulate_pcr(template, primer_info["fw"]["sequence"], primer_info["rv"]["sequence"],
+                           min_binding=min_binding)
+        name = primer_info.get("name", "Fragment")
+        if pcr["error"]:
+            errors.append(f"{name}: {pcr['error']}")
+        products.append(pcr["product"])
+        names.append(name)
+        records.append({"name": name, "length": len(pcr["product"]) if pcr["product"] else 0,
+                        "fw_sites": pcr["fw_sites"], "rv_sites": pcr["rv_sites"]})
+
+    expected = "".join([expected_vector] + fragment_seqs)
+    report = {
+        "ok": False,
+        "errors": errors,
+        "products": records,
+        "overlaps": [],
+        "construct_length": 0,
+        "expected_length": len(expected),
+        "first_mismatch": None
+    }
+    if any(product is None for product in products):
+        return report
+
+    # 从线性化载体出发沿唯一的重叠区依次连接，应当按设计顺序经过每个产物后回到载体
+    overlaps = _find_overlaps(products, min_overlap, max_overlap)
+    count = len(products)
+    pieces = []
+    current = 0
+    for _ in range(count):
+        following = overlaps[current]
+        expected_next = (current + 1) % count
+        if not following:
+            errors.append(f"{names[current]}的3'端与其他产物没有重叠区")
+            return report
+        if len(following) > 1:
+            errors.append(f"{names[current]}的3'端与多个产物重叠: {', '.join(names[j] for j in following)}")
+            return report
+        (successor, overlap), = following.items()
+        if successor != expected_next:
+            errors.append(f"{names[current]}之后连接的是{names[successor]}，与设计顺序不符")
+            return report
+        report["overlaps"].append({"left": names[current], "right": names[successor], "length": overlap})
+        pieces.append(products[current][:len(products[current]) - overlap])
+        current = successor
+
+    construct = "".join(pieces)
+    report["construct_length"] = len(construct)
+    if construct != expected:
+        report["first_mismatch"] = _first_mismatch(construct, expected)
+        errors.append(f"组装得到的序列与预期不一致（位置{report['first_mismatch']}）")
+    report["ok"] = not errors
+    if keep_sequence:
+        report["sequence"] = construct
+    return report
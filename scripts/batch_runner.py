@@ -0,0 +1,307 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""可断点续跑的批量引物设计
+
+按清单（CSV）逐个设计构建体，每完成一个就把design_gibson_primers的结果追加到
+只追加的日志文件（JSON Lines）中，并按组调用fsync。进程中途退出后重新运行同一命令，
+已经写入日志的构建体会被跳过；全部完成后从日志流式合并导出，不在内存中保存所有结果。
+使用--verify时每个设计结果都经过PCR和组装的模拟验证（assembly_verifier），
+验证报告与结果一起写入日志。
+
+清单格式（CSV，第一行为列名）:
+    construct_id      构建体名称（唯一）
+    vector            载体FASTA文件
+    fragments         插入片段FASTA文件，多个文件用分号分隔，按顺序连接
+    method            'restriction'、'pcr' 或 'pcr_auto'（默认restriction）
+    enzyme            限制酶名称（method为restriction时）
+    fw_primer         载体PCR正向引物（method为pcr时）
+    rv_primer         载体PCR反向引物（method为pcr时）
+    insert_position   插入位置，0起始（method为pcr_auto时，自动设计载体引物）
+    delete_end        可选的删除区域终点（method为pcr_auto时）
+    homology_length   同源臂长度（默认25）
+文件路径可以是相对于清单所在目录的路径。
+
+用法:
+    python batch_runner.py manifest.csv -o results/
+    python batch_runner.py manifest.csv -o results/ --verify
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+
+from dna_tools import DNATools, Language
+
+# 日志记录的状态
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+
+
+def construct_key(row):
+    """计算清单中一行的规范化哈希；同名构建体的设置变化后会重新设计"""
+    canonical = json.dumps(row, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def read_manifest(manifest_path):
+    """逐行读取清单，返回每行的字典（去掉首尾空白）"""
+    with open(manifest_path, 'r', encoding='utf-8-sig', newline='') as f:
+        for row in csv.DictReader(f):
+            yield {key.strip(): (value or "").strip() for key, value in row.items() if key}
+
+
+class JournalWriter:
+    """只追加的日志文件，按组fsync
+
+    每条记录写为一行JSON。写入后立即flush到操作系统，但只有累计group_size条记录
+    或距上次fsync超过group_interval秒时才调用fsync，在吞吐量和崩溃后丢失的记录数之间折中。
+    """
+
+    def __init__(self, path, group_size=64, group_interval=2.0):
+        """打开日志文件；文件末尾有不完整的记录（写入时崩溃）时先截掉
+
+        参数:
+            path: 日志文件路径
+            group_size: 每累计多少条记录fsync一次
+            group_interval: 距上次fsync的最长时间（秒）
+        """
+        self.path = path
+        self.group_size = group_size
+        self.group_interval = group_interval
+        _truncate_torn_tail(path)
+        self._file = open(path, 'a', encoding='utf-8')
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def append(self, record):
+        """追加一条记录"""
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self._file.flush()
+        self._pending += 1
+        if self._pending >= self.group_size or time.monotonic() - self._last_sync >= self.group_interval:
+            self.sync()
+
+    def sync(self):
+        """把已写入的记录fsync到磁盘"""
+        if self._pending:
+            os.fsync(self._file.fileno())
+            self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        """fsync剩余的记录并关闭文件"""
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _truncate_torn_tail(path):
+    """如果文件最后一行没有换行符（写入时崩溃），把它截掉"""
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb+') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        if size == 0:
+            return
+        f.seek(size - 1)
+        if f.read(1) == b"\n":
+            return
+
+        # 向前查找最后一个换行符
+        position = size
+        block = 4096
+        while position > 0:
+            start = max(0, position - block)
+            f.seek(start)
+            chunk = f.read(position - start)
+            index = chunk.rfind(b"\n")
+            if index != -1:
+                f.truncate(start + index + 1)
+                return
+            position = start
+        f.truncate(0)
+
+
+def iter_journal(journal_path):
+    """逐条读取日志，返回(文件偏移, 记录)
+
+    最后一行不完整时忽略；其他位置出现无法解析的行说明日志已损坏，抛出ValueError。
+    """
+    if not os.path.exists(journal_path):
+        return
+    with open(journal_path, 'rb') as f:
+        offset = 0
+        line_number = 0
+        for line in f:
+            line_number += 1
+            start = offset
+            offset += len(line)
+            if not line.endswith(b"\n"):
+                return
+            try:
+                record = json.loads(line)
+            except ValueError:
+                raise ValueError(f"日志文件第{line_number}行已损坏: {journal_path}")
+            yield start, record
+
+
+def completed_constructs(journal_path):
+    """返回日志中已经成功完成的{构建体名称: 清单行哈希}"""
+    completed = {}
+    for _, record in iter_journal(journal_path):
+        if record.get("status") == STATUS_OK:
+            completed[record["construct_id"]] = record.get("key")
+    return completed
+
+
+class BatchRunner:
+    """按清单批量设计引物，结果写入日志"""
+
+    def __init__(self, tools=None, group_size=64, group_interval=2.0, packed=False, vector_cache_size=16,
+                 verify=False):
+        """初始化批量设计
+
+        参数:
+            tools: 使用的DNATools实例，默认新建
+            group_size: 日志每累计多少条记录fsync一次
+            group_interval: 日志距上次fsync的最长时间（秒）
+            packed: 是否以2-bit压缩形式读取序列
+            vector_cache_size: 内存中缓存的载体文件数量（大批量设计通常共用少数几个载体）
+            verify: 是否模拟PCR和组装验证每个设计结果
+        """
+        self.tools = tools or DNATools()
+        self.group_size = group_size
+        self.group_interval = group_interval
+        self.packed = packed
+        self.vector_cache_size = vector_cache_size
+        self.verify = verify
+
+    def run(self, manifest_path, journal_path, progress=None):
+        """运行清单中尚未完成的构建体
+
+        参数:
+            manifest_path: 清单文件路径
+            journal_path: 日志文件路径（不存在时新建）
+            progress: 可选的回调函数progress(构建体名称, 状态)
+
+        返回:
+            统计字典: total, skipped, completed, failed；verify为True时另有unverified（设计成功但验证未通过的数量）
+        """
+        completed = completed_constructs(journal_path)
+        base_dir = os.path.dirname(os.path.abspath(manifest_path))
+        counts = {"total": 0, "skipped": 0, "completed": 0, "failed": 0}
+        if self.verify:
+            counts["unverified"] = 0
+        current = {}
+
+        def pending_rows():
+            # 跳过日志中已经完成的构建体，并记下正在设计的行的哈希
+            for row in read_manifest(manifest_path):
+                construct_id = row.get("construct_id", "")
+                if not construct_id:
+                    continue
+                counts["total"] += 1
+                key = construct_key(row)
+                if completed.get(construct_id) == key:
+                    counts["skipped"] += 1
+                    continue
+                current["key"] = key
+                yield row
+
+        with JournalWriter(journal_path, self.group_size, self.group_interval) as journal:
+            def record(construct_id, status, **fields):
+                journal.append(dict({"construct_id": construct_id, "key": current["key"], "status": status}, **fields))
+                counts["completed" if status == STATUS_OK else "failed"] += 1
+                if progress:
+                    progress(construct_id, status)
+
+            # 失败的构建体也记录下来，重新运行时会再次尝试
+            designs = self.tools.iter_designs(
+                pending_rows(), base_dir, self.packed,
+                on_error=lambda construct_id, e: record(construct_id, STATUS_ERROR, error=str(e)),
+                vector_cache_size=self.vector_cache_size, verify=self.verify
+            )
+            for construct_id, result in designs:
+                if self.verify and not result["verification"]["ok"]:
+                    counts["unverified"] += 1
+                record(construct_id, STATUS_OK, result=result)
+
+        return counts
+
+
+def merge_journal(journal_path, output_file, language=Language.CHINESE, tools=None):
+    """把日志中每个构建体最新的成功结果流式导出为一个CSV文件
+
+    第一遍只记录每个构建体最后一条成功记录的文件偏移，第二遍按偏移读取并写出，
+    内存中同时只有一个构建体的结果。
+
+    参数:
+        journal_path: 日志文件路径
+        output_file: 输出CSV文件路径
+        language: 语言选项 (Language.CHINESE 或 Language.ENGLISH)
+        tools: 用于格式化结构问题的DNATools实例
+
+    返回:
+        导出的构建体数量
+    """
+    tools = tools or DNATools()
+
+    latest = OrderedDict()
+    for offset, record in iter_journal(journal_path):
+        if record.get("status") == STATUS_OK:
+            latest.pop(record["construct_id"], None)
+            latest[record["construct_id"]] = offset
+
+    def designs(journal):
+        for construct_id, offset in latest.items():
+            journal.seek(offset)
+            yield construct_id, json.loads(journal.readline())["result"]
+
+    with open(journal_path, 'rb') as journal:
+        return tools.export_designs_to_csv(designs(journal), output_file, language)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Let's Gibson 可断点续跑的批量引物设计")
+    parser.add_argument("manifest", help="任务清单CSV（construct_id, vector, fragments, method, enzyme, ...）")
+    parser.add_argument("-o", "--output-dir", default=".", help="日志和合并CSV的输出目录")
+    parser.add_argument("--journal", default=None, help="日志文件路径（默认：<输出目录>/journal.jsonl）")
+    parser.add_argument("--group-size", type=int, default=64, help="每写入N条记录fsync一次日志（默认：64）")
+    parser.add_argument("--group-interval", type=float, default=2.0,
+                        help="至少每N秒fsync一次日志（默认：2.0）")
+    parser.add_argument("--packed", action="store_true", help="以2-bit压缩形式保存序列")
+    parser.add_argument("--verify", action="store_true",
+                        help="对每个设计模拟PCR和组装，并把验证报告写入日志")
+    parser.add_argument("--language", default="zh_CN", choices=["zh_CN", "en_US"], help="导出语言")
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    journal_path = args.journal or os.path.join(args.output_dir, "journal.jsonl")
+
+    runner = BatchRunner(group_size=args.group_size, group_interval=args.group_interval, packed=args.packed,
+                         verify=args.verify)
+    counts = runner.run(args.manifest, journal_path)
+    print(f"共{counts['total']}个，跳过{counts['skipped']}个，"
+          f"完成{counts['completed']}个，失败{counts['failed']}个")
+    if args.verify:
+        print(f"验证未通过{counts['unverified']}个")
+
+    merged = merge_journal(journal_path, os.path.join(args.output_dir, "primers.csv"),
+                           Language(args.language), runner.tools)
+    print(f"已将{merged}个构建合并到{os.path.join(args.output_dir, 'primers.csv')}")
+
+
+if __name__ == "__main__":
+    main()
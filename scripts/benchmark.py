@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""引物设计性能基准
+
+在随机生成的序列上运行design_gibson_primers，报告每种情况的耗时和峰值内存
+（tracemalloc统计的Python分配），以及进程池工作进程取得载体信息的启动耗时
+（通过任务参数传递副本与附加共享内存两种方式），以及各入口模块的导入耗时是否在预算内。
+
+情况:
+    plasmid   3 kb载体 + 两个1 kb片段（酶切线性化）
+    bac       200 kb BAC骨架 + 两个5 kb片段（酶切和PCR线性化）
+    mb        1 Mb片段 + 3 kb载体（验证耗时和内存与片段长度无关）
+
+用法:
+    python benchmark.py [--repeat N] [--case plasmid|bac|mb] [--workers N]
+
+导入耗时超出预算时以状态码1退出。
+"""
+
+import argparse
+import compileall
+import os
+import pickle
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+from dna_tools import DNATools
+from packed_seq import PackedRecord
+from shared_store import SharedStore
+from vector_profile import VectorProfile
+
+
+# 各入口模块的导入耗时预算（毫秒，不含解释器本身的启动时间）
+IMPORT_BUDGET_MS = {
+    "dna_tools": 40,
+    "batch_runner": 50,
+    "design_service": 120
+}
+
+
+def _random_sequence(rng, length):
+    """生成不含EcoRI位点的随机序列"""
+    seq = ''.join(rng.choice('ACGT') for _ in range(length))
+    return seq.replace('GAATTC', 'GAATTG')
+
+
+def _insert_site(seq, position, site='GAATTC'):
+    """在指定位置写入酶切位点"""
+    return seq[:position] + site + seq[position + len(site):]
+
+
+def _make_cases(rng):
+    """返回[(名称, 设计参数字典)]"""
+    plasmid = _insert_site(_random_sequence(rng, 3000), 1500)
+    bac = _insert_site(_random_sequence(rng, 200000), 120000)
+
+    bac_fw = bac[50000:50022]
+    bac_rv = DNATools().reverse_complement(bac[150000:150022])
+
+    return [
+        ("plasmid", {
+            "fragments": [PackedRecord(_random_sequence(rng, 1000), f"F{i+1}") for i in range(2)],
+            "vector": PackedRecord(plasmid, "plasmid"),
+            "method": "restriction",
+            "info": {"enzyme": "EcoRI"}
+        }),
+        ("bac-restriction", {
+            "fragments": [PackedRecord(_random_sequence(rng, 5000), f"F{i+1}") for i in range(2)],
+            "vector": PackedRecord(bac, "BAC"),
+            "method": "restriction",
+            "info": {"enzyme": "EcoRI"}
+        }),
+        ("bac-pcr", {
+            "fragments": [PackedRecord(_random_sequence(rng, 5000), f"F{i+1}") for i in range(2)],
+            "vector": PackedRecord(bac, "BAC"),
+            "method": "pcr",
+            "info": {"fw_primer": bac_fw, "rv_primer": bac_rv}
+        }),
+        ("mb", {
+            "fragments": [PackedRecord(_random_sequence(rng, 1000000), "Mb1")],
+            "vector": PackedRecord(plasmid, "plasmid"),
+            "method": "restriction",
+            "info": {"enzyme": "EcoRI"}
+        })
+    ]
+
+
+def run_case(tools, case, repeat, homology_length=25):
+    """运行一种情况，返回(首次耗时, 后续平均耗时, 峰值内存字节数, 级联评分统计)
+
+    首次运行包含载体预计算，后续运行使用缓存的VectorProfile。
+    """
+    def design():
+        return tools.design_gibson_primers(
+            case["fragments"], case["vector"], homology_length, case["method"], dict(case["info"])
+        )
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = design()
+    first = time.perf_counter() - started
+
+    # 载体信息已缓存，只统计设计本身新增的峰值内存
+    tracemalloc.reset_peak()
+    baseline, _ = tracemalloc.get_traced_memory()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        design()
+    average = (time.perf_counter() - started) / max(1, repeat)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return first, average, peak - baseline, result["candidate_stats"]
+
+
+def _receive_profile(data):
+    """工作进程任务：从传来的副本恢复载体预计算信息"""
+    return len(VectorProfile.from_dict(data))
+
+
+def _attach_profile(store_name):
+    """工作进程任务：附加共享内存中的载体预计算信息"""
+    store = SharedStore.attach(store_name)
+    try:
+        return len(store.profiles()[0])
+    finally:
+        store.close()
+
+
+def measure_spinup(profile, workers):
+    """测量新建进程池并让每个工作进程取得载体信息的耗时
+
+    返回:
+        (传递副本的耗时, 附加共享内存的耗时, 副本的序列化字节数)
+    """
+    data = profile.to_dict()
+    copy_size = len(pickle.dumps(data))
+
+    def timed(task, argument):
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for _ in executor.map(task, [argument] * workers):
+                pass
+        return time.perf_counter() - started
+
+    copied = timed(_receive_profile, data)
+    with SharedStore.create(profiles=[profile]) as store:
+        shared = timed(_attach_profile, store.name)
+    return copied, shared, copy_size
+
+
+def measure_import(module, runs=7):
+    """在新的解释器中导入模块，返回扣除解释器启动时间后的最短耗时（秒）"""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    def best(code):
+        times = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            subprocess.run([sys.executable, "-c", code], cwd=script_dir, check=True)
+            times.append(time.perf_counter() - started)
+        return min(times)
+
+    return max(0.0, best(f"import {module}") - best("pass"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Let's Gibson 引物设计基准测试")
+    parser.add_argument("--repeat", type=int, default=5, help="每个用例计时的重复次数（默认：5）")
+    parser.add_argument("--case", default=None, help="只运行名称以此前缀开头的用例")
+    parser.add_argument("--seed", type=int, default=1, help="随机数种子（默认：1）")
+    parser.add_argument("--workers", type=int, default=2, help="工作进程启动测试的进程数（默认：2）")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    tools = DNATools()
+
+    cases = [(name, case) for name, case in _make_cases(rng) if not args.case or name.startswith(args.case)]
+
+    # 先编译字节码，测量的是安装后正常启动的耗时
+    compileall.compile_dir(os.path.dirname(os.path.abspath(__file__)), quiet=1)
+    over_budget = False
+    # 表头中每个中文字符占两列，格式宽度相应减去中文字符数
+    print(f"{'模块':<16}{'导入 (ms)':>10}{'预算 (ms)':>11}")
+    for module, budget in IMPORT_BUDGET_MS.items():
+        elapsed = measure_import(module) * 1000
+        over_budget = over_budget or elapsed > budget
+        print(f"{module:<18}{elapsed:>12.1f}{budget:>13}  {'通过' if elapsed <= budget else '超出'}")
+    print()
+
+    print(f"{'用例':<16}{'首次 (ms)':>10}{'缓存后 (ms)':>10}{'峰值 (KB)':>9}  淘汰数 (window/poly_x/structure)，剪枝的引物对")
+    for name, case in cases:
+        first, average, peak, stats = run_case(tools, case, args.repeat)
+        rejected = stats["rejected"]
+        print(
+            f"{name:<18}{first * 1000:>12.1f}{average * 1000:>13.2f}{peak / 1024:>11.1f}  "
+            f"{rejected['window']}/{rejected['poly_x']}/{rejected['structure']}, "
+            f"{stats['pairs_pruned']}/{stats['pairs']}"
+        )
+
+    # 同一载体只测一次
+    print()
+    print(f"工作进程启动，{args.workers}个工作进程")
+    print(f"{'载体':<16}{'大小 (kb)':>8}{'复制 (ms)':>9}{'共享 (ms)':>11}{'复制数据量 (KB)':>14}")
+    seen = set()
+    for _, case in cases:
+        profile = tools.get_vector_profile(case["vector"])
+        if profile.seq_hash in seen:
+            continue
+        seen.add(profile.seq_hash)
+        copied, shared, copy_size = measure_spinup(profile, args.workers)
+        print(
+            f"{profile.id:<18}{len(profile) / 1000:>10.0f}{copied * 1000:>11.1f}"
+            f"{shared * 1000:>13.1f}{copy_size / 1024:>19.0f}"
+        )
+
+    if over_budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
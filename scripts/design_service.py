@@ -0,0 +1,336 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""本地HTTP/JSON引物设计服务
+
+常驻进程中保持已预热的DNATools实例，供内部工具通过HTTP调用design_gibson_primers，
+避免每次调用脚本都重新建立进程和重建索引。
+
+接口:
+    POST /design   请求体为JSON设计请求，返回design_gibson_primers的结果
+    GET  /stats    返回延迟和吞吐量统计
+    GET  /health   健康检查
+
+设计请求格式:
+    {
+        "fragments": [{"id": "GFP", "sequence": "ATG..."}],
+        "vector": {"id": "pUC19", "sequence": "TCG..."},
+        "homology_length": 25,
+        "linearization_method": "restriction",
+        "linearization_info": {"enzyme": "EcoRI"},
+        "split_overlaps": false,
+        "homology_tm": [48, 52],
+        "params": {"PRIMER_OPT_SIZE": 20},
+        "score_weights": {"HAIRPIN": 25},
+        "top_k": 3
+    }
+
+用--shared-vector预先载入的载体保存在共享内存中，所有工作进程直接读取，不各自重建索引；
+请求中可以只给出这些载体的名称: "vector": {"id": "pUC19"}。
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from dna_tools import DNATools
+from fasta import SequenceRecord
+from shared_store import SharedStore
+
+# 工作进程中常驻的DNATools实例
+_worker_tools = None
+
+# 工作进程附加的共享内存存储，以及其中按名称索引的载体预计算信息
+_worker_store = None
+_shared_profiles = {}
+
+# 允许的请求体最大字节数
+MAX_BODY_SIZE = 64 * 1024 * 1024
+
+_STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    500: "Internal Server Error"
+}
+
+
+def _init_worker(profile_cache_dir=None, store_name=None):
+    """工作进程初始化：创建并预热DNATools实例，附加共享内存中的载体"""
+    global _worker_tools, _worker_store
+    _worker_tools = DNATools(profile_cache_dir=profile_cache_dir)
+    if store_name:
+        _worker_store = SharedStore.attach(store_name)
+        for profile in _worker_store.profiles():
+            _worker_tools.pin_vector_profile(profile)
+            _shared_profiles[profile.id] = profile
+
+
+def _ping():
+    """空任务，用于在服务启动时拉起所有工作进程"""
+    return os.getpid()
+
+
+def _make_record(entry, default_id):
+    """把JSON中的序列条目转换为设计函数使用的序列记录"""
+    if isinstance(entry, str):
+        entry = {"sequence": entry}
+    sequence = entry.get("sequence", "")
+    if not sequence:
+        raise ValueError("序列为空")
+    return SequenceRecord(sequence, entry.get("id") or default_id)
+
+
+def run_design(request):
+    """在工作进程中执行一次设计请求
+
+    参数:
+        request: 已解析的设计请求字典
+
+    返回:
+        design_gibson_primers的结果字典
+    """
+    if _worker_tools is None:
+        _init_worker()
+
+    fragments = [
+        _make_record(entry, f"Fragment{i+1}")
+        for i, entry in enumerate(request.get("fragments", []))
+    ]
+    vector_entry = request.get("vector")
+    if isinstance(vector_entry, dict) and not vector_entry.get("sequence") and vector_entry.get("id") in _shared_profiles:
+        vector = _shared_profiles[vector_entry["id"]]
+    else:
+        vector = _make_record(vector_entry, "Vector") if vector_entry else None
+    homology_tm = request.get("homology_tm")
+
+    return _worker_tools.design_gibson_primers(
+        fragments,
+        vector,
+        int(request.get("homology_length", 25)),
+        request.get("linearization_method", "restriction"),
+        request.get("linearization_info", {}),
+        split_overlaps=bool(request.get("split_overlaps", False)),
+        homology_tm=tuple(homology_tm) if homology_tm else None,
+        params=request.get("params"),
+        score_weights=request.get("score_weights"),
+        top_k=int(request.get("top_k", 1))
+    )
+
+
+def request_key(request):
+    """计算设计请求的规范化哈希，用于合并相同的进行中请求"""
+    canonical = json.dumps(request, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class DesignService:
+    """合并相同请求并把计算分派到进程池的设计服务"""
+
+    def __init__(self, workers=None, latency_window=1000, profile_cache_dir=None, shared_vectors=()):
+        """初始化服务
+
+        参数:
+            workers: 工作进程数量，默认为CPU核数
+            latency_window: 统计延迟分位数时保留的最近请求数
+            profile_cache_dir: 载体预计算信息的磁盘缓存目录，工作进程之间共享
+            shared_vectors: 预先载入共享内存的载体FASTA文件路径列表
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.store = None
+        if shared_vectors:
+            tools = DNATools(profile_cache_dir=profile_cache_dir)
+            profiles = [tools.get_vector_profile(tools.read_fasta(path)[0]) for path in shared_vectors]
+            self.store = SharedStore.create(profiles=profiles)
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker,
+            initargs=(profile_cache_dir, self.store.name if self.store else None)
+        )
+        self._inflight = {}
+        self._latencies = deque(maxlen=latency_window)
+        self._completions = deque(maxlen=latency_window)
+        self._started = time.monotonic()
+        self._counts = {
+            "requests": 0,
+            "completed": 0,
+            "errors": 0,
+            "coalesced": 0,
+            "designs_run": 0
+        }
+
+    async def design(self, request):
+        """处理一次设计请求；相同的请求正在计算时直接等待已有结果"""
+        started = time.perf_counter()
+        self._counts["requests"] += 1
+        key = request_key(request)
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self._counts["coalesced"] += 1
+        else:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self.executor, run_design, request)
+            self._inflight[key] = future
+            self._counts["designs_run"] += 1
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        try:
+            # shield保证某个调用方断开时不会取消其他调用方共享的计算
+            result = await asyncio.shield(future)
+        except Exception:
+            self._counts["errors"] += 1
+            raise
+        finally:
+            self._latencies.append(time.perf_counter() - started)
+
+        self._counts["completed"] += 1
+        self._completions.append(time.monotonic())
+        return result
+
+    def stats(self):
+        """返回服务的延迟和吞吐量统计"""
+        uptime = time.monotonic() - self._started
+        latencies = sorted(self._latencies)
+
+        def percentile(fraction):
+            if not latencies:
+                return 0.0
+            index = min(len(latencies) - 1, int(round(fraction * (len(latencies) - 1))))
+            return latencies[index] * 1000
+
+        # 最近一分钟内完成的请求数
+        now = time.monotonic()
+        recent = sum(1 for t in self._completions if now - t <= 60)
+
+        return dict(self._counts, **{
+            "in_flight": len(self._inflight),
+            "workers": self.workers,
+            "uptime_s": uptime,
+            "throughput_per_s": self._counts["completed"] / uptime if uptime > 0 else 0.0,
+            "recent_per_min": recent,
+            "latency_ms": {
+                "mean": sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "p99": percentile(0.99),
+                "max": latencies[-1] * 1000 if latencies else 0.0
+            }
+        })
+
+    async def handle_connection(self, reader, writer):
+        """处理一个HTTP连接（每个连接处理一个请求）"""
+        try:
+            status, payload = await self._handle_request(reader)
+        except Exception as e:
+            status, payload = 500, {"error": str(e)}
+
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {_STATUS_TEXT.get(status, '')}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n"
+        )
+        writer.write(head.encode("ascii") + body)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _handle_request(self, reader):
+        """解析HTTP请求并分派到对应接口，返回(状态码, JSON对象)"""
+        request_line = (await reader.readline()).decode("latin-1").strip()
+        if not request_line:
+            return 400, {"error": "空请求"}
+        parts = request_line.split()
+        if len(parts) < 2:
+            return 400, {"error": "无效的请求行"}
+        method, path = parts[0].upper(), parts[1].split("?", 1)[0]
+
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1")
+            if line in ("\r\n", "\n", ""):
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if path == "/health":
+            return 200, {"status": "ok"}
+        if path == "/stats":
+            return 200, self.stats()
+        if path != "/design":
+            return 404, {"error": f"未知的接口: {path}"}
+        if method != "POST":
+            return 405, {"error": "请使用POST提交设计请求"}
+
+        # 先检查Content-Length，再按长度读取请求体
+        length = headers.get("content-length", "0").strip() or "0"
+        if not length.isdecimal():
+            return 400, {"error": f"无效的Content-Length: {length}"}
+        length = int(length)
+        if length > MAX_BODY_SIZE:
+            return 400, {"error": f"请求体过大（最多{MAX_BODY_SIZE}字节）"}
+        try:
+            request = json.loads(await reader.readexactly(length))
+        except (ValueError, asyncio.IncompleteReadError) as e:
+            return 400, {"error": f"无法解析JSON请求: {str(e)}"}
+        if not isinstance(request, dict):
+            return 400, {"error": "设计请求必须是JSON对象"}
+
+        try:
+            return 200, await self.design(request)
+        except (ValueError, KeyError, TypeError) as e:
+            return 400, {"error": str(e)}
+        except Exception as e:
+            return 500, {"error": str(e)}
+
+    async def serve(self, host="127.0.0.1", port=8765):
+        """启动HTTP服务并一直运行"""
+        # 预热所有工作进程
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[
+            loop.run_in_executor(self.executor, _ping) for _ in range(self.workers)
+        ])
+
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"Let's Gibson 设计服务正在监听 http://{host}:{port}（{self.workers}个工作进程）")
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        """关闭进程池，删除共享内存"""
+        self.executor.shutdown(wait=True)
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Let's Gibson 本地JSON引物设计服务")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址（默认：127.0.0.1）")
+    parser.add_argument("--port", type=int, default=8765, help="监听端口（默认：8765）")
+    parser.add_argument("--workers", type=int, default=None, help="工作进程数量（默认：CPU核数）")
+    parser.add_argument("--profile-cache", default=None, help="载体预计算信息的磁盘缓存目录")
+    parser.add_argument("--shared-vector", action="append", default=[],
+                        help="预先载入共享内存、供所有工作进程使用的载体FASTA文件（可重复指定）")
+    args = parser.parse_args()
+
+    service = DesignService(workers=args.workers, profile_cache_dir=args.profile_cache,
+                            shared_vectors=args.shared_vector)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,22 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-from Bio import SeqIO
-from Bio.Seq import Seq
-import random
+import copy
+import csv
+import heapq
+import os
+import threading
+import weakref
+from collections import OrderedDict
+import dataclasses
+from dataclasses import dataclass
 from enum import Enum
+from fasta import parse_fasta
+from kernels import get_kernels, resolve_backend
+from nn_params import end_stability
+from packed_seq import EndWindows, PackedRecord
+from scoring import STAGE_NAMES, PrimerScorer, ScoreWeights, reverse_complement, tm_from_counts
+from vector_profile import ENZYME_SITES, VectorProfile, sequence_hash
 
 # 定义语言枚举类型
 class Language(Enum):
@@ -15,6 +27,7 @@ class Language(Enum):
 TEXTS = {
     'zh_CN': {
         'csv_header': "引物名称,序列,Tm值,GC含量,长度,问题",
+        'construct': "构建体",
         'result_title': "Gibson Assembly引物设计结果",
         'vector_primers': "载体引物:",
         'fragment_primers': "片段引物:",
@@ -25,13 +38,18 @@ TEXTS = {
         'poly_x': "连续重复碱基",
         'hairpin': "可能形成发夹结构",
         'dimer': "可能形成自二聚体",
+        'stable_end': "3'端过于稳定",
         'primer_dimer_warning': "警告: 正向和反向引物可能形成二聚体",
+        'alternatives': "备选引物对:",
+        'pair_score': "引物对分数:",
+        'backbones': "载体",
         'credits': "本引物由Let's Gibson生成",
         'repo': "项目地址:",
         'disclaimer': "免责声明：引物设计仅供参考，实际使用前请进行实验验证。"
     },
     'en_US': {
         'csv_header': "Primer Name,Sequence,Tm,GC%,Length,Issues",
+        'construct': "Construct",
         'result_title': "Gibson Assembly Primer Design Results",
         'vector_primers': "Vector Primers:",
         'fragment_primers': "Fragment Primers:",
@@ -42,42 +60,392 @@ TEXTS = {
         'poly_x': "Consecutive Repeated Bases",
         'hairpin': "Possible Hairpin Structure",
         'dimer': "Possible Self-Dimer",
+        'stable_end': "3' End Too Stable",
         'primer_dimer_warning': "Warning: Forward and reverse primers may form dimers",
+        'alternatives': "Alternative Primer Pairs:",
+        'pair_score': "Pair Score:",
+        'backbones': "Backbones",
         'credits': "Generated by Let's Gibson",
         'repo': "Repository:",
         'disclaimer': "Disclaimer: Primer designs are for reference only. Please validate experimentally before actual use."
     }
 }
 
+# Primer3风格参数名与PrimerParams字段的对应关系
+_PARAM_KEYS = {
+    'PRIMER_OPT_SIZE': 'opt_size',
+    'PRIMER_MIN_SIZE': 'min_size',
+    'PRIMER_MAX_SIZE': 'max_size',
+    'PRIMER_OPT_TM': 'opt_tm',
+    'PRIMER_MIN_TM': 'min_tm',
+    'PRIMER_MAX_TM': 'max_tm',
+    'PRIMER_MIN_GC': 'min_gc',
+    'PRIMER_MAX_GC': 'max_gc',
+    'PRIMER_MAX_POLY_X': 'max_poly_x',
+    'PRIMER_MAX_END_STABILITY': 'max_end_stability',
+    'OLIGO_SOFT_MAX_LENGTH': 'oligo_soft_max_length',
+    'OLIGO_MAX_LENGTH': 'oligo_max_length',
+    'OVERLAP_MIN_TM': 'overlap_min_tm',
+    'HOMOLOGY_MIN_LENGTH': 'homology_min_length',
+    'HOMOLOGY_MAX_LENGTH': 'homology_max_length',
+    'PRIMER_THERMODYNAMIC_OLIGO_ALIGNMENT': 'thermo_alignment',
+    'PRIMER_MAX_HAIRPIN_DG': 'max_hairpin_dg',
+    'PRIMER_MAX_DIMER_DG': 'max_dimer_dg',
+    'PRIMER_MAX_END_DG': 'max_end_dg'
+}
+
+@dataclass(frozen=True)
+class PrimerParams:
+    """引物设计参数
+    
+    不可变对象，可以在线程之间共享，并在每次设计时单独传入。
+    仍可以用params['PRIMER_OPT_SIZE']这样的Primer3风格参数名读取。
+    """
+    opt_size: int = 20                   # 最佳引物长度为20bp
+    min_size: int = 18                   # 最小引物长度为18bp
+    max_size: int = 24                   # 最大引物长度为24bp
+    opt_tm: float = 60.0                 # 最佳Tm值为60°C
+    min_tm: float = 55.0                 # 最小Tm值为55°C
+    max_tm: float = 65.0                 # 最大Tm值为65°C
+    min_gc: float = 40.0                 # 最小GC含量为40%
+    max_gc: float = 60.0                 # 最大GC含量为60%
+    max_poly_x: int = 4                  # 最大连续重复碱基数为4
+    max_end_stability: float = 5.5       # 3'端最后5个碱基的最大稳定性（-ΔG，kcal/mol；5-mer表含起始罚分，最大约6.8），None时按3'端GC数近似
+    oligo_soft_max_length: int = 40      # 引物总长超过40nt后合成代价上升
+    oligo_max_length: int = 60           # 引物总长上限为60nt
+    overlap_min_tm: float = 48.0         # 重叠区最低Tm值为48°C
+    homology_min_length: int = 15        # 按Tm确定同源臂时的最短长度
+    homology_max_length: int = 40        # 按Tm确定同源臂时的最长长度
+    thermo_alignment: bool = False       # 用最近邻ΔG（thermo模块）代替k-mer匹配判断发夹和二聚体
+    max_hairpin_dg: float = -3.0         # 发夹结构ΔG低于该值（kcal/mol）时判为发夹
+    max_dimer_dg: float = -6.0           # 自二聚体和引物二聚体ΔG低于该值时判为二聚体
+    max_end_dg: float = -5.0             # 3'端参与配对的发夹或二聚体ΔG低于该值时同样判为问题
+    
+    def __getitem__(self, key):
+        """按Primer3风格的参数名读取参数"""
+        if key not in _PARAM_KEYS:
+            raise KeyError(key)
+        return getattr(self, _PARAM_KEYS[key])
+    
+    @classmethod
+    def from_dict(cls, params):
+        """从Primer3风格参数名的字典创建参数对象，未提供的参数使用默认值"""
+        unknown = [key for key in params if key not in _PARAM_KEYS]
+        if unknown:
+            raise ValueError(f"未知的引物设计参数: {', '.join(unknown)}")
+        return cls(**{_PARAM_KEYS[key]: value for key, value in params.items()})
+    
+    def as_dict(self):
+        """返回Primer3风格参数名的字典副本"""
+        return {key: getattr(self, name) for key, name in _PARAM_KEYS.items()}
+    
+    def replace(self, **changes):
+        """返回修改了部分参数的新对象"""
+        return dataclasses.replace(self, **changes)
+
+class RunningTm:
+    """逐个碱基增量更新的Tm值计算器
+    
+    在延长或截短同源臂时只更新碱基计数，不需要每次重新扫描整个序列。
+    """
+    
+    __slots__ = ('at_count', 'gc_count', 'length')
+    
+    def __init__(self, seq=""):
+        self.at_count = 0
+        self.gc_count = 0
+        self.length = 0
+        for base in seq:
+            self.add(base)
+    
+    def copy(self):
+        """复制当前计数"""
+        other = RunningTm()
+        other.at_count = self.at_count
+        other.gc_count = self.gc_count
+        other.length = self.length
+        return other
+    
+    def add(self, base):
+        """加入一个碱基"""
+        base = base.upper()
+        if base in 'AT':
+            self.at_count += 1
+        elif base in 'GC':
+            self.gc_count += 1
+        self.length += 1
+    
+    def remove(self, base):
+        """移除一个碱基"""
+        base = base.upper()
+        if base in 'AT':
+            self.at_count -= 1
+        elif base in 'GC':
+            self.gc_count -= 1
+        self.length -= 1
+    
+    @property
+    def tm(self):
+        """当前序列的Tm值"""
+        if self.length == 0:
+            return 0.0
+        return tm_from_counts(self.at_count, self.gc_count, self.length)
+
+# 进程池工作进程中使用的DNATools实例及其评分后端
+_pool_tools = None
+_pool_backend = "python"
+
+def _init_pool_worker(backend):
+    """进程池工作进程的初始化函数：使用与父进程DNATools相同的评分后端"""
+    global _pool_backend
+    _pool_backend = backend
+
+def _worker_tools():
+    """返回工作进程中的DNATools实例（首次调用时创建）"""
+    global _pool_tools
+    if _pool_tools is None:
+        _pool_tools = DNATools(backend=_pool_backend)
+    return _pool_tools
+
+def _design_pair_task(task):
+    """工作进程任务：为一个片段设计引物对"""
+    windows, left_homology, right_homology, params, score_weights, top_k = task
+    tools = _worker_tools()
+    return tools.design_balanced_primer_pair(
+        windows, left_homology, right_homology, params, score_weights, top_k=top_k
+    )
+
+def _pair_options_task(task):
+    """工作进程任务：计算一个片段在拆分模式下与两侧每种拆分组合的候选引物代价"""
+    windows, fw_tails, rv_tails, params, score_weights = task
+    tools = _worker_tools()
+    return tools._pair_options(windows, tools.get_scorer(params, score_weights), fw_tails, rv_tails)
+
 class DNATools:
     """DNA序列处理和引物设计工具"""
     
-    def __init__(self):
-        """初始化DNA工具类"""
-        # 设置引物设计参数
-        self.primer_params = {
-            'PRIMER_OPT_SIZE': 20,      # 最佳引物长度为20bp
-            'PRIMER_MIN_SIZE': 18,      # 最小引物长度为18bp
-            'PRIMER_MAX_SIZE': 30,      # 最大引物长度为30bp
-            'PRIMER_OPT_TM': 60.0,      # 最佳Tm值为60°C
-            'PRIMER_MIN_TM': 55.0,      # 最小Tm值为55°C
-            'PRIMER_MAX_TM': 65.0,      # 最大Tm值为65°C
-            'PRIMER_MIN_GC': 40.0,      # 最小GC含量为40%
-            'PRIMER_MAX_GC': 60.0,      # 最大GC含量为60%
-            'PRIMER_MAX_POLY_X': 4,     # 最大连续重复碱基数为4
-            'PRIMER_MAX_END_STABILITY': 9.0  # 3'端稳定性
-        }
-        # 默认语言设置
-        self.current_lang = Language.CHINESE
+    # 内存中最多缓存的载体预计算信息数量
+    MAX_CACHED_PROFILES = 32
     
-    def read_fasta(self, file_path):
-        """读取FASTA文件并返回序列记录，兼容UTF-8和GBK编码"""
+    def __init__(self, params=None, language=Language.CHINESE, profile_cache_dir=None, score_weights=None,
+                 backend="python"):
+        """初始化DNA工具类
+        
+        实例本身不保存任何会在设计过程中改变的状态，因此一个实例可以被多个线程同时使用；
+        共享缓存（载体预计算信息、编译好的评分器）由锁保护。
+        
+        参数:
+            params: 默认的引物设计参数（PrimerParams或Primer3风格参数名的字典）
+            language: 默认语言
+            profile_cache_dir: 载体预计算信息的磁盘缓存目录，为None时只缓存在内存中
+            score_weights: 默认的评分罚分权重（ScoreWeights或权重名的字典）
+            backend: 评分内循环的实现，"python"、"numba"或"auto"（见kernels模块）；
+                     没有安装Numba时"numba"和"auto"自动退回"python"
+        """
+        self._backend = resolve_backend(backend)
+        self._primer_params = self._resolve_params(params) if params is not None else PrimerParams()
+        self._score_weights = self._resolve_weights(score_weights) if score_weights is not None else ScoreWeights()
+        self._scorers = {}
+        self._scorer_lock = threading.Lock()
+        self._executor = None
+        self._executor_workers = 0
+        self._executor_lock = threading.Lock()
+        self._language = language
+        self._profile_cache_dir = profile_cache_dir
+        self._profiles = OrderedDict()
+        self._pinned_profiles = {}
+        self._vector_hashes = {}
+        self._profile_lock = threading.Lock()
+    
+    @property
+    def primer_params(self):
+        """默认的引物设计参数（不可变）"""
+        return self._primer_params
+    
+    @property
+    def score_weights(self):
+        """默认的评分罚分权重（不可变）"""
+        return self._score_weights
+    
+    @property
+    def backend(self):
+        """实际使用的评分后端（"python"或"numba"）"""
+        return self._backend
+    
+    @property
+    def current_lang(self):
+        """默认语言"""
+        return self._language
+    
+    def _resolve_params(self, params):
+        """确定本次调用使用的引物设计参数"""
+        if params is None:
+            return self._primer_params
+        if isinstance(params, PrimerParams):
+            return params
+        return PrimerParams.from_dict(params)
+    
+    def _resolve_weights(self, score_weights):
+        """确定本次调用使用的评分罚分权重"""
+        if score_weights is None:
+            return self._score_weights
+        if isinstance(score_weights, ScoreWeights):
+            return score_weights
+        return ScoreWeights.from_dict(score_weights)
+    
+    def get_scorer(self, params=None, score_weights=None):
+        """返回由引物设计参数和罚分权重编译的评分器，相同的组合只编译一次
+        
+        参数:
+            params: 引物设计参数，默认使用实例的primer_params
+            score_weights: 评分罚分权重，默认使用实例的score_weights
+            
+        返回:
+            PrimerScorer
+        """
+        key = (self._resolve_params(params), self._resolve_weights(score_weights))
+        scorer = self._scorers.get(key)
+        if scorer is None:
+            with self._scorer_lock:
+                scorer = self._scorers.get(key)
+                if scorer is None:
+                    scorer = PrimerScorer(*key, kernels=get_kernels(self._backend))
+                    self._scorers[key] = scorer
+        return scorer
+    
+    def _get_executor(self, workers):
+        """返回有workers个工作进程的进程池，同一实例的多次设计共用"""
+        # 只在并行设计时才导入multiprocessing，缩短启动时间
+        from concurrent.futures import ProcessPoolExecutor
+        
+        with self._executor_lock:
+            if self._executor is None or self._executor_workers != workers:
+                if self._executor is not None:
+                    self._executor.shutdown(wait=True)
+                self._executor = ProcessPoolExecutor(
+                    max_workers=workers, initializer=_init_pool_worker, initargs=(self._backend,)
+                )
+                self._executor_workers = workers
+            return self._executor
+    
+    def close(self):
+        """关闭设计时创建的进程池"""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+                self._executor_workers = 0
+    
+    def pin_vector_profile(self, profile):
+        """固定一个载体预计算信息（例如共享内存中的SharedVectorProfile），不会被缓存淘汰
+        
+        参数:
+            profile: VectorProfile
+        """
+        with self._profile_lock:
+            self._pinned_profiles[profile.seq_hash] = profile
+    
+    def get_vector_profile(self, vector):
+        """获取载体的预计算信息，按序列哈希缓存在内存和磁盘中
+        
+        参数:
+            vector: 载体序列记录，或已经计算好的VectorProfile
+            
+        返回:
+            VectorProfile
+        """
+        if isinstance(vector, VectorProfile):
+            return vector
+        
+        key, sequence = self._vector_hash(vector)
+        
+        with self._profile_lock:
+            profile = self._pinned_profiles.get(key)
+            if profile is not None:
+                return profile
+            profile = self._profiles.get(key)
+            if profile is not None:
+                self._profiles.move_to_end(key)
+                return profile
+        
+        # 在锁外读取或计算，避免阻塞使用其他载体的线程
+        profile = None
+        cache_path = None
+        if self._profile_cache_dir:
+            cache_path = os.path.join(self._profile_cache_dir, f"{key}.json")
+            if os.path.exists(cache_path):
+                try:
+                    profile = VectorProfile.load(cache_path)
+                except (OSError, ValueError, KeyError):
+                    profile = None  # 缓存损坏或版本不匹配时重新计算
+        
+        if profile is None:
+            name = vector.id if vector.id and vector.id.strip() != "" else "Vector"
+            if sequence is None:
+                sequence = str(vector.seq).upper()
+            profile = VectorProfile.build(name, sequence)
+            if cache_path:
+                os.makedirs(self._profile_cache_dir, exist_ok=True)
+                profile.save(cache_path)
+        
+        with self._profile_lock:
+            profile = self._profiles.setdefault(key, profile)
+            while len(self._profiles) > self.MAX_CACHED_PROFILES:
+                self._profiles.popitem(last=False)
+        return profile
+    
+    def _vector_hash(self, vector):
+        """返回载体记录的序列哈希
+        
+        哈希按记录对象缓存（弱引用，记录被回收时自动删除），同一记录重复设计时
+        不再解码、转大写和计算整条序列的哈希。记录的seq被替换或是可变序列（如MutableSeq）时重新计算。
+        
+        返回:
+            (序列哈希, 规范化序列)；哈希来自缓存时规范化序列为None
+        """
+        seq = vector.seq
+        vector_id = id(vector)
+        entry = self._vector_hashes.get(vector_id)
+        if entry is not None and entry[0]() is vector and entry[1] is seq:
+            return entry[2], None
+        
+        sequence = str(seq).upper()
+        key = sequence_hash(sequence)
+        if not hasattr(type(seq), "__setitem__"):
+            hashes = self._vector_hashes
+            try:
+                ref = weakref.ref(vector, lambda _: hashes.pop(vector_id, None))
+            except TypeError:
+                return key, sequence  # 不支持弱引用的记录不缓存
+            hashes[vector_id] = (ref, seq, key)
+        return key, sequence
+    
+    def read_fasta(self, file_path, packed=False, file_format="fasta"):
+        """读取序列文件并返回序列记录，兼容UTF-8和GBK编码
+        
+        FASTA由纯Python解析；其他格式（如'genbank'）在需要时才导入Bio.SeqIO。
+        
+        参数:
+            file_path: 序列文件路径
+            packed: 为True时返回2-bit压缩的PackedRecord，适合批量处理时节省内存
+            file_format: 文件格式，默认'fasta'，其他值按Bio.SeqIO的格式名解析
+        """
+        if file_format == "fasta":
+            parse = parse_fasta
+        else:
+            from Bio import SeqIO
+            
+            def parse(handle):
+                return SeqIO.parse(handle, file_format)
+        
         encodings = ['utf-8', 'gbk']
         for encoding in encodings:
             try:
                 with open(file_path, 'r', encoding=encoding) as handle:
-                    records = list(SeqIO.parse(handle, 'fasta'))
+                    records = list(parse(handle))
                     if records:  # 确保成功解析了序列
+                        if packed:
+                            return [PackedRecord.from_record(record) for record in records]
                         return records
             except UnicodeDecodeError:
                 continue  # 尝试下一种编码
@@ -87,9 +455,98 @@ class DNATools:
         # 如果所有编码都失败，提示用户修改文件格式
         raise Exception("无法读取FASTA文件，请确保文件使用UTF-8或GBK编码格式")
     
+    def design_construct(self, row, base_dir="", packed=False, vector_cache=None, verify=False):
+        """按清单中的一行读取序列文件并设计一个构建体
+        
+        参数:
+            row: 清单行字典，字段为construct_id、vector、fragments（多个文件用分号分隔）、
+                 method、enzyme、fw_primer、rv_primer、insert_position、delete_end、homology_length
+            base_dir: 相对路径的基准目录
+            packed: 是否以2-bit压缩形式读取序列
+            vector_cache: 可选的载体缓存字典（文件路径 -> 序列记录），由调用方控制大小
+            verify: 是否模拟PCR和组装验证设计结果（见assembly_verifier），验证报告写入结果的verification
+            
+        返回:
+            design_gibson_primers的结果
+        """
+        def resolve(path):
+            return path if os.path.isabs(path) else os.path.join(base_dir, path)
+        
+        if not row.get("vector"):
+            raise ValueError("清单中缺少载体文件")
+        if not row.get("fragments"):
+            raise ValueError("清单中缺少插入片段文件")
+        
+        vector_path = resolve(row["vector"])
+        vector = vector_cache.get(vector_path) if vector_cache is not None else None
+        if vector is None:
+            records = self.read_fasta(vector_path, packed=packed)
+            vector = records[0]
+            if vector_cache is not None:
+                vector_cache[vector_path] = vector
+        
+        fragments = []
+        for path in row["fragments"].split(";"):
+            if path.strip():
+                fragments.extend(self.read_fasta(resolve(path.strip()), packed=packed))
+        
+        method = row.get("method") or "restriction"
+        if method == "restriction":
+            linearization_info = {"enzyme": row.get("enzyme", "")}
+        elif method == "pcr":
+            linearization_info = {"fw_primer": row.get("fw_primer", ""), "rv_primer": row.get("rv_primer", "")}
+        elif method == "pcr_auto":
+            if not row.get("insert_position"):
+                raise ValueError("清单中缺少插入位置")
+            linearization_info = {"position": int(row["insert_position"])}
+            if row.get("delete_end"):
+                linearization_info["delete_end"] = int(row["delete_end"])
+        else:
+            raise ValueError(f"未知的线性化方式: {method}")
+        
+        homology_length = int(row.get("homology_length") or 25)
+        result = self.design_gibson_primers(fragments, vector, homology_length, method, linearization_info)
+        if verify:
+            from assembly_verifier import verify_assembly
+            result["verification"] = verify_assembly(result, fragments, vector)
+        return result
+    
+    def iter_designs(self, manifest_rows, base_dir="", packed=False, on_error=None, vector_cache_size=16,
+                     verify=False):
+        """逐个设计清单中的构建体，按顺序产出(构建体名称, 结果)
+        
+        只在需要时读取每个构建体的序列文件，设计完成后立即产出结果，
+        内存占用只取决于单个构建体和缓存（最近使用的载体、载体预计算信息），与清单长度无关。
+        结果可以直接交给export_designs_to_csv流式导出。
+        
+        参数:
+            manifest_rows: 清单行的可迭代对象，例如csv.DictReader
+            base_dir: 相对路径的基准目录
+            packed: 是否以2-bit压缩形式读取序列
+            on_error: 可选的回调函数on_error(构建体名称, 异常)；提供时跳过出错的构建体，否则抛出异常
+            vector_cache_size: 缓存的载体文件数量
+            verify: 是否模拟PCR和组装验证每个设计结果
+        """
+        vector_cache = OrderedDict()
+        for row in manifest_rows:
+            construct_id = (row.get("construct_id") or "").strip()
+            if not construct_id:
+                continue
+            try:
+                result = self.design_construct(row, base_dir, packed, vector_cache, verify)
+            except Exception as e:
+                if on_error is None:
+                    raise
+                on_error(construct_id, e)
+                continue
+            finally:
+                while len(vector_cache) > vector_cache_size:
+                    vector_cache.popitem(last=False)
+            yield construct_id, result
+    
     def reverse_complement(self, seq):
-        """返回序列的反向互补序列"""
-        return str(Seq(seq).reverse_complement())
+        """返回序列的反向互补序列（保留大小写，支持IUPAC简并碱基）"""
+        return reverse_complement(str(seq))
     
     
     def calculate_tm(self, seq):
@@ -115,14 +572,7 @@ class DNATools:
         # 总长度
         length = len(seq)
         
-        # 对于短引物（≤14bp），使用Wallace规则
-        if length <= 14:
-            tm = 2 * (a_count + t_count) + 4 * (g_count + c_count)
-        else:
-            # 对于长引物，使用修正的公式
-            tm = 64.9 + 41 * (g_count + c_count - 16.4) / length
-        
-        return tm
+        return tm_from_counts(a_count + t_count, g_count + c_count, length)
     
     def calculate_gc_content(self, seq):
         """计算序列的GC含量"""
@@ -141,7 +591,7 @@ class DNATools:
         seq = seq.upper()
         for i in range(len(seq) - min_stem * 2):
             stem = seq[i:i+min_stem]
-            rev_comp = str(Seq(stem).reverse_complement())
+            rev_comp = reverse_complement(stem)
             
             # 在后面的序列中查找互补序列
             if rev_comp in seq[i+min_stem:]:
@@ -152,7 +602,7 @@ class DNATools:
     def check_self_dimer(self, seq, min_match=4):
         """检查序列是否可能形成自二聚体"""
         seq = seq.upper()
-        rev_comp = str(Seq(seq).reverse_complement())
+        rev_comp = reverse_complement(seq)
         
         for i in range(len(seq) - min_match + 1):
             for j in range(len(rev_comp) - min_match + 1):
@@ -165,7 +615,7 @@ class DNATools:
         """检查两个引物是否可能形成二聚体"""
         primer1 = primer1.upper()
         primer2 = primer2.upper()
-        rev_comp2 = str(Seq(primer2).reverse_complement())
+        rev_comp2 = reverse_complement(primer2)
         
         for i in range(len(primer1) - min_match + 1):
             for j in range(len(rev_comp2) - min_match + 1):
@@ -175,19 +625,39 @@ class DNATools:
         return False
     
     
-    def design_gibson_primers(self, fragments, vector, homology_length, linearization_method, linearization_info):
+    def design_gibson_primers(self, fragments, vector, homology_length, linearization_method, linearization_info,
+                              split_overlaps=False, homology_tm=None, params=None, score_weights=None, top_k=1,
+                              workers=None):
         """设计Gibson Assembly引物
         
         参数:
             fragments: 插入片段列表
-            vector: 载体序列
+            vector: 载体序列记录，或由get_vector_profile得到的VectorProfile
+                    （大载体重复设计时直接传入VectorProfile，可省去每次对整条序列计算哈希）
             homology_length: 同源臂长度
             linearization_method: 线性化方式 ('restriction' 或 'pcr')
             linearization_info: 线性化相关信息
+            split_overlaps: 是否在相邻片段的引物之间拆分重叠区，
+                            而不是让两侧引物都携带完整同源臂。
+                            未提供homology_tm时，拆分后片段之间的重叠区总长为homology_length，
+                            只有默认模式（2*homology_length）的一半；载体与片段的连接处不变。
+                            例如三个片段、25bp同源臂时，各重叠区为25/25/25/25而不是25/50/50/25
+            homology_tm: 重叠区目标Tm范围(最低, 最高)，例如(48, 52)。
+                         提供时逐个连接处延长或截短同源臂，使整个重叠区（两侧引物携带的尾巴之和）
+                         的Tm落入该范围；各连接处选定的长度和重叠区Tm记录在结果的junctions中
+            params: 本次设计使用的引物设计参数，默认使用实例的primer_params
+            score_weights: 本次设计使用的评分罚分权重，默认使用实例的score_weights
+            top_k: 每个片段保留的引物对数量；大于1时除最佳引物对外，
+                   其余引物对按分数从高到低记录在该片段的alternatives中
+            workers: 大于1时在该数量的工作进程中并行为各片段评分；
+                     只向工作进程发送片段两端的短序列，结果顺序与串行计算相同
         
         返回:
             包含引物信息的字典
         """
+        params = self._resolve_params(params)
+        scorer = self.get_scorer(params, score_weights)
+        
         # 结果字典
         result = {
             "fragment_primers": []
@@ -200,191 +670,759 @@ class DNATools:
         if not vector:
             raise ValueError("未提供载体序列")
         
-        # 处理载体序列
-        vector_seq = str(vector.seq)
+        # 处理载体序列，规范化序列和酶切位点来自按序列哈希缓存的预计算信息
+        profile = self.get_vector_profile(vector)
+        
+        # 按Tm确定同源臂时，载体两端需要截取足够长的序列供延长
+        arm_window = homology_length
+        if homology_tm:
+            arm_window = max(homology_length, params.homology_max_length)
         vector_name = vector.id if vector.id and vector.id.strip() != "" else "Vector"
+        vector_start, vector_end = self._linearize_vector(
+            result, profile, vector_name, linearization_method, linearization_info, arm_window, scorer
+        )
+        
+        fragment_names = self._fragment_names(fragments)
+        # 片段序列按原样传递（可以是str、Seq或PackedSeq），只解码两端需要的短窗口
+        fragment_seqs = [fragment.seq for fragment in fragments]
+        fragment_ends = [self._terminal_windows(seq, arm_window) for seq in fragment_seqs]
+        
+        # 并行评分时只把引物结合区可能用到的两端序列发送到工作进程
+        executor = None
+        if workers and workers > 1 and len(fragment_seqs) > 1:
+            executor = self._get_executor(workers)
+            binding_window = max(params.max_size, params.opt_size)
+            fragment_seqs = [EndWindows(seq, binding_window) for seq in fragment_seqs]
+        
+        # 确定各连接处的同源臂，并为每个片段选出引物对
+        if split_overlaps:
+            primer_pairs, junctions = self._design_split_junctions(
+                fragment_seqs, fragment_ends, vector_start, vector_end, homology_length, homology_tm, scorer, top_k,
+                executor
+            )
+        else:
+            junctions = self._full_arm_junctions(
+                fragment_ends, vector_start, vector_end, homology_length, homology_tm, params
+            )
+            # 左侧同源臂来自上游连接处，右侧同源臂来自下游连接处
+            homologies = [(junctions[i]["fw_tail"], junctions[i+1]["rv_tail"]) for i in range(len(fragment_seqs))]
+            if executor is not None:
+                # 同源臂确定后各片段互相独立，map按提交顺序返回结果
+                tasks = [
+                    (fragment_seq, left, right, params, scorer.weights, top_k)
+                    for fragment_seq, (left, right) in zip(fragment_seqs, homologies)
+                ]
+                primer_pairs = list(executor.map(_design_pair_task, tasks))
+            else:
+                # 设计一对引物，控制退火温度差异
+                primer_pairs = [
+                    self.design_balanced_primer_pair(fragment_seq, left, right, scorer=scorer, top_k=top_k)
+                    for fragment_seq, (left, right) in zip(fragment_seqs, homologies)
+                ]
+        
+        cascade_stats = [primer_pair["stats"] for primer_pair in primer_pairs]
+        return self._assemble_design(result, primer_pairs, junctions, fragment_names, vector_name, params,
+                                     cascade_stats)
+    
+    def sweep_homology_lengths(self, fragments, vector, linearization_method, linearization_info,
+                               homology_lengths=None, params=None, score_weights=None, top_k=1):
+        """一次评估多个同源臂长度，返回每个长度的汇总和最佳设计
+        
+        线性化载体、片段两端窗口和结合区的窗口统计（长度、3'端、GC含量、Tm）与同源臂长度无关，
+        只计算一次；每个长度只为带有该长度同源臂的引物完成连续重复碱基、结构和引物二聚体检查。
+        每个长度选出的引物对与用该长度单独调用design_gibson_primers（默认的完整同源臂模式）相同。
+        
+        参数:
+            fragments: 插入片段列表
+            vector: 载体序列记录或VectorProfile
+            linearization_method: 线性化方式 ('restriction' 或 'pcr')
+            linearization_info: 线性化相关信息
+            homology_lengths: 要评估的同源臂长度，默认为homology_min_length到homology_max_length
+            params: 引物设计参数，默认使用实例的primer_params
+            score_weights: 评分罚分权重，默认使用实例的score_weights
+            top_k: 最佳设计中每个片段保留的引物对数量
+        
+        返回:
+            字典:
+                summary: 按长度排列的汇总列表，每项包括homology_length、total_score（各片段引物对分数之和）、
+                         min_pair_score、pair_scores和max_primer_length
+                best_length: total_score最高的长度，分数相同时取较短的同源臂
+                best: 该长度的设计结果，格式与design_gibson_primers相同
+        """
+        params = self._resolve_params(params)
+        scorer = self.get_scorer(params, score_weights)
+        if homology_lengths is None:
+            homology_lengths = range(params.homology_min_length, params.homology_max_length + 1)
+        homology_lengths = sorted(set(homology_lengths))
+        
+        # 检查输入参数
+        if not homology_lengths or homology_lengths[0] <= 0:
+            raise ValueError("同源臂长度必须为正整数")
+        if not fragments:
+            raise ValueError("未提供插入片段")
+        if not vector:
+            raise ValueError("未提供载体序列")
+        
+        # 线性化和两端窗口按最长的同源臂只做一次
+        result = {
+            "fragment_primers": []
+        }
+        profile = self.get_vector_profile(vector)
+        arm_window = homology_lengths[-1]
+        vector_name = vector.id if vector.id and vector.id.strip() != "" else "Vector"
+        vector_start, vector_end = self._linearize_vector(
+            result, profile, vector_name, linearization_method, linearization_info, arm_window, scorer
+        )
+        fragment_names = self._fragment_names(fragments)
+        fragment_seqs = [fragment.seq for fragment in fragments]
+        fragment_ends = [self._terminal_windows(seq, arm_window) for seq in fragment_seqs]
+        
+        # 不带同源臂的结合区及其窗口统计，各长度共用
+        binding_candidates = []
+        for fragment_seq in fragment_seqs:
+            _, fw_sites, _, rv_sites = self._binding_sites(fragment_seq, "", "", scorer)
+            binding_candidates.append((scorer.candidates(fw_sites, fw_sites), scorer.candidates(rv_sites, rv_sites)))
+        
+        summary = []
+        best = None
+        for homology_length in homology_lengths:
+            junctions = self._full_arm_junctions(
+                fragment_ends, vector_start, vector_end, homology_length, None, params
+            )
+            primer_pairs = []
+            for i, fragment_seq in enumerate(fragment_seqs):
+                left = junctions[i]["fw_tail"]
+                right = junctions[i+1]["rv_tail"]
+                fw_base, rv_base = binding_candidates[i]
+                primer_pair = None
+                if fw_base and rv_base:
+                    primer_pair = self._rank_candidates(
+                        scorer, scorer.extend(fw_base, left), scorer.extend(rv_base, self.reverse_complement(right)),
+                        top_k
+                    )
+                if primer_pair is None:
+                    primer_pair = self.design_balanced_primer_pair(fragment_seq, left, right, scorer=scorer,
+                                                                   top_k=top_k)
+                primer_pairs.append(primer_pair)
+            
+            pair_scores = [primer_pair["score"] for primer_pair in primer_pairs]
+            total_score = sum(pair_scores)
+            summary.append({
+                "homology_length": homology_length,
+                "total_score": total_score,
+                "min_pair_score": min(pair_scores),
+                "pair_scores": pair_scores,
+                "max_primer_length": max(
+                    len(primer) for primer_pair in primer_pairs
+                    for primer in (primer_pair["fw_primer"], primer_pair["rv_primer"])
+                )
+            })
+            # 长度按升序评估，只有严格更高的总分才替换，分数相同时保留较短的同源臂
+            if best is None or total_score > best[0]:
+                best = (total_score, homology_length, primer_pairs, junctions)
+        
+        _, best_length, primer_pairs, junctions = best
+        linearization = result["linearization_info"]
+        if linearization["method"] in ("pcr", "pcr_auto"):
+            # 与单独设计时相同，记录最佳长度对应的PCR产物两端
+            linearization["pcr_product_5_end"] = vector_start[:best_length]
+            linearization["pcr_product_3_end"] = vector_end[-best_length:]
+        cascade_stats = [primer_pair["stats"] for primer_pair in primer_pairs]
+        return {
+            "summary": summary,
+            "best_length": best_length,
+            "best": self._assemble_design(result, primer_pairs, junctions, fragment_names, vector_name, params,
+                                          cascade_stats)
+        }
+    
+    def recommend_enzymes(self, fragments, vector, homology_length=25, enzymes=None, homology_tm=None, params=None,
+                          score_weights=None, top_k=1, workers=None):
+        """为载体上每个单切位点的限制酶完成一次完整设计，按设计质量推荐线性化用的限制酶
+        
+        酶切位点来自按序列哈希缓存的载体预计算信息，不重新扫描载体。各酶的设计只有载体两侧的
+        连接处不同：片段两端窗口和结合区的窗口统计只计算一次，两侧同源臂都相同的片段
+        （例如多片段组装中间的片段）在所有酶之间共用同一个引物对。每个酶的设计结果与用该酶
+        单独调用design_gibson_primers（默认的完整同源臂模式）相同。
+        
+        参数:
+            fragments: 插入片段列表
+            vector: 载体序列记录或VectorProfile
+            homology_length: 同源臂长度
+            enzymes: 候选限制酶名称，默认为ENZYME_SITES中的所有限制酶；只评估在载体上单切的酶
+            homology_tm: 同源臂目标Tm范围(最低, 最高)，含义与design_gibson_primers相同
+            params: 引物设计参数，默认使用实例的primer_params
+            score_weights: 评分罚分权重，默认使用实例的score_weights
+            top_k: 每个片段保留的引物对数量
+            workers: 大于1时在该数量的工作进程中并行设计所有酶需要的引物对
+        
+        返回:
+            按推荐顺序排列的字典列表，每项包括enzyme、site_sequence、cut_position、
+            worst_primer_score（所有引物中最低的质量分数）、max_tm_difference（各引物对结合区Tm差的最大值）、
+            total_score（各片段引物对分数之和）和design（与design_gibson_primers格式相同的设计结果）；
+            先按worst_primer_score从高到低，再按max_tm_difference从小到大，最后按total_score从高到低排列
+        """
+        params = self._resolve_params(params)
+        scorer = self.get_scorer(params, score_weights)
+        
+        # 检查输入参数
+        if not fragments:
+            raise ValueError("未提供插入片段")
+        if not vector:
+            raise ValueError("未提供载体序列")
+        
+        profile = self.get_vector_profile(vector)
+        candidates = profile.unique_cutters()
+        if enzymes is not None:
+            unknown = [enzyme for enzyme in enzymes if enzyme not in ENZYME_SITES]
+            if unknown:
+                raise ValueError(f"未知的限制酶: {', '.join(unknown)}")
+            candidates = [enzyme for enzyme in candidates if enzyme in enzymes]
+        if not candidates:
+            return []
+        
+        arm_window = homology_length
+        if homology_tm:
+            arm_window = max(homology_length, params.homology_max_length)
+        vector_name = vector.id if vector.id and vector.id.strip() != "" else "Vector"
+        fragment_names = self._fragment_names(fragments)
+        fragment_seqs = [fragment.seq for fragment in fragments]
+        fragment_ends = [self._terminal_windows(seq, arm_window) for seq in fragment_seqs]
+        
+        # 每个酶的线性化和连接处同源臂
+        linearizations = []
+        for enzyme in candidates:
+            result = {
+                "fragment_primers": []
+            }
+            vector_start, vector_end = self._linearize_vector(
+                result, profile, vector_name, "restriction", {"enzyme": enzyme}, arm_window, scorer
+            )
+            junctions = self._full_arm_junctions(
+                fragment_ends, vector_start, vector_end, homology_length, homology_tm, params
+            )
+            linearizations.append((enzyme, result, junctions))
+        
+        pair_sets = self._design_junction_sets(
+            fragment_seqs, [junctions for _, _, junctions in linearizations], scorer, top_k, workers
+        )
+        
+        # 每个引物对中较差的一条引物的质量分数（结合区为去掉同源臂后的部分），共用的引物对只计算一次
+        worst_scores = {}
+        recommendations = []
+        for (enzyme, result, junctions), primer_pairs in zip(linearizations, pair_sets):
+            worst_primer_score = None
+            for i, primer_pair in enumerate(primer_pairs):
+                left, right = junctions[i]["fw_tail"], junctions[i+1]["rv_tail"]
+                worst = worst_scores.get((i, left, right))
+                if worst is None:
+                    worst = min(
+                        scorer.score(primer_pair["fw_primer"], primer_pair["fw_primer"][len(left):]),
+                        scorer.score(primer_pair["rv_primer"], primer_pair["rv_primer"][len(right):])
+                    )
+                    worst_scores[(i, left, right)] = worst
+                worst_primer_score = worst if worst_primer_score is None else min(worst_primer_score, worst)
+            info = result["linearization_info"]
+            cascade_stats = [primer_pair["stats"] for primer_pair in primer_pairs]
+            recommendations.append({
+                "enzyme": enzyme,
+                "site_sequence": info["site_sequence"],
+                "cut_position": info["cut_position"],
+                "worst_primer_score": worst_primer_score,
+                "max_tm_difference": max(primer_pair["tm_difference"] for primer_pair in primer_pairs),
+                "total_score": sum(primer_pair["score"] for primer_pair in primer_pairs),
+                "design": self._assemble_design(result, primer_pairs, junctions, fragment_names, vector_name, params,
+                                                cascade_stats)
+            })
+        
+        # 排序是稳定的，条件相同时保持ENZYME_SITES中的顺序
+        recommendations.sort(key=lambda item: (
+            -item["worst_primer_score"], item["max_tm_difference"], -item["total_score"]
+        ))
+        return recommendations
+    
+    def design_panel(self, fragments, backbones, homology_length=25, homology_tm=None, params=None,
+                     score_weights=None, top_k=1, workers=None):
+        """把同一组插入片段分别组装到多个载体中（载体组合），合并输出所有引物
+        
+        片段之间的连接处与载体无关，只计算一次，中间片段的引物对在所有载体之间共用；
+        每个载体只重新设计与载体相连的第一个和最后一个片段的引物。
+        每个载体的设计结果与单独调用design_gibson_primers（默认的完整同源臂模式）相同。
+        
+        参数:
+            fragments: 插入片段列表
+            backbones: 载体列表，每项为字典:
+                vector: 载体序列记录或VectorProfile
+                linearization_method: 线性化方式 ('restriction'、'pcr' 或 'pcr_auto')
+                linearization_info: 线性化相关信息
+                name: 可选的载体名称，默认使用序列ID；重名时按出现顺序添加编号后缀
+            homology_length: 同源臂长度
+            homology_tm: 同源臂目标Tm范围(最低, 最高)，含义与design_gibson_primers相同
+            params: 引物设计参数，默认使用实例的primer_params
+            score_weights: 评分罚分权重，默认使用实例的score_weights
+            top_k: 每个片段保留的引物对数量
+            workers: 大于1时在该数量的工作进程中并行设计所有载体需要的引物对
+        
+        返回:
+            字典:
+                designs: (载体名称, 设计结果)列表，顺序与backbones相同
+                inventory: 合并后的引物列表，序列相同的引物只出现一次，
+                           backbones为使用该引物的载体名称列表（见panel_inventory）
+        """
+        params = self._resolve_params(params)
+        scorer = self.get_scorer(params, score_weights)
+        
+        # 检查输入参数
+        if not fragments:
+            raise ValueError("未提供插入片段")
+        if not backbones:
+            raise ValueError("未提供载体序列")
+        
+        arm_window = homology_length
+        if homology_tm:
+            arm_window = max(homology_length, params.homology_max_length)
+        fragment_names = self._fragment_names(fragments)
+        fragment_seqs = [fragment.seq for fragment in fragments]
+        fragment_ends = [self._terminal_windows(seq, arm_window) for seq in fragment_seqs]
+        
+        # 每个载体的线性化和连接处同源臂；片段之间的连接处在所有载体中相同
+        linearizations = []
+        for backbone in backbones:
+            vector = backbone.get("vector")
+            if not vector:
+                raise ValueError("未提供载体序列")
+            profile = self.get_vector_profile(vector)
+            vector_name = vector.id if vector.id and vector.id.strip() != "" else "Vector"
+            result = {
+                "fragment_primers": []
+            }
+            vector_start, vector_end = self._linearize_vector(
+                result, profile, vector_name, backbone.get("linearization_method", "restriction"),
+                backbone.get("linearization_info", {}), arm_window, scorer
+            )
+            junctions = self._full_arm_junctions(
+                fragment_ends, vector_start, vector_end, homology_length, homology_tm, params
+            )
+            linearizations.append((backbone.get("name") or vector_name, vector_name, result, junctions))
+        
+        pair_sets = self._design_junction_sets(
+            fragment_seqs, [junctions for _, _, _, junctions in linearizations], scorer, top_k, workers
+        )
+        
+        # 载体重名时按出现顺序添加编号后缀
+        total_counts = {}
+        for name, _, _, _ in linearizations:
+            total_counts[name] = total_counts.get(name, 0) + 1
+        seen_counts = {}
+        designs = []
+        for (name, vector_name, result, junctions), primer_pairs in zip(linearizations, pair_sets):
+            seen_counts[name] = seen_counts.get(name, 0) + 1
+            if total_counts[name] > 1:
+                name = f"{name}_{seen_counts[name]}"
+            cascade_stats = [primer_pair["stats"] for primer_pair in primer_pairs]
+            designs.append((name, self._assemble_design(
+                result, primer_pairs, junctions, fragment_names, vector_name, params, cascade_stats
+            )))
+        
+        return {
+            "designs": designs,
+            "inventory": self.panel_inventory(designs)
+        }
+    
+    def panel_inventory(self, designs):
+        """把多个设计结果中的引物合并为一个引物清单
+        
+        序列相同的引物只保留一条，并记录使用它的所有载体；同一个引物名称在不同载体中对应
+        不同序列时（例如与载体相连的片段引物），名称后加上第一个使用它的载体名称。
+        备选引物对不计入清单。
+        
+        参数:
+            designs: (载体名称, 设计结果)列表，例如design_panel结果中的designs
+        
+        返回:
+            引物分析结果字典的列表（格式与analyze_primer相同，另有name和backbones），按首次出现的顺序排列
+        """
+        inventory = OrderedDict()
+        for backbone_name, result in designs:
+            named = self.with_display_names(result)
+            primers = []
+            if "vector_primers" in named:
+                primers.extend((named["vector_primers"]["fw"], named["vector_primers"]["rv"]))
+            for primer_info in named["fragment_primers"]:
+                primers.extend((primer_info["fw"], primer_info["rv"]))
+            for primer in primers:
+                entry = inventory.get(primer["sequence"])
+                if entry is None:
+                    entry = dict(primer)
+                    entry["backbones"] = []
+                    inventory[primer["sequence"]] = entry
+                if backbone_name not in entry["backbones"]:
+                    entry["backbones"].append(backbone_name)
+        
+        # 同名不同序列的引物加上载体名称以示区分
+        name_counts = {}
+        for entry in inventory.values():
+            name_counts[entry["name"]] = name_counts.get(entry["name"], 0) + 1
+        for entry in inventory.values():
+            if name_counts[entry["name"]] > 1:
+                entry["name"] = f"{entry['name']}-{entry['backbones'][0]}"
+        return list(inventory.values())
+    
+    def _design_junction_sets(self, fragment_seqs, junction_sets, scorer, top_k, workers):
+        """为多组连接处同源臂（例如同一组片段在不同线性化载体中的组装）设计各片段的引物对
+        
+        相同的（片段, 左侧同源臂, 右侧同源臂）组合只设计一次；串行计算时各片段结合区的窗口统计
+        只计算一次，再加上不同的同源臂。workers大于1时不同的组合在工作进程中并行设计。
+        
+        返回:
+            与junction_sets一一对应的引物对列表；共用的引物对是同一个字典对象
+        """
+        params = scorer.params
+        tasks = list(dict.fromkeys(
+            (i, junctions[i]["fw_tail"], junctions[i+1]["rv_tail"])
+            for junctions in junction_sets for i in range(len(fragment_seqs))
+        ))
+        if workers and workers > 1 and len(tasks) > 1:
+            executor = self._get_executor(workers)
+            binding_window = max(params.max_size, params.opt_size)
+            windows = [EndWindows(seq, binding_window) for seq in fragment_seqs]
+            designed = executor.map(_design_pair_task, [
+                (windows[i], left, right, params, scorer.weights, top_k) for i, left, right in tasks
+            ])
+        else:
+            # 不带同源臂的结合区及其窗口统计，各组共用
+            binding_candidates = {}
+            designed = []
+            for i, left, right in tasks:
+                if i not in binding_candidates:
+                    _, fw_sites, _, rv_sites = self._binding_sites(fragment_seqs[i], "", "", scorer)
+                    binding_candidates[i] = (scorer.candidates(fw_sites, fw_sites),
+                                             scorer.candidates(rv_sites, rv_sites))
+                fw_base, rv_base = binding_candidates[i]
+                primer_pair = None
+                if fw_base and rv_base:
+                    primer_pair = self._rank_candidates(
+                        scorer, scorer.extend(fw_base, left), scorer.extend(rv_base, self.reverse_complement(right)),
+                        top_k
+                    )
+                if primer_pair is None:
+                    primer_pair = self.design_balanced_primer_pair(fragment_seqs[i], left, right, scorer=scorer,
+                                                                   top_k=top_k)
+                designed.append(primer_pair)
+        
+        pairs = dict(zip(tasks, designed))
+        return [
+            [pairs[(i, junctions[i]["fw_tail"], junctions[i+1]["rv_tail"])] for i in range(len(fragment_seqs))]
+            for junctions in junction_sets
+        ]
+    
+    def scan_insertion_sites(self, vector, region=None, homology_length=25, homology_tm=None, step=1, top_n=20,
+                             params=None, score_weights=None):
+        """在环状载体的每个位置（或指定区域）评估插入片段的插入点，返回排名靠前的位点
+        
+        每个位置用一对反向PCR引物线性化载体（正向引物为插入点下游opt_size个碱基，
+        反向引物为上游opt_size个碱基的反向互补），评估两条载体引物的质量、
+        两侧同源臂的GC含量（和可选的Tm），以及引物3'端在载体两条链上是否唯一。
+        所有位置的统计按滚动窗口一次算出，只有可能进入前top_n的位置才完整评分（见site_scan模块）。
+        选定的位点可以直接用于design_gibson_primers的PCR线性化（fw_primer和rv_primer）。
+        
+        参数:
+            vector: 载体序列记录或VectorProfile
+            region: 可选的扫描区域(起点, 终点)，0起始、不含终点；起点大于终点时跨越载体的起点
+            homology_length: 插入片段引物携带的同源臂长度
+            homology_tm: 可选的同源臂目标Tm范围(最低, 最高)
+            step: 扫描步长
+            top_n: 返回的位点数量
+            params: 引物设计参数，默认使用实例的primer_params
+            score_weights: 评分罚分权重，默认使用实例的score_weights
+        
+        返回:
+            位点字典列表，包括position、score、unique、载体引物及其分数和Tm、
+            3'端k-mer的结合位点数（fw_matches、rv_matches）和两侧同源臂；
+            3'端唯一的位点排在前面，其次按分数从高到低排列
+        """
+        # 只在扫描时才导入NumPy
+        from site_scan import scan_sites
+        
+        if not vector:
+            raise ValueError("未提供载体序列")
+        if step < 1:
+            raise ValueError("扫描步长必须为正整数")
+        if top_n < 1:
+            raise ValueError("返回的位点数量必须为正整数")
+        profile = self.get_vector_profile(vector)
+        total = len(profile)
+        if region is None:
+            positions = range(0, total, step)
+        else:
+            start, end = region[0] % total, region[1] % total
+            span = (end - start) % total or total
+            positions = [(start + offset) % total for offset in range(0, span, step)]
+        return scan_sites(
+            profile.sequence, self.get_scorer(params, score_weights), homology_length, homology_tm,
+            positions, profile.kmer_size, top_n
+        )
+    
+    def design_vector_primers(self, vector, position, delete_end=None, params=None, score_weights=None, scorer=None,
+                              top_k=1):
+        """在插入位置两侧设计向外扩增（反向PCR）的载体线性化引物
+        
+        正向引物从delete_end（不删除时为position）开始向下游结合，反向引物结合position上游，
+        扩增产物为删除vector[position:delete_end]后的整个载体。候选引物的评分和Tm平衡与
+        design_balanced_primer_pair相同；3'端k-mer在载体两条链上还有其他结合位点的候选引物
+        （通过载体预计算信息中的k-mer索引查找，每个载体只建一次）会被排除，
+        某一侧没有特异的候选引物时才使用全部候选引物。
+        
+        参数:
+            vector: 载体序列记录或VectorProfile
+            position: 插入位置（0起始，插入到position-1与position之间）
+            delete_end: 可选的删除区域终点（不含），删除vector[position:delete_end]，
+                        小于position时删除区域跨越载体的起点
+            params: 引物设计参数，默认使用实例的primer_params
+            score_weights: 评分罚分权重，默认使用实例的score_weights
+            scorer: 已编译的评分器，提供时忽略params和score_weights
+            top_k: 保留的引物对数量，其余引物对放在alternatives中
+        
+        返回:
+            最佳引物对字典（fw_primer、rv_primer、score、tm_difference、alternatives等），另外包括
+            fw_position（正向引物的起始位置）、rv_position（反向引物的反向互补序列的起始位置）、
+            insert_position、delete_end、deleted_length、fw_off_targets和rv_off_targets（脱靶位点数）
+        """
+        if scorer is None:
+            scorer = self.get_scorer(params, score_weights)
+        profile = self.get_vector_profile(vector)
+        total = len(profile)
+        position %= total
+        end = position if delete_end is None else delete_end % total
+        deleted_length = (end - position) % total
+        
+        # 模板：正向引物一侧为删除区域下游的序列，反向引物一侧为插入位置上游的序列
+        window = max(scorer.binding_lengths)
+        if total - deleted_length < 2 * window:
+            raise ValueError(f"删除后的载体过短（{total - deleted_length} bp），无法设计载体引物")
+        template = profile.window(end, window) + profile.window(position - window, window)
+        fw_primers, fw_sites, rv_primers, rv_sites = self._binding_sites(template, "", "", scorer)
+        
+        # 排除3'端在载体上有其他结合位点的候选引物
+        candidates = []
+        for primers, sites in ((fw_primers, fw_sites), (rv_primers, rv_sites)):
+            specific = [i for i, primer in enumerate(primers) if self._off_targets(profile, primer) == 0]
+            if specific:
+                primers = [primers[i] for i in specific]
+                sites = [sites[i] for i in specific]
+            candidates.append((primers, sites))
+        (fw_primers, fw_sites), (rv_primers, rv_sites) = candidates
+        
+        best_pair = None
+        if fw_sites and rv_sites:
+            best_pair = self._rank_candidates(
+                scorer, scorer.candidates(fw_primers, fw_sites), scorer.candidates(rv_primers, rv_sites), top_k
+            )
+        if best_pair is None:
+            best_pair = self.design_balanced_primer_pair(template, "", "", scorer=scorer, top_k=top_k)
+        
+        for pair in [best_pair] + best_pair["alternatives"]:
+            pair["fw_position"] = end
+            pair["rv_position"] = (position - len(pair["rv_primer"])) % total
+            pair["fw_off_targets"] = self._off_targets(profile, pair["fw_primer"])
+            pair["rv_off_targets"] = self._off_targets(profile, pair["rv_primer"])
+        best_pair["insert_position"] = position
+        best_pair["delete_end"] = None if delete_end is None else end
+        best_pair["deleted_length"] = deleted_length
+        return best_pair
+    
+    def _off_targets(self, profile, primer):
+        """引物3'端k-mer在环状载体两条链上除目标位点以外的结合位点数（通过k-mer索引查找）"""
+        kmer = primer[-profile.kmer_size:].upper()
+        rc_kmer = reverse_complement(kmer)
+        loci = {(pos, True) for pos in profile.kmer_positions(kmer)}
+        # 回文k-mer在两条链上的出现是同一个位点
+        if rc_kmer != kmer:
+            loci.update((pos, False) for pos in profile.kmer_positions(rc_kmer))
+        return max(0, len(loci) - 1)
+    
+    def _fragment_names(self, fragments):
+        """获取片段名称，如果ID为空则使用索引"""
+        return [
+            fragment.id if fragment.id and fragment.id.strip() != "" else f"Fragment{i+1}"
+            for i, fragment in enumerate(fragments)
+        ]
+    
+    def _linearize_vector(self, result, profile, vector_name, linearization_method, linearization_info, arm_window,
+                          scorer):
+        """按线性化方式确定线性化载体的两端，线性化信息（和PCR载体引物）写入result
+        
+        参数:
+            result: 设计结果字典
+            profile: 载体的VectorProfile
+            vector_name: 载体名称，用于命名载体引物
+            linearization_method: 线性化方式 ('restriction'、'pcr' 或 'pcr_auto')
+            linearization_info: 线性化相关信息
+            arm_window: 两端截取的碱基数
+            scorer: 本次设计的评分器（pcr_auto模式用它设计载体引物）
+        
+        返回:
+            (线性化载体5'端窗口, 3'端窗口)
+        """
+        params = scorer.params
         
         # 根据线性化方式处理载体
         if linearization_method == 'restriction':
             # 使用限制酶切
             enzyme = linearization_info.get('enzyme', '')
             
-            # 酶切位点数据，格式为：'酶名': ('识别序列', 切割位置)
-            # 切割位置表示在识别序列中从5'端开始计数的切割位置
-            # 例如：EcoRI (G^AATTC) 在第1个位置切割，表示为1
-            enzyme_sites = {
-                'EcoRI': ('GAATTC', 1),     # G^AATTC
-                'BamHI': ('GGATCC', 1),     # G^GATCC
-                'HindIII': ('AAGCTT', 1),   # A^AGCTT
-                'XhoI': ('CTCGAG', 1),      # C^TCGAG
-                'NdeI': ('CATATG', 2),      # CA^TATG
-                'XbaI': ('TCTAGA', 1),      # T^CTAGA
-                'PstI': ('CTGCAG', 5),      # CTGCA^G
-                'SalI': ('GTCGAC', 1),      # G^TCGAC
-                'SmaI': ('CCCGGG', 3),      # CCC^GGG
-                'KpnI': ('GGTACC', 5),      # GGTAC^C
-                'SacI': ('GAGCTC', 5),      # GAGCT^C
-                'SphI': ('GCATGC', 5),      # GCATG^C
-                'NotI': ('GCGGCCGC', 2),    # GC^GGCCGC
-                'BglII': ('AGATCT', 1),     # A^GATCT
-                'NcoI': ('CCATGG', 1)       # C^CATGG
-            }
-            
-            # 获取酶切位点信息
-            enzyme_info = enzyme_sites.get(enzyme)
+            # 获取酶切位点信息，找不到位点时报错并列出可用的单切位点酶
+            enzyme_info = ENZYME_SITES.get(enzyme)
             if not enzyme_info:
-                # 如果找不到酶切位点信息，使用随机位置
-                cut_site = random.randint(0, len(vector_seq) - 1)
-                linear_vector = vector_seq[cut_site:] + vector_seq[:cut_site]
-                
-                # 记录使用随机位置的信息
-                result["linearization_info"] = {
-                    "method": "restriction",
-                    "enzyme": enzyme,
-                    "note": "未找到酶切位点信息，使用随机位置"
-                }
-            else:
-                # 解析酶切位点信息
-                site_seq, cut_pos = enzyme_info
-                
-                # 查找酶切位点在载体上的位置
-                site_pos = vector_seq.upper().find(site_seq.upper())
-                if site_pos == -1:
-                    # 如果找不到酶切位点，使用随机位置
-                    cut_site = random.randint(0, len(vector_seq) - 1)
-                    linear_vector = vector_seq[cut_site:] + vector_seq[:cut_site]
-                    
-                    # 记录使用随机位置的信息
-                    result["linearization_info"] = {
-                        "method": "restriction",
-                        "enzyme": enzyme,
-                        "note": f"载体中未找到{enzyme}酶切位点({site_seq})，使用随机位置"
-                    }
-                else:
-                    # 根据酶切位点和切割位置切割载体
-                    actual_cut_pos = site_pos + cut_pos
-                    linear_vector = vector_seq[actual_cut_pos:] + vector_seq[:actual_cut_pos]
-                    
-                    # 记录酶切信息
-                    result["linearization_info"] = {
-                        "method": "restriction",
-                        "enzyme": enzyme,
-                        "site_sequence": site_seq,
-                        "site_position": site_pos,
-                        "cut_position": actual_cut_pos,
-                        "note": f"{enzyme}在位置{actual_cut_pos}处切割载体"
-                    }
+                raise ValueError(f"未知的限制酶: {enzyme}")
+            site_seq, _ = enzyme_info
+            linearized = profile.linearized.get(enzyme)
+            if linearized is None:
+                unique = profile.unique_cutters()
+                hint = f"，载体上的单切位点酶: {', '.join(unique)}" if unique else ""
+                raise ValueError(f"载体中未找到{enzyme}酶切位点({site_seq}){hint}")
             
-            # 载体两端
-            vector_start = linear_vector[:homology_length]
-            vector_end = linear_vector[-homology_length:]
+            # 根据酶切位点和切割位置切割载体
+            site_pos = linearized["site_position"]
+            cut_site = linearized["cut_position"]
             
-        else:
-            # 使用PCR扩增
-            fw_primer = linearization_info.get('fw_primer', '')
-            rv_primer = linearization_info.get('rv_primer', '')
-            
-            # 查找引物在载体上的位置
-            fw_pos = vector_seq.upper().find(fw_primer.upper())
-            rv_comp = self.reverse_complement(rv_primer)
-            rv_pos = vector_seq.upper().find(rv_comp.upper())
-            
-            if fw_pos == -1 or rv_pos == -1:
-                raise Exception("无法在载体序列中找到PCR引物")
-            
-            # 模拟PCR扩增后的载体序列
-            # PCR会从引物的3'端开始延伸，所以需要包含整个引物序列
-            if fw_pos < rv_pos:
-                # 正常情况：正向引物在反向引物之前
-                pcr_product = fw_primer + vector_seq[fw_pos+len(fw_primer):rv_pos] + rv_comp
-            else:
-                # 特殊情况：正向引物在反向引物之后（跨越环状载体的起点）
-                pcr_product = fw_primer + vector_seq[fw_pos+len(fw_primer):] + vector_seq[:rv_pos] + rv_comp
-            
-            # 线性化后的载体序列 - 将PCR产物视为线性化载体
-            linear_vector = pcr_product
-            
-            # 载体两端 - 这里是PCR产物的两端，相当于酶切位点的两端
-            # 5'端是正向引物序列，3'端是反向引物的反向互补序列
-            vector_start = linear_vector[:homology_length]  # PCR产物5'端（正向引物序列）
-            vector_end = linear_vector[-homology_length:]   # PCR产物3'端（反向引物的反向互补序列）
-            
-            # 添加载体引物信息，并命名为 Vector-F 和 Vector-R
-            fw_analysis = self.analyze_primer(fw_primer)
-            rv_analysis = self.analyze_primer(rv_primer)
-            
-            # 添加引物名称
-            fw_analysis["name"] = f"{vector_name}-F"
-            rv_analysis["name"] = f"{vector_name}-R"
-            
-            result["vector_primers"] = {
-                "fw": fw_analysis,
-                "rv": rv_analysis
-            }
-            
-            # 记录PCR信息
+            # 记录酶切信息
             result["linearization_info"] = {
-                "method": "pcr",
-                "fw_primer": fw_primer,
-                "rv_primer": rv_primer,
-                "fw_position": fw_pos,
-                "rv_position": rv_pos,
-                "pcr_product_length": len(pcr_product),
-                "pcr_product_5_end": vector_start,  # PCR产物5'端序列
-                "pcr_product_3_end": vector_end,    # PCR产物3'端序列
-                "note": "使用PCR引物扩增载体，PCR产物的5'端和3'端作为线性化载体的两端"
+                "method": "restriction",
+                "enzyme": enzyme,
+                "site_sequence": site_seq,
+                "site_position": site_pos,
+                "cut_position": cut_site,
+                "note": f"{enzyme}在位置{cut_site}处切割载体"
             }
-        
-        # 处理每个片段的引物
-        for i, fragment in enumerate(fragments):
-            fragment_seq = str(fragment.seq)
             
-            # 获取片段名称，如果ID为空则使用索引
-            fragment_name = fragment.id if fragment.id and fragment.id.strip() != "" else f"Fragment{i+1}"
+            # 载体两端，直接在环状序列上截取，不需要旋转整个载体
+            vector_start, vector_end = profile.linear_ends(cut_site, arm_window)
+            
+        elif linearization_method == 'pcr_auto':
+            # 在插入位置（或删除区域两侧）自动设计向外扩增的载体引物
+            if linearization_info.get('position') is None:
+                raise ValueError("未提供插入位置")
+            delete_end = linearization_info.get('delete_end')
+            vector_pair = self.design_vector_primers(
+                profile, int(linearization_info['position']), None if delete_end is None else int(delete_end),
+                scorer=scorer
+            )
+            fw_primer = vector_pair["fw_primer"]
+            rv_primer = vector_pair["rv_primer"]
+            vector_start, vector_end = self._pcr_linearization(
+                result, profile, vector_name, fw_primer, rv_primer,
+                vector_pair["fw_position"], vector_pair["rv_position"], arm_window, params
+            )
+            
+            # 记录插入位置、删除区域和引物特异性
+            info = result["linearization_info"]
+            info["method"] = "pcr_auto"
+            info["insert_position"] = vector_pair["insert_position"]
+            info["delete_end"] = vector_pair["delete_end"]
+            info["deleted_length"] = vector_pair["deleted_length"]
+            info["fw_off_targets"] = vector_pair["fw_off_targets"]
+            info["rv_off_targets"] = vector_pair["rv_off_targets"]
+            info["pair_score"] = vector_pair["score"]
+            info["note"] = "在插入位置两侧自动设计向外扩增的载体引物，PCR产物的5'端和3'端作为线性化载体的两端"
             
-            # 确定同源臂
-            if i == 0:
-                # 第一个片段：与载体末端和下一个片段起始同源
-                left_homology = vector_end
-                
-                if len(fragments) > 1:
-                    next_fragment = str(fragments[i+1].seq)
-                    right_homology = next_fragment[:homology_length]
-                else:
-                    # 只有一个片段的情况
-                    right_homology = vector_start
+        else:
+            # 使用PCR扩增
+            fw_primer = linearization_info.get('fw_primer', '')
+            rv_primer = linearization_info.get('rv_primer', '')
+            
+            # 查找引物在载体上的位置（通过k-mer索引定位）
+            fw_pos = profile.find(fw_primer)
+            rv_comp = self.reverse_complement(rv_primer)
+            rv_pos = profile.find(rv_comp)
             
-            elif i == len(fragments) - 1:
-                # 最后一个片段：与前一个片段末端和载体起始同源
-                prev_fragment = str(fragments[i-1].seq)
-                left_homology = prev_fragment[-homology_length:]
-                right_homology = vector_start
+            if fw_pos == -1 or rv_pos == -1:
+                raise ValueError("无法在载体序列中找到PCR引物")
             
-            else:
-                # 中间片段：与前后片段同源
-                prev_fragment = str(fragments[i-1].seq)
-                next_fragment = str(fragments[i+1].seq)
-                left_homology = prev_fragment[-homology_length:]
-                right_homology = next_fragment[:homology_length]
-            
-            # 设计一对引物，控制退火温度差异
-            best_primer_pair = self.design_balanced_primer_pair(
-                fragment_seq, left_homology, right_homology
+            vector_start, vector_end = self._pcr_linearization(
+                result, profile, vector_name, fw_primer, rv_primer, fw_pos, rv_pos, arm_window, params
             )
-            
-            fw_primer = best_primer_pair["fw_primer"]
-            rv_primer = best_primer_pair["rv_primer"]
+        
+        return vector_start, vector_end
+    
+    def _pcr_linearization(self, result, profile, vector_name, fw_primer, rv_primer, fw_pos, rv_pos, arm_window,
+                           params):
+        """PCR线性化：由载体引物及其位置得到PCR产物的两端，载体引物分析和PCR信息写入result
+        
+        参数:
+            fw_pos: 正向引物在载体上的起始位置
+            rv_pos: 反向引物的反向互补序列在载体上的起始位置
+        
+        返回:
+            (PCR产物5'端窗口, 3'端窗口)
+        """
+        vector_length = len(profile)
+        rv_comp = self.reverse_complement(rv_primer)
+        
+        # 模拟PCR扩增后的载体序列：正向引物 + 两引物之间的载体序列 + 反向引物的反向互补序列
+        # PCR会从引物的3'端开始延伸，所以需要包含整个引物序列
+        middle_start = fw_pos + len(fw_primer)
+        if fw_pos < rv_pos:
+            # 正常情况：正向引物在反向引物之前
+            middle_length = max(0, rv_pos - middle_start)
+        else:
+            # 特殊情况：正向引物在反向引物之后（跨越环状载体的起点）
+            middle_length = vector_length - middle_start + rv_pos
+        pcr_product_length = len(fw_primer) + middle_length + len(rv_comp)
+        
+        # 载体两端 - 这里是PCR产物的两端，相当于酶切位点的两端
+        # 只截取中间序列两端的短窗口拼接，不构建完整的PCR产物
+        middle_window = min(middle_length, arm_window)
+        middle_head = profile.window(middle_start, middle_window)
+        middle_tail = profile.window(middle_start + middle_length - middle_window, middle_window)
+        vector_start = (fw_primer + middle_head + rv_comp)[:arm_window]  # PCR产物5'端（正向引物序列）
+        vector_end = (fw_primer + middle_tail + rv_comp)[-arm_window:]   # PCR产物3'端（反向引物的反向互补序列）
+        
+        # 添加载体引物信息，并命名为 Vector-F 和 Vector-R
+        fw_analysis = self.analyze_primer(fw_primer, params)
+        rv_analysis = self.analyze_primer(rv_primer, params)
+        
+        # 添加引物名称
+        fw_analysis["name"] = f"{vector_name}-F"
+        rv_analysis["name"] = f"{vector_name}-R"
+        
+        result["vector_primers"] = {
+            "fw": fw_analysis,
+            "rv": rv_analysis
+        }
+        
+        # 记录PCR信息
+        result["linearization_info"] = {
+            "method": "pcr",
+            "fw_primer": fw_primer,
+            "rv_primer": rv_primer,
+            "fw_position": fw_pos,
+            "rv_position": rv_pos,
+            "pcr_product_length": pcr_product_length,
+            "pcr_product_5_end": vector_start,  # PCR产物5'端序列
+            "pcr_product_3_end": vector_end,    # PCR产物3'端序列
+            "note": "使用PCR引物扩增载体，PCR产物的5'端和3'端作为线性化载体的两端"
+        }
+        
+        return vector_start, vector_end
+    
+    def _assemble_design(self, result, primer_pairs, junctions, fragment_names, vector_name, params, cascade_stats):
+        """分析各片段选出的引物对和各连接处的重叠区，写入设计结果字典并返回"""
+        # 处理每个片段的引物
+        for i, primer_pair in enumerate(primer_pairs):
+            fw_primer = primer_pair["fw_primer"]
+            rv_primer = primer_pair["rv_primer"]
+            fragment_name = fragment_names[i]
             
             # 分析引物
-            fw_analysis = self.analyze_primer(fw_primer)
-            rv_analysis = self.analyze_primer(rv_primer)
+            fw_analysis = self.analyze_primer(fw_primer, params)
+            rv_analysis = self.analyze_primer(rv_primer, params)
             
             # 添加引物名称
             fw_analysis["name"] = f"{fragment_name}-F"
             rv_analysis["name"] = f"{fragment_name}-R"
             
             # 检查引物二聚体
-            primer_dimer = self.check_primer_dimer(fw_primer, rv_primer)
+            primer_dimer = self._pair_dimer(fw_primer, rv_primer, params)
             
             # 添加到结果，使用片段的ID作为名称
             result["fragment_primers"].append({
@@ -392,91 +1430,488 @@ class DNATools:
                 "fw": fw_analysis,
                 "rv": rv_analysis,
                 "primer_dimer": primer_dimer,
-                "tm_difference": abs(fw_analysis["tm"] - rv_analysis["tm"])
+                "tm_difference": abs(fw_analysis["tm"] - rv_analysis["tm"]),
+                "pair_score": primer_pair["score"],
+                "alternatives": [
+                    self._analyze_pair(alternative, rank, params)
+                    for rank, alternative in enumerate(primer_pair["alternatives"], start=2)
+                ]
+            })
+        
+        # 记录各连接处的重叠区信息
+        node_names = [vector_name] + fragment_names + [vector_name]
+        result["junctions"] = []
+        for j, junction in enumerate(junctions):
+            overlap = junction["fw_tail"] + junction["rv_tail"]
+            result["junctions"].append({
+                "left": node_names[j],
+                "right": node_names[j+1],
+                "overlap": overlap,
+                "overlap_length": len(overlap),
+                "overlap_tm": self.calculate_tm(overlap),
+                "fw_tail_length": len(junction["fw_tail"]),
+                "rv_tail_length": len(junction["rv_tail"])
             })
         
+        # 级联评分各阶段淘汰的候选引物数量（拆分模式需要所有引物对的分数，不做级联）
+        result["candidate_stats"] = self._merge_candidate_stats(cascade_stats)
+        
         return result
-
-    def design_balanced_primer_pair(self, fragment_seq, left_homology, right_homology):
-        """设计一对退火温度平衡的引物
+    
+    def _analyze_pair(self, primer_pair, rank, params=None):
+        """分析一个备选引物对，返回与片段引物结果相同格式的字典"""
+        params = self._resolve_params(params)
+        fw_analysis = self.analyze_primer(primer_pair["fw_primer"], params)
+        rv_analysis = self.analyze_primer(primer_pair["rv_primer"], params)
+        return {
+            "rank": rank,
+            "fw": fw_analysis,
+            "rv": rv_analysis,
+            "primer_dimer": self._pair_dimer(primer_pair["fw_primer"], primer_pair["rv_primer"], params),
+            "tm_difference": abs(fw_analysis["tm"] - rv_analysis["tm"]),
+            "pair_score": primer_pair["score"]
+        }
+    
+    def _merge_candidate_stats(self, stats_list):
+        """合并各片段的级联评分统计，没有统计时返回None"""
+        merged = None
+        for stats in stats_list:
+            if stats is None:
+                continue
+            if merged is None:
+                merged = copy.deepcopy(stats)
+                continue
+            for key, value in stats.items():
+                if isinstance(value, dict):
+                    for stage, count in value.items():
+                        merged[key][stage] = merged[key].get(stage, 0) + count
+                else:
+                    merged[key] += value
+        return merged
+    
+    def _terminal_windows(self, seq, size):
+        """截取序列两端各size个碱基，返回(5'端窗口, 3'端窗口)字符串，不复制整条序列"""
+        length = len(seq)
+        size = min(size, length)
+        return str(seq[:size]), str(seq[length-size:])
+    
+    def _full_arm_junctions(self, fragment_ends, vector_start, vector_end, homology_length, homology_tm, params):
+        """构建默认模式下各连接处的同源臂：两侧引物都携带完整的同源臂
+        
+        连接处j位于第j-1个片段（j=0时为载体）与第j个片段（j=n时为载体）之间。
+        fw_tail为下游片段正向引物5'端携带的上游序列，
+        rv_tail为上游片段反向引物5'端携带的下游序列（反向互补之前）。
+        载体一侧没有引物，对应的尾巴为空，重叠区就是另一侧的同源臂。
+        提供homology_tm时按整个重叠区（fw_tail + rv_tail）的Tm确定长度：片段之间的连接处从连接点
+        向两侧交替加入碱基，两条同源臂各占一半，重叠区总长度以2 * homology_length为起点、
+        不超过2 * homology_max_length；与载体相连的连接处只确定片段一侧的同源臂。
+        fragment_ends为每个片段两端窗口(5'端, 3'端)的列表。
+        """
+        def internal_arms(upstream_seq, downstream_seq):
+            # 片段之间的重叠区由两条同源臂组成
+            if not homology_tm:
+                return upstream_seq[-homology_length:], downstream_seq[:homology_length]
+            # 从连接点向两侧交替取碱基，重叠区的Tm只取决于碱基计数，与加入顺序无关
+            bases = []
+            sides = []
+            upstream_bases = upstream_seq[::-1]
+            for i in range(max(len(upstream_bases), len(downstream_seq))):
+                if i < len(upstream_bases):
+                    bases.append(upstream_bases[i])
+                    sides.append(True)
+                if i < len(downstream_seq):
+                    bases.append(downstream_seq[i])
+                    sides.append(False)
+            length, _ = self._pick_length_by_tm(
+                RunningTm(), bases, 2 * homology_length, homology_tm, params,
+                max_length=2 * params.homology_max_length
+            )
+            a = sum(sides[:length])
+            return upstream_seq[len(upstream_seq)-a:], downstream_seq[:length - a]
+        
+        def upstream_arm(seq):
+            # 上游同源臂从连接处向5'方向延伸
+            if not homology_tm:
+                return seq[-homology_length:]
+            length, _ = self._pick_length_by_tm(RunningTm(), reversed(seq), homology_length, homology_tm, params)
+            return seq[len(seq)-length:]
+        
+        def downstream_arm(seq):
+            # 下游同源臂从连接处向3'方向延伸
+            if not homology_tm:
+                return seq[:homology_length]
+            length, _ = self._pick_length_by_tm(RunningTm(), seq, homology_length, homology_tm, params)
+            return seq[:length]
+        
+        n = len(fragment_ends)
+        junctions = [{"fw_tail": upstream_arm(vector_end), "rv_tail": ""}]
+        for j in range(1, n):
+            fw_tail, rv_tail = internal_arms(fragment_ends[j-1][1], fragment_ends[j][0])
+            junctions.append({"fw_tail": fw_tail, "rv_tail": rv_tail})
+        junctions.append({"fw_tail": "", "rv_tail": downstream_arm(vector_start)})
+        return junctions
+    
+    def _pick_length_by_tm(self, running, extension, target_length, homology_tm, params, max_length=None):
+        """在running已有序列的基础上逐个加入extension中的碱基，选出Tm最合适的总长度
+        
+        每加入一个碱基只做一次增量更新。优先选择Tm落在目标范围内且最接近target_length的长度，
+        若没有长度能落入范围，则选择Tm离范围最近的长度。
         
         参数:
-            fragment_seq: 片段序列
-            left_homology: 左侧同源臂
-            right_homology: 右侧同源臂
+            running: 已包含固定部分序列的RunningTm（会被修改）
+            extension: 可以依次加入的碱基序列
+            target_length: 起始的同源臂长度
+            homology_tm: 目标Tm范围(最低, 最高)
+            params: 引物设计参数，提供同源臂的长度上下限
+            max_length: 可选的总长度上限，默认为params.homology_max_length
             
         返回:
-            包含正向和反向引物的字典
+            (选中的总长度, 对应的Tm值)
         """
-        # 可能的结合位点长度范围
-        binding_lengths = range(18, 25)
+        min_length = params.homology_min_length
+        if max_length is None:
+            max_length = params.homology_max_length
+        low_tm, high_tm = homology_tm
         
-        # 生成所有可能的正向引物
-        fw_candidates = []
-        for length in binding_lengths:
-            if length > len(fragment_seq):
-                continue
+        best = None
+        best_key = None
+        
+        def consider():
+            nonlocal best, best_key
+            if running.length < min_length:
+                return
+            tm = running.tm
+            miss = max(low_tm - tm, tm - high_tm, 0)
+            key = (miss, abs(running.length - target_length), running.length)
+            if best_key is None or key < best_key:
+                best_key = key
+                best = (running.length, tm)
+        
+        consider()
+        for base in extension:
+            if running.length >= max_length:
+                break
+            running.add(base)
+            consider()
+        
+        if best is None:
+            # 可用序列不足最短长度时使用全部序列
+            return running.length, running.tm
+        return best
+    
+    def _split_junction_options(self, upstream_seq, downstream_seq, homology_length, homology_tm, params):
+        """列出片段间连接处所有可行的同源臂拆分方式
+        
+        重叠区为上游末端a个碱基加下游起始b个碱基，前者由下游正向引物携带，
+        后者由上游反向引物携带。默认a+b等于homology_length；提供homology_tm时，
+        对每个a逐个碱基延长b，选出使重叠区Tm落入目标范围的b。
+        
+        返回:
+            候选拆分列表，元素为包含fw_tail、rv_tail、重叠区Tm和代价的字典
+        """
+        min_tm = params.overlap_min_tm
+        max_a = homology_length
+        if homology_tm:
+            max_a = params.homology_max_length
+        
+        options = []
+        upstream_tm = RunningTm()
+        for a in range(max_a + 1):
+            if a > len(upstream_seq):
+                break
+            if a > 0:
+                upstream_tm.add(upstream_seq[len(upstream_seq)-a])
+            fw_tail = upstream_seq[len(upstream_seq)-a:]
             
-            binding_site = fragment_seq[:length]
-            primer = left_homology + binding_site
+            if homology_tm:
+                b, overlap_tm = self._pick_length_by_tm(
+                    upstream_tm.copy(), downstream_seq, homology_length, homology_tm, params
+                )
+                b -= a
+            else:
+                b = homology_length - a
+                if b > len(downstream_seq):
+                    continue
+                overlap_tm = self.calculate_tm(fw_tail + downstream_seq[:b])
+            rv_tail = downstream_seq[:b]
             
-            # 计算结合部分的Tm值
-            binding_tm = self.calculate_tm(binding_site)
+            # 重叠区Tm不合适时按差值惩罚，保证总能得到一个解
+            cost = 0
+            if homology_tm:
+                low_tm, high_tm = homology_tm
+                cost += 10 * max(low_tm - overlap_tm, overlap_tm - high_tm, 0)
+            elif overlap_tm < min_tm:
+                cost += 10 * (min_tm - overlap_tm)
             
-            # 评估引物质量 
-            score = self.evaluate_primer_quality(primer, binding_site)
+            options.append({
+                "fw_tail": fw_tail,
+                "rv_tail": rv_tail,
+                "overlap_tm": overlap_tm,
+                "cost": cost
+            })
+        return options
+    
+    def _oligo_cost(self, length, params):
+        """估算单条引物的合成代价：按长度计价，超过软上限后加价，超过硬上限则严重惩罚"""
+        soft_max = params.oligo_soft_max_length
+        hard_max = params.oligo_max_length
+        cost = length
+        if length > soft_max:
+            cost += 10 * (length - soft_max)
+        if length > hard_max:
+            cost += 1000 * (length - hard_max)
+        return cost
+    
+    def _design_split_junctions(self, fragment_seqs, fragment_ends, vector_start, vector_end,
+                                homology_length, homology_tm, scorer, top_k=1, executor=None):
+        """拆分模式：在相邻引物之间分配重叠区，并联合选择各片段的引物对
+        
+        载体一侧没有引物，因此载体与片段的连接处仍由片段引物携带完整同源臂；
+        片段之间的连接处在上游反向引物和下游正向引物之间拆分。
+        
+        返回:
+            (每个片段的引物对字典列表, 每个连接处选中的拆分方式列表)；
+            备选引物对在选定的连接处拆分方式下按总代价排列
+        """
+        n = len(fragment_seqs)
+        params = scorer.params
+        
+        # 各连接处的候选拆分，载体两侧的连接处只有完整同源臂一种方式
+        full_arms = self._full_arm_junctions(
+            fragment_ends, vector_start, vector_end, homology_length, homology_tm, params
+        )
+        junction_options = [[dict(full_arms[0], cost=0)]]
+        for j in range(1, n):
+            options = self._split_junction_options(
+                fragment_ends[j-1][1], fragment_ends[j][0], homology_length, homology_tm, params
+            )
+            if not options:
+                # 片段过短无法拆分时退回完整同源臂
+                options = [dict(full_arms[j], cost=0)]
+            junction_options.append(options)
+        junction_options.append([dict(full_arms[n], cost=0)])
+        
+        # 各片段的候选引物按两侧连接处的每种拆分带上真实的5'尾巴评分
+        tails = [
+            (
+                [option["fw_tail"] for option in junction_options[i]],
+                [self.reverse_complement(option["rv_tail"]) for option in junction_options[i+1]]
+            )
+            for i in range(n)
+        ]
+        if executor is not None:
+            tasks = [
+                (fragment_seq, fw_tails, rv_tails, params, scorer.weights)
+                for fragment_seq, (fw_tails, rv_tails) in zip(fragment_seqs, tails)
+            ]
+            pair_options = list(executor.map(_pair_options_task, tasks))
+        else:
+            pair_options = [
+                self._pair_options(fragment_seq, scorer, fw_tails, rv_tails)
+                for fragment_seq, (fw_tails, rv_tails) in zip(fragment_seqs, tails)
+            ]
+        
+        _, junction_choice = self.optimize_junction_splits(
+            pair_options, [[option["cost"] for option in options] for options in junction_options]
+        )
+        
+        # 连接处固定后各片段互相独立：用完整引物重新计算引物对分数（包括整条引物的二聚体检查），
+        # 按引物对分数和两条引物的合成代价排列
+        junctions = [junction_options[j][k] for j, k in enumerate(junction_choice)]
+        primer_pairs = [
+            self._rank_split_pairs(pair_options[i], junction_choice[i], junction_choice[i+1], scorer, top_k)
+            for i in range(n)
+        ]
+        
+        return primer_pairs, junctions
+    
+    def _pair_options(self, fragment_seq, scorer, fw_tails, rv_tails):
+        """拆分模式下一个片段的候选结合区，以及它们与两侧每种拆分组合时的代价
+        
+        参数:
+            fragment_seq: 片段序列
+            scorer: 已编译的评分器
+            fw_tails: 左侧连接处每种拆分下正向引物的5'尾巴
+            rv_tails: 右侧连接处每种拆分下反向引物的5'尾巴（已反向互补）
             
-            fw_candidates.append({
-                "primer": primer,
-                "binding_site": binding_site,
-                "binding_tm": binding_tm,
-                "score": score
+        返回:
+            字典：fw/rv为候选结合区及其Tm；fw_scores[f][s]、rv_scores[r][s]为带第s种尾巴的完整引物分数；
+            fw_costs、rv_costs为对应的合成代价减去一半引物分数；pair_costs[f][r]为引物对的Tm差异奖惩
+            和结合区二聚体罚分（取负）
+        """
+        params = scorer.params
+        fw_candidates, rv_candidates = self._binding_candidates(fragment_seq, "", "", scorer)
+        options = {
+            "fw": [(c["binding_site"], c["binding_tm"]) for c in fw_candidates],
+            "rv": [(c["binding_site"], c["binding_tm"]) for c in rv_candidates],
+            "fw_tails": fw_tails,
+            "rv_tails": rv_tails
+        }
+        
+        # 发夹、自二聚体和连续重复碱基都要看整条引物，因此每种尾巴分别评分
+        for side, candidates, side_tails in (("fw", fw_candidates, fw_tails), ("rv", rv_candidates, rv_tails)):
+            scores = [[0] * len(side_tails) for _ in candidates]
+            costs = [[0] * len(side_tails) for _ in candidates]
+            for s, tail in enumerate(side_tails):
+                sites = [c["binding_site"] for c in candidates]
+                primers = [tail + site for site in sites]
+                for k, (score, _) in enumerate(scorer.evaluate_many(primers, sites)):
+                    scores[k][s] = score
+                    costs[k][s] = self._oligo_cost(len(primers[k]), params) - score / 2
+            options[side + "_scores"] = scores
+            options[side + "_costs"] = costs
+        
+        # 引物对其余部分只依赖结合区：两条引物的分数记为0，pair_score只剩Tm差异奖惩和二聚体罚分
+        options["pair_costs"] = [
+            [
+                -scorer.pair_score(
+                    {"primer": fw["binding_site"], "binding_tm": fw["binding_tm"], "score": 0},
+                    {"primer": rv["binding_site"], "binding_tm": rv["binding_tm"], "score": 0}
+                )[0]
+                for rv in rv_candidates
+            ]
+            for fw in fw_candidates
+        ]
+        return options
+    
+    def _rank_split_pairs(self, options, left, right, scorer, top_k):
+        """连接处拆分确定后，为一个片段精确评分所有引物对并保留前top_k个
+        
+        返回:
+            与design_balanced_primer_pair相同格式的引物对字典
+        """
+        params = scorer.params
+        fw_tail = options["fw_tails"][left]
+        rv_tail = options["rv_tails"][right]
+        fw_candidates = [
+            {"primer": fw_tail + site, "binding_tm": tm, "score": scores[left]}
+            for (site, tm), scores in zip(options["fw"], options["fw_scores"])
+        ]
+        rv_candidates = [
+            {"primer": rv_tail + site, "binding_tm": tm, "score": scores[right]}
+            for (site, tm), scores in zip(options["rv"], options["rv_scores"])
+        ]
+        
+        ranked = []
+        for f, fw in enumerate(fw_candidates):
+            for r, rv in enumerate(rv_candidates):
+                pair_score, tm_diff = scorer.pair_score(fw, rv)
+                cost = (self._oligo_cost(len(fw["primer"]), params) + self._oligo_cost(len(rv["primer"]), params)
+                        - pair_score)
+                ranked.append((cost, f, r, pair_score, tm_diff))
+        
+        pairs = []
+        for _, f, r, pair_score, tm_diff in heapq.nsmallest(max(1, top_k), ranked):
+            fw = fw_candidates[f]
+            rv = rv_candidates[r]
+            pairs.append({
+                "fw_primer": fw["primer"],
+                "rv_primer": rv["primer"],
+                "fw_binding_tm": fw["binding_tm"],
+                "rv_binding_tm": rv["binding_tm"],
+                "tm_difference": tm_diff,
+                "score": pair_score
             })
         
-        # 生成所有可能的反向引物
-        rv_candidates = []
-        for length in binding_lengths:
-            if length > len(fragment_seq):
-                continue
+        # 所有候选引物都完整评分、所有引物对都检查了二聚体，级联评分没有提前淘汰任何候选
+        best_pair = pairs[0]
+        best_pair["alternatives"] = pairs[1:]
+        best_pair["stats"] = {
+            "candidates": len(fw_candidates) + len(rv_candidates),
+            "rejected": {name: 0 for name in STAGE_NAMES.values()},
+            "pairs": len(ranked),
+            "pairs_pruned": 0,
+            "dimer_checks": len(ranked)
+        }
+        return best_pair
+    
+    def optimize_junction_splits(self, pair_options, junction_costs):
+        """用动态规划联合求解整个装配中各连接处的同源臂拆分位置
+        
+        片段i位于连接处i与i+1之间：正向引物由连接处i的fw_tail加正向结合区组成，反向引物由
+        连接处i+1的rv_tail加反向结合区组成。单条引物的分数（发夹、自二聚体等）取决于结合区和
+        相邻连接处的拆分，引物对的Tm差异奖惩只取决于两个结合区，因此每个片段依次对
+        正向结合区、反向结合区和右侧拆分取最优，复杂度与片段数成线性关系。
+        
+        参数:
+            pair_options: 每个片段的_pair_options结果，使用其中的fw_costs、pair_costs和rv_costs
+            junction_costs: 每个连接处各候选拆分的代价列表（比片段多一个）
             
-            binding_site = self.reverse_complement(fragment_seq[-length:])
-            primer = self.reverse_complement(right_homology) + binding_site
+        返回:
+            (每个片段选中的(正向结合区下标, 反向结合区下标)列表, 每个连接处选中的拆分下标列表)
+        """
+        # best[s]: 连接处取第s种拆分时，其左侧所有引物和连接处的最小总代价
+        best = list(junction_costs[0])
+        back = []
+        
+        for i, options in enumerate(pair_options):
+            # 每个正向结合区搭配最优的左侧拆分
+            fw_best = []
+            for costs in options["fw_costs"]:
+                s = min(range(len(best)), key=lambda s: best[s] + costs[s])
+                fw_best.append((best[s] + costs[s], s))
             
-            # 计算结合部分的Tm值
-            binding_tm = self.calculate_tm(binding_site)
+            # 每个反向结合区搭配最优的正向结合区
+            rv_best = []
+            for r in range(len(options["rv_costs"])):
+                f = min(range(len(fw_best)), key=lambda f: fw_best[f][0] + options["pair_costs"][f][r])
+                rv_best.append((fw_best[f][0] + options["pair_costs"][f][r], f))
             
-            # 评估引物质量
-            score = self.evaluate_primer_quality(primer, binding_site)
+            # 右侧每种拆分搭配最优的反向结合区
+            new_best = []
+            step_back = []
+            for t, junction_cost in enumerate(junction_costs[i+1]):
+                r = min(range(len(rv_best)), key=lambda r: rv_best[r][0] + options["rv_costs"][r][t])
+                new_best.append(rv_best[r][0] + options["rv_costs"][r][t] + junction_cost)
+                f = rv_best[r][1]
+                step_back.append((f, r, fw_best[f][1]))
             
-            rv_candidates.append({
-                "primer": primer,
-                "binding_site": binding_site,
-                "binding_tm": binding_tm,
-                "score": score
-            })
+            best = new_best
+            back.append(step_back)
         
-        # 如果没有找到合适的候选引物，使用默认长度
-        if not fw_candidates:
-            binding_site = fragment_seq[:20]
-            primer = left_homology + binding_site
-            binding_tm = self.calculate_tm(binding_site)
-            fw_candidates.append({
-                "primer": primer,
-                "binding_site": binding_site,
-                "binding_tm": binding_tm,
-                "score": 50  # 默认中等分数
-            })
+        # 回溯得到每个片段和连接处的选择
+        n = len(pair_options)
+        junction_choice = [0] * (n + 1)
+        pair_choice = [None] * n
+        junction_choice[n] = min(range(len(best)), key=lambda s: best[s])
+        for i in range(n - 1, -1, -1):
+            f, r, junction_choice[i] = back[i][junction_choice[i+1]]
+            pair_choice[i] = (f, r)
         
-        if not rv_candidates:
-            binding_site = self.reverse_complement(fragment_seq[-20:])
-            primer = self.reverse_complement(right_homology) + binding_site
-            binding_tm = self.calculate_tm(binding_site)
-            rv_candidates.append({
-                "primer": primer,
-                "binding_site": binding_site,
-                "binding_tm": binding_tm,
-                "score": 50  # 默认中等分数
-            })
+        return pair_choice, junction_choice
+
+    def design_balanced_primer_pair(self, fragment_seq, left_homology, right_homology,
+                                    params=None, score_weights=None, scorer=None, top_k=1):
+        """设计一对退火温度平衡的引物
+        
+        参数:
+            fragment_seq: 片段序列
+            left_homology: 左侧同源臂
+            right_homology: 右侧同源臂
+            params: 引物设计参数，默认使用实例的primer_params
+            score_weights: 评分罚分权重，默认使用实例的score_weights
+            scorer: 已编译的评分器，提供时忽略params和score_weights
+            top_k: 保留的引物对数量，最佳引物对之外的引物对按分数从高到低放在alternatives中
+            
+        返回:
+            包含正向和反向引物的字典；stats为级联评分中各阶段淘汰的候选引物数量
+        """
+        if scorer is None:
+            scorer = self.get_scorer(params, score_weights)
+        
+        # 级联评分：候选引物先只做窗口统计，只有可能胜出的引物对才继续后面的检查
+        fw_primers, fw_sites, rv_primers, rv_sites = self._binding_sites(
+            fragment_seq, left_homology, right_homology, scorer
+        )
+        if fw_sites and rv_sites:
+            best_pair = self._rank_candidates(
+                scorer, scorer.candidates(fw_primers, fw_sites), scorer.candidates(rv_primers, rv_sites), top_k
+            )
+            if best_pair is not None:
+                return best_pair
+        
+        # 没有引物对胜出（或片段过短）时对所有候选引物完整评分
+        fw_candidates, rv_candidates = self._binding_candidates(fragment_seq, left_homology, right_homology, scorer)
         
         # 找到最佳引物对
         best_pair = None
@@ -484,30 +1919,7 @@ class DNATools:
         
         for fw in fw_candidates:
             for rv in rv_candidates:
-                # 计算Tm差异
-                tm_diff = abs(fw["binding_tm"] - rv["binding_tm"])
-                
-                # 检查引物二聚体
-                has_dimer = self.check_primer_dimer(fw["primer"], rv["primer"])
-                
-                # 计算总分数
-                # 优先考虑Tm差异小的引物对，其次考虑引物质量
-                pair_score = 100
-                
-                # Tm差异惩罚
-                if tm_diff <= 2:
-                    pair_score += 50  # 非常好
-                elif tm_diff <= 4:
-                    pair_score += 30  # 可接受
-                else:
-                    pair_score -= 50  # 不可接受
-                
-                # 引物二聚体惩罚
-                if has_dimer:
-                    pair_score -= 100  # 严重惩罚
-                
-                # 引物质量奖励
-                pair_score += (fw["score"] + rv["score"]) / 2
+                pair_score, tm_diff = scorer.pair_score(fw, rv)
                 
                 if pair_score > best_pair_score:
                     best_pair_score = pair_score
@@ -534,89 +1946,268 @@ class DNATools:
                 "score": (fw_candidates[0]["score"] + rv_candidates[0]["score"]) / 2
             }
         
+        best_pair["alternatives"] = []
+        best_pair["stats"] = None
+        return best_pair
+    
+    def _rank_candidates(self, scorer, fw_candidates, rv_candidates, top_k):
+        """级联评分选出前top_k个引物对
+        
+        返回:
+            最佳引物对字典，其余引物对按分数从高到低放在alternatives中；没有引物对胜出时返回None
+        """
+        ranked, stats = scorer.top_pairs(fw_candidates, rv_candidates, max(1, top_k))
+        if not ranked:
+            return None
+        pairs = [
+            {
+                "fw_primer": fw.primer,
+                "rv_primer": rv.primer,
+                "fw_binding_tm": fw.binding_tm,
+                "rv_binding_tm": rv.binding_tm,
+                "tm_difference": tm_diff,
+                "score": pair_score
+            }
+            for fw, rv, pair_score, tm_diff in ranked
+        ]
+        best_pair = pairs[0]
+        best_pair["alternatives"] = pairs[1:]
+        best_pair["stats"] = stats
         return best_pair
+    
+    def _binding_sites(self, fragment_seq, left_homology, right_homology, scorer):
+        """生成片段两端所有可能长度的结合区及对应的完整引物
+        
+        返回:
+            (正向引物列表, 正向结合区列表, 反向引物列表, 反向结合区列表)
+        """
+        # 可能的结合位点长度范围
+        binding_lengths = [length for length in scorer.binding_lengths if length <= len(fragment_seq)]
+        
+        fw_sites = [str(fragment_seq[:length]) for length in binding_lengths]
+        rv_sites = [self.reverse_complement(str(fragment_seq[-length:])) for length in binding_lengths]
+        rv_homology = self.reverse_complement(right_homology)
+        return (
+            [left_homology + site for site in fw_sites], fw_sites,
+            [rv_homology + site for site in rv_sites], rv_sites
+        )
+    
+    def _binding_candidates(self, fragment_seq, left_homology, right_homology, scorer):
+        """生成片段两端所有可能的正向和反向候选引物
+        
+        参数:
+            fragment_seq: 片段序列（str、Seq或PackedSeq，只解码两端的结合区）
+            left_homology: 左侧同源臂（加在正向引物5'端）
+            right_homology: 右侧同源臂（反向互补后加在反向引物5'端）
+            scorer: 已编译的评分器，决定结合区长度范围和评分规则
+            
+        返回:
+            (正向候选引物列表, 反向候选引物列表)
+        """
+        # 生成所有可能的正向和反向结合区，再批量评分
+        fw_primers, fw_sites, rv_primers, rv_sites = self._binding_sites(
+            fragment_seq, left_homology, right_homology, scorer
+        )
+        rv_homology = self.reverse_complement(right_homology)
+        
+        candidates = []
+        for primers, sites in ((fw_primers, fw_sites), (rv_primers, rv_sites)):
+            candidates.append([
+                {
+                    "primer": primer,
+                    "binding_site": site,
+                    "binding_tm": binding_tm,
+                    "score": score
+                }
+                for primer, site, (score, binding_tm) in zip(primers, sites, scorer.evaluate_many(primers, sites))
+            ])
+        fw_candidates, rv_candidates = candidates
+        
+        # 如果没有找到合适的候选引物，使用最佳长度
+        default_length = scorer.params.opt_size
+        if not fw_candidates:
+            binding_site = str(fragment_seq[:default_length])
+            fw_candidates.append({
+                "primer": left_homology + binding_site,
+                "binding_site": binding_site,
+                "binding_tm": self.calculate_tm(binding_site),
+                "score": 50  # 默认中等分数
+            })
+        
+        if not rv_candidates:
+            binding_site = self.reverse_complement(str(fragment_seq[-default_length:]))
+            rv_candidates.append({
+                "primer": rv_homology + binding_site,
+                "binding_site": binding_site,
+                "binding_tm": self.calculate_tm(binding_site),
+                "score": 50  # 默认中等分数
+            })
+        
+        return fw_candidates, rv_candidates
 
-    def evaluate_primer_quality(self, primer_seq, binding_site=None):
+    def evaluate_primer_quality(self, primer_seq, binding_site=None, params=None, score_weights=None):
         """评估引物质量，返回一个分数（越高越好）
         
+        长度、Tm、GC含量和连续重复碱基的范围来自引物设计参数，各项罚分来自评分权重。
+        
         参数:
             primer_seq: 完整引物序列
             binding_site: 结合模板的部分，如果为None则使用整个引物
+            params: 引物设计参数，默认使用实例的primer_params
+            score_weights: 评分罚分权重，默认使用实例的score_weights
             
         返回:
             质量分数（0-100）
         """
-        score = 100
-        
-        # 如果没有提供结合位点，使用整个引物
-        if binding_site is None:
-            binding_site = primer_seq
-        
-        # 检查引物长度
-        length = len(binding_site)
-        if length < 18 or length > 24:
-            score -= 10
-        
-        # 检查3'端是否为G或C（GC夹）
-        if primer_seq[-1].upper() not in ['G', 'C']:
-            score -= 10
-        
-        # 检查3'端是否为T（不稳定）
-        if primer_seq[-1].upper() == 'T':
-            score -= 15
-        
-        # 检查3'端GC含量（最后5个碱基中不超过3个GC）
-        last_5_bases = primer_seq[-5:]
-        gc_count_last_5 = last_5_bases.upper().count('G') + last_5_bases.upper().count('C')
-        if gc_count_last_5 > 3:
-            score -= 15
-        
-        # 检查连续碱基
-        if self.check_poly_x(primer_seq, max_poly=5):
-            score -= 20
-        
-        # 检查发夹结构
-        if self.check_hairpin(primer_seq):
-            score -= 15
-        
-        # 检查自二聚体
-        if self.check_self_dimer(primer_seq):
-            score -= 15
-        
-        # 检查GC含量
-        gc_content = self.calculate_gc_content(binding_site)
-        if gc_content < 40:
-            score -= 10 + (40 - gc_content) * 2  # 惩罚过低的GC含量
-        elif gc_content > 60:
-            score -= 10 + (gc_content - 60) * 2  # 惩罚过高的GC含量
-        
-        # 检查Tm值
-        tm = self.calculate_tm(binding_site)
-        if tm < 55:
-            score -= 10 + (55 - tm) * 2  # 惩罚过低的Tm
-        elif tm > 65:
-            score -= 10 + (tm - 65) * 2  # 惩罚过高的Tm
-        
-        # 确保分数不为负
-        return max(0, score)
-    
-    def analyze_primer(self, primer_seq):
-        """分析引物的特性"""
+        return self.get_scorer(params, score_weights).score(primer_seq, binding_site)
+    
+    def analyze_primer(self, primer_seq, params=None):
+        """分析引物的特性
+        
+        参数:
+            primer_seq: 引物序列
+            params: 引物设计参数；thermo_alignment为True时按ΔG判断发夹和自二聚体，
+                    并在结果中给出各结构的ΔG（kcal/mol）
+        
+        返回:
+            分析结果字典；end_stability为最后5个碱基的3'端稳定性（-ΔG，kcal/mol），
+            超过max_end_stability时has_stable_end为True（未设置阈值时始终为False）
+        """
+        params = self._resolve_params(params)
         tm = self.calculate_tm(primer_seq)
         gc_content = self.calculate_gc_content(primer_seq)
         has_poly_x = self.check_poly_x(primer_seq)
-        has_hairpin = self.check_hairpin(primer_seq)
-        has_dimer = self.check_self_dimer(primer_seq)
+        stability = end_stability(primer_seq)
         
-        return {
+        analysis = {
             "sequence": primer_seq,
             "tm": tm,
             "gc_content": gc_content,
             "length": len(primer_seq),
+            "end_stability": stability,
             "has_poly_x": has_poly_x,
-            "has_hairpin": has_hairpin,
-            "has_dimer": has_dimer
+            "has_stable_end": params.max_end_stability is not None and stability > params.max_end_stability
         }
+        if params.thermo_alignment:
+            hairpin = self.hairpin_dg(primer_seq)
+            self_dimer = self.dimer_dg(primer_seq, primer_seq)
+            analysis["has_hairpin"] = self._structure_flagged(hairpin, params.max_hairpin_dg, params)
+            analysis["has_dimer"] = self._structure_flagged(self_dimer, params.max_dimer_dg, params)
+            analysis["hairpin_dg"] = hairpin.dg
+            analysis["hairpin_end_dg"] = hairpin.end_dg
+            analysis["self_dimer_dg"] = self_dimer.dg
+            analysis["self_dimer_end_dg"] = self_dimer.end_dg
+        else:
+            analysis["has_hairpin"] = self.check_hairpin(primer_seq)
+            analysis["has_dimer"] = self.check_self_dimer(primer_seq)
+        return analysis
+    
+    def hairpin_dg(self, seq):
+        """返回序列最稳定的发夹结构的ΔG（thermo.StructureDG，kcal/mol）"""
+        from thermo import get_engine
+        return get_engine().hairpin(str(seq).upper())
+    
+    def dimer_dg(self, seq1, seq2):
+        """返回两条序列形成的最稳定二聚体的ΔG（thermo.StructureDG，kcal/mol）"""
+        from thermo import get_engine
+        return get_engine().dimer(str(seq1).upper(), str(seq2).upper())
+    
+    def _structure_flagged(self, structure, max_dg, params):
+        """结构的ΔG或3'端锚定ΔG低于阈值时返回True"""
+        return structure.dg < max_dg or structure.end_dg < params.max_end_dg
+    
+    def _pair_dimer(self, fw_primer, rv_primer, params):
+        """检查引物对是否可能形成二聚体，按参数选择k-mer匹配或ΔG判断"""
+        if params.thermo_alignment:
+            return self._structure_flagged(self.dimer_dg(fw_primer, rv_primer), params.max_dimer_dg, params)
+        return self.check_primer_dimer(fw_primer, rv_primer)
+    
+    def with_display_names(self, primers):
+        """返回带有显示名称的结果副本，不修改传入的结果
+        
+        同名片段按出现顺序添加编号后缀（名称_1、名称_2……），
+        并据此设置正向和反向引物的名称，供显示和导出使用。
+        """
+        named = copy.deepcopy(primers)
+        # 每个片段单独复制，避免结果中重复引用的条目被一起改名
+        named["fragment_primers"] = [copy.deepcopy(primer_info) for primer_info in primers["fragment_primers"]]
+        
+        # 统计每个名称出现的总次数
+        total_counts = {}
+        for primer_info in named["fragment_primers"]:
+            base_name = primer_info.get("name", "Fragment")
+            total_counts[base_name] = total_counts.get(base_name, 0) + 1
+        
+        # 名称重复时添加编号后缀
+        seen_counts = {}
+        for primer_info in named["fragment_primers"]:
+            base_name = primer_info.get("name", "Fragment")
+            seen_counts[base_name] = seen_counts.get(base_name, 0) + 1
+            if total_counts[base_name] > 1:
+                fragment_name = f"{base_name}_{seen_counts[base_name]}"
+            else:
+                fragment_name = base_name
+            
+            primer_info["display_name"] = fragment_name
+            primer_info["fw"]["name"] = f"{fragment_name}-F"
+            primer_info["rv"]["name"] = f"{fragment_name}-R"
+            for alternative in primer_info.get("alternatives", []):
+                alternative["fw"]["name"] = f"{fragment_name}-F#{alternative['rank']}"
+                alternative["rv"]["name"] = f"{fragment_name}-R#{alternative['rank']}"
+        
+        return named
+    
+    def primer_issues(self, primer, texts):
+        """返回引物结构问题的描述列表"""
+        issues = []
+        if primer.get('has_poly_x', False):
+            issues.append(texts['poly_x'])
+        if primer.get('has_hairpin', False):
+            issues.append(texts['hairpin'])
+        if primer.get('has_dimer', False):
+            issues.append(texts['dimer'])
+        if primer.get('has_stable_end', False):
+            issues.append(texts['stable_end'])
+        return issues
+    
+    def _primer_rows(self, primers, texts):
+        """逐行生成设计结果的引物表格：载体引物、各片段引物、二聚体警告和备选引物对
+        
+        参数:
+            primers: 引物设计结果
+            texts: 当前语言的文本
+            
+        返回:
+            生成器，每行为与csv_header各列对应的字段列表
+        """
+        def primer_row(primer, default_name):
+            return [
+                primer.get('name', default_name), primer['sequence'], f"{primer['tm']:.2f}",
+                f"{primer['gc_content']:.2f}", primer['length'], ';'.join(self.primer_issues(primer, texts))
+            ]
+        
+        # 载体引物
+        if "vector_primers" in primers:
+            vector_primers = primers["vector_primers"]
+            yield primer_row(vector_primers['fw'], "Vector-F")
+            yield primer_row(vector_primers['rv'], "Vector-R")
+        
+        # 片段引物
+        for primer_info in primers["fragment_primers"]:
+            fragment_name = primer_info.get("display_name", primer_info.get("name", "Fragment"))
+            yield primer_row(primer_info["fw"], f"{fragment_name}-F")
+            yield primer_row(primer_info["rv"], f"{fragment_name}-R")
+            
+            if primer_info.get('primer_dimer', False):
+                yield [f"{fragment_name}-Warning", texts['primer_dimer_warning'], "", "", "", ""]
+            
+            # 备选引物对
+            for alternative in primer_info.get("alternatives", []):
+                rank = alternative["rank"]
+                yield primer_row(alternative["fw"], f"{fragment_name}-F#{rank}")
+                yield primer_row(alternative["rv"], f"{fragment_name}-R#{rank}")
+                yield [f"{fragment_name}#{rank}-Score", f"{texts['pair_score']} {alternative['pair_score']:.2f}",
+                       "", "", "", ""]
     
     def export_primers_to_csv(self, primers, output_file, language=Language.CHINESE):
         """将引物导出为CSV文件
@@ -633,64 +2224,8 @@ class DNATools:
         with open(output_file, 'w') as f:
             f.write(texts['csv_header'] + "\n")
             
-            # 载体引物
-            if "vector_primers" in primers:
-                vector_primers = primers["vector_primers"]
-                
-                fw = vector_primers['fw']
-                fw_name = fw.get('name', "Vector-F")
-                issues_fw = []
-                if fw.get('has_poly_x', False):
-                    issues_fw.append(texts['poly_x'])
-                if fw.get('has_hairpin', False):
-                    issues_fw.append(texts['hairpin'])
-                if fw.get('has_dimer', False):
-                    issues_fw.append(texts['dimer'])
-                
-                f.write(f"{fw_name},{fw['sequence']},{fw['tm']:.2f},{fw['gc_content']:.2f},{fw['length']},{';'.join(issues_fw)}\n")
-                
-                rv = vector_primers['rv']
-                rv_name = rv.get('name', "Vector-R")
-                issues_rv = []
-                if rv.get('has_poly_x', False):
-                    issues_rv.append(texts['poly_x'])
-                if rv.get('has_hairpin', False):
-                    issues_rv.append(texts['hairpin'])
-                if rv.get('has_dimer', False):
-                    issues_rv.append(texts['dimer'])
-                
-                f.write(f"{rv_name},{rv['sequence']},{rv['tm']:.2f},{rv['gc_content']:.2f},{rv['length']},{';'.join(issues_rv)}\n")
-            
-            # 片段引物
-            for primer_info in primers["fragment_primers"]:
-                fragment_name = primer_info.get("name", "Fragment")
-                
-                fw = primer_info["fw"]
-                fw_name = fw.get('name', f"{fragment_name}-F")
-                issues_fw = []
-                if fw.get('has_poly_x', False):
-                    issues_fw.append(texts['poly_x'])
-                if fw.get('has_hairpin', False):
-                    issues_fw.append(texts['hairpin'])
-                if fw.get('has_dimer', False):
-                    issues_fw.append(texts['dimer'])
-                
-                f.write(f"{fw_name},{fw['sequence']},{fw['tm']:.2f},{fw['gc_content']:.2f},{fw['length']},{';'.join(issues_fw)}\n")
-                
-                rv = primer_info["rv"]
-                rv_name = rv.get('name', f"{fragment_name}-R")
-                issues_rv = []
-                if rv.get('has_poly_x', False):
-                    issues_rv.append(texts['poly_x'])
-                if rv.get('has_hairpin', False):
-                    issues_rv.append(texts['hairpin'])
-                if rv.get('has_dimer', False):
-                    issues_rv.append(texts['dimer'])
-                
-                f.write(f"{rv_name},{rv['sequence']},{rv['tm']:.2f},{rv['gc_content']:.2f},{rv['length']},{';'.join(issues_rv)}\n")
-                
-                if primer_info.get('primer_dimer', False):
-                    f.write(f"{fragment_name}-Warning,{texts['primer_dimer_warning']},,,,\n")
+            for row in self._primer_rows(primers, texts):
+                f.write(",".join(str(field) for field in row) + "\n")
             
             # 添加署名、仓库地址和免责声明
             f.write("\n")
@@ -699,6 +2234,54 @@ class DNATools:
             f.write("\n")
             f.write(f"{texts['disclaimer']}\n")
 
+    def export_designs_to_csv(self, designs, output_file, language=Language.CHINESE):
+        """把多个构建体的设计结果流式导出为一个CSV文件
+        
+        每个构建体的行与export_primers_to_csv相同（载体引物、片段引物和备选引物对），
+        第一列为构建体名称。
+        
+        参数:
+            designs: (构建体名称, 设计结果)的可迭代对象，例如iter_designs的返回值；
+                     逐个写出，不会同时保存所有结果
+            output_file: 输出文件路径
+            language: 语言选项 (Language.CHINESE 或 Language.ENGLISH)
+            
+        返回:
+            导出的构建体数量
+        """
+        lang_code = language.value if isinstance(language, Language) else language
+        texts = TEXTS.get(lang_code, TEXTS['zh_CN'])
+        
+        count = 0
+        with open(output_file, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow([texts['construct']] + texts['csv_header'].split(","))
+            for construct_id, result in designs:
+                for row in self._primer_rows(self.with_display_names(result), texts):
+                    writer.writerow([construct_id] + row)
+                count += 1
+        return count
+    
+    def export_inventory_to_csv(self, inventory, output_file, language=Language.CHINESE):
+        """把载体组合的合并引物清单导出为CSV文件
+        
+        参数:
+            inventory: panel_inventory（或design_panel结果中的inventory）返回的引物列表
+            output_file: 输出文件路径
+            language: 语言选项 (Language.CHINESE 或 Language.ENGLISH)
+        """
+        lang_code = language.value if isinstance(language, Language) else language
+        texts = TEXTS.get(lang_code, TEXTS['zh_CN'])
+        
+        with open(output_file, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(texts['csv_header'].split(",") + [texts['backbones']])
+            for primer in inventory:
+                writer.writerow([
+                    primer["name"], primer["sequence"], f"{primer['tm']:.2f}", f"{primer['gc_content']:.2f}",
+                    primer["length"], ";".join(self.primer_issues(primer, texts)), ";".join(primer["backbones"])
+                ])
+    
     def export_primers_to_txt(self, primers, output_file, language=Language.CHINESE):
         """将引物导出为TXT文件
         
@@ -727,13 +2310,7 @@ class DNATools:
                 f.write(f"{texts['gc_content']} {fw['gc_content']:.2f}%\n")
                 f.write(f"{texts['length']} {fw['length']} bp\n")
                 
-                issues_fw = []
-                if fw.get('has_poly_x', False):
-                    issues_fw.append(texts['poly_x'])
-                if fw.get('has_hairpin', False):
-                    issues_fw.append(texts['hairpin'])
-                if fw.get('has_dimer', False):
-                    issues_fw.append(texts['dimer'])
+                issues_fw = self.primer_issues(fw, texts)
                 
                 if issues_fw:
                     f.write(f"{texts['structure_issues']} {', '.join(issues_fw)}\n")
@@ -747,13 +2324,7 @@ class DNATools:
                 f.write(f"{texts['gc_content']} {rv['gc_content']:.2f}%\n")
                 f.write(f"{texts['length']} {rv['length']} bp\n")
                 
-                issues_rv = []
-                if rv.get('has_poly_x', False):
-                    issues_rv.append(texts['poly_x'])
-                if rv.get('has_hairpin', False):
-                    issues_rv.append(texts['hairpin'])
-                if rv.get('has_dimer', False):
-                    issues_rv.append(texts['dimer'])
+                issues_rv = self.primer_issues(rv, texts)
                 
                 if issues_rv:
                     f.write(f"{texts['structure_issues']} {', '.join(issues_rv)}\n")
@@ -777,13 +2348,7 @@ class DNATools:
                 f.write(f"{texts['length']} {fw['length']} bp\n")
                 
                 # 显示结构问题
-                structure_issues = []
-                if fw.get('has_poly_x', False):
-                    structure_issues.append(texts['poly_x'])
-                if fw.get('has_hairpin', False):
-                    structure_issues.append(texts['hairpin'])
-                if fw.get('has_dimer', False):
-                    structure_issues.append(texts['dimer'])
+                structure_issues = self.primer_issues(fw, texts)
                 
                 if structure_issues:
                     f.write(f"{texts['structure_issues']} {', '.join(structure_issues)}\n")
@@ -799,13 +2364,7 @@ class DNATools:
                 f.write(f"{texts['length']} {rv['length']} bp\n")
                 
                 # 显示结构问题
-                structure_issues = []
-                if rv.get('has_poly_x', False):
-                    structure_issues.append(texts['poly_x'])
-                if rv.get('has_hairpin', False):
-                    structure_issues.append(texts['hairpin'])
-                if rv.get('has_dimer', False):
-                    structure_issues.append(texts['dimer'])
+                structure_issues = self.primer_issues(rv, texts)
                 
                 if structure_issues:
                     f.write(f"{texts['structure_issues']} {', '.join(structure_issues)}\n")
@@ -814,6 +2373,22 @@ class DNATools:
                 if primer_info.get('primer_dimer', False):
                     f.write("\n" + texts['primer_dimer_warning'] + "\n")
                 
+                # 备选引物对
+                if primer_info.get("alternatives"):
+                    f.write(f"\n{texts['alternatives']}\n")
+                    for alternative in primer_info["alternatives"]:
+                        rank = alternative["rank"]
+                        f.write(f"#{rank} {texts['pair_score']} {alternative['pair_score']:.2f}\n")
+                        for primer, suffix in ((alternative["fw"], "F"), (alternative["rv"], "R")):
+                            name = primer.get('name', f"{fragment_name}-{suffix}#{rank}")
+                            f.write(f"  {name}: {primer['sequence']} "
+                                    f"({texts['tm']} {primer['tm']:.2f}°C, {primer['length']} bp)\n")
+                            issues = self.primer_issues(primer, texts)
+                            if issues:
+                                f.write(f"  {texts['structure_issues']} {', '.join(issues)}\n")
+                        if alternative.get('primer_dimer', False):
+                            f.write(f"  {texts['primer_dimer_warning']}\n")
+                
                 f.write("\n" + "-" * 40 + "\n\n")
             
             # 添加署名、仓库地址和免责声明
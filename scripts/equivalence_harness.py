@@ -0,0 +1,430 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""参考实现与优化引擎的差分等价性检查
+
+DNATools中的calculate_tm、check_poly_x、check_hairpin、check_self_dimer、check_primer_dimer
+是逐段切片比较的参考实现；设计时实际使用的是编译好的PrimerScorer（python后端）、
+kernels模块的数组核心函数（numba后端，未安装Numba时为未编译版本）和增量计算的RunningTm。
+本脚本在随机和针对边界情况构造的序列集合上同时运行参考实现和各个引擎，
+报告所有不一致的结果和吞吐量对比。
+
+序列集合:
+    random      随机ACGT序列
+    poly        含长度不一的单碱基重复
+    palindrome  反向互补回文（带或不带环区），容易形成发夹和自二聚体
+    lowercase   大小写混合
+    ambiguous   混入N和其他IUPAC简并碱基
+    skewed      全GC、全AT等极端组成
+    short       1~8个碱基的短序列
+
+evaluate_primer_quality的参考分数按原有评分规则由上述参考检查函数逐项扣分得到；
+引物对排名的参考结果按正向、反向引物的顺序逐对计算，与PrimerScorer.top_pairs比较。
+引擎一侧的tm、poly_x、hairpin和self_dimer从单条引物的完整评分中取得，
+吞吐量是完整评分的速度，而不是单项检查的速度。
+
+用法:
+    python equivalence_harness.py [--count N] [--seed N] [--set NAME]
+
+发现不一致时以状态码1退出。
+"""
+
+import argparse
+import dataclasses
+import random
+import sys
+import time
+import unicodedata
+
+from dna_tools import DNATools, PrimerParams, RunningTm
+from kernels import ArrayKernels, get_kernels
+from nn_params import END_STABILITY_TABLE, build_end_stability_table, end_stability
+from scoring import PrimerScorer, ScoreWeights, reverse_complement
+
+# 每项检查最多打印的不一致示例数
+MAX_EXAMPLES = 5
+
+
+def _random_bases(rng, length, alphabet="ACGT"):
+    return "".join(rng.choice(alphabet) for _ in range(length))
+
+
+def _set_random(rng):
+    return _random_bases(rng, rng.randint(15, 45))
+
+
+def _set_poly(rng):
+    seq = _random_bases(rng, rng.randint(10, 35))
+    for _ in range(rng.randint(1, 3)):
+        position = rng.randint(0, len(seq))
+        seq = seq[:position] + rng.choice("ACGT") * rng.randint(3, 9) + seq[position:]
+    return seq
+
+
+def _set_palindrome(rng):
+    stem = _random_bases(rng, rng.randint(3, 15))
+    loop = _random_bases(rng, rng.choice([0, 0, 3, 4, 6]))
+    return _random_bases(rng, rng.randint(0, 8)) + stem + loop + reverse_complement(stem)
+
+
+def _set_lowercase(rng):
+    return "".join(base.lower() if rng.random() < 0.5 else base for base in _set_random(rng))
+
+
+def _set_ambiguous(rng):
+    seq = list(_set_random(rng))
+    for _ in range(rng.randint(1, 4)):
+        seq[rng.randrange(len(seq))] = rng.choice("NNNRYKMSWBDHVnr")
+    return "".join(seq)
+
+
+def _set_skewed(rng):
+    return _random_bases(rng, rng.randint(15, 45), rng.choice(["GC", "AT", "AAT", "GGC", "AC"]))
+
+
+def _set_short(rng):
+    return _random_bases(rng, rng.randint(1, 8), rng.choice(["ACGT", "ACGTN"]))
+
+
+SEQUENCE_SETS = {
+    "random": _set_random,
+    "poly": _set_poly,
+    "palindrome": _set_palindrome,
+    "lowercase": _set_lowercase,
+    "ambiguous": _set_ambiguous,
+    "skewed": _set_skewed,
+    "short": _set_short
+}
+
+
+def make_sequences(rng, count, names=None):
+    """生成[(集合名称, 引物, 结合区)]，结合区为引物3'端的一段
+
+    参数:
+        rng: random.Random
+        count: 每个集合的序列数量
+        names: 使用的集合名称，默认为全部
+    """
+    result = []
+    for name in names or SEQUENCE_SETS:
+        generate = SEQUENCE_SETS[name]
+        for _ in range(count):
+            primer = generate(rng)
+            result.append((name, primer, primer[-rng.randint(1, len(primer)):]))
+    return result
+
+
+def reference_quality(tools, primer_seq, binding_site, params, weights):
+    """按原有评分规则，用参考检查函数逐项扣分得到的引物分数"""
+    score = 100
+    length = len(binding_site)
+    if length < params.min_size or length > params.max_size:
+        score -= weights.length
+    last = primer_seq[-1].upper()
+    if last not in ['G', 'C']:
+        score -= weights.no_gc_clamp
+    if last == 'T':
+        score -= weights.end_t
+    if params.max_end_stability is None:
+        last_5 = primer_seq[-5:].upper()
+        if last_5.count('G') + last_5.count('C') > weights.max_end_gc:
+            score -= weights.end_gc_rich
+    elif end_stability(primer_seq) > params.max_end_stability:
+        score -= weights.end_stability
+    if tools.check_poly_x(primer_seq, max_poly=params.max_poly_x + 1):
+        score -= weights.poly_x
+    if tools.check_hairpin(primer_seq):
+        score -= weights.hairpin
+    if tools.check_self_dimer(primer_seq):
+        score -= weights.self_dimer
+    gc_content = tools.calculate_gc_content(binding_site)
+    if gc_content < params.min_gc:
+        score -= weights.gc_base + (params.min_gc - gc_content) * weights.gc_slope
+    elif gc_content > params.max_gc:
+        score -= weights.gc_base + (gc_content - params.max_gc) * weights.gc_slope
+    tm = tools.calculate_tm(binding_site)
+    if tm < params.min_tm:
+        score -= weights.tm_base + (params.min_tm - tm) * weights.tm_slope
+    elif tm > params.max_tm:
+        score -= weights.tm_base + (tm - params.max_tm) * weights.tm_slope
+    return max(0, score)
+
+
+def reference_pair(tools, fw, rv, weights):
+    """按原有规则计算引物对分数，fw和rv为(引物, 结合区Tm, 分数)"""
+    tm_diff = abs(fw[1] - rv[1])
+    score = weights.pair_base
+    if tm_diff <= weights.tm_diff_good:
+        score += weights.tm_diff_good_bonus
+    elif tm_diff <= weights.tm_diff_ok:
+        score += weights.tm_diff_ok_bonus
+    else:
+        score -= weights.tm_diff_bad
+    if tools.check_primer_dimer(fw[0], rv[0]):
+        score -= weights.pair_dimer
+    score += (fw[2] + rv[2]) / 2
+    return score
+
+
+def _engines(params, weights):
+    """返回[(引擎名称, PrimerScorer)]"""
+    kernels = get_kernels("numba")
+    if kernels is None:
+        kernels = ArrayKernels()
+    return [
+        ("scoring", PrimerScorer(params, weights)),
+        (f"kernels-{kernels.name}", PrimerScorer(params, weights, kernels=kernels))
+    ]
+
+
+class Report:
+    """收集每项检查的不一致和耗时"""
+
+    def __init__(self):
+        self.rows = []
+        self.divergences = {}
+
+    def compare(self, check, engine, items, reference, optimized):
+        """对items逐项比较参考函数和优化函数的结果，并分别计时
+
+        参数:
+            check: 检查名称
+            engine: 引擎名称
+            items: 参数元组列表
+            reference: 参考函数
+            optimized: 优化函数
+        """
+        started = time.perf_counter()
+        expected = [reference(*item) for item in items]
+        reference_time = time.perf_counter() - started
+        started = time.perf_counter()
+        actual = [optimized(*item) for item in items]
+        optimized_time = time.perf_counter() - started
+
+        diverged = [(item, want, got) for item, want, got in zip(items, expected, actual) if want != got]
+        if diverged:
+            self.divergences[(check, engine)] = diverged
+        self.rows.append((check, engine, len(items), len(diverged), reference_time, optimized_time))
+
+    def print(self):
+        columns = [("检查", 20, "<"), ("引擎", 22, "<"), ("用例", 7, ">"), ("不一致", 8, ">"),
+                   ("参考实现(次/秒)", 17, ">"), ("引擎(次/秒)", 14, ">"), ("加速比", 9, ">")]
+        print("".join(_pad(title, width, align) for title, width, align in columns))
+        for check, engine, cases, diverged, reference_time, optimized_time in self.rows:
+            values = [
+                check, engine, cases, diverged,
+                f"{cases / max(reference_time, 1e-9):.0f}", f"{cases / max(optimized_time, 1e-9):.0f}",
+                f"{reference_time / max(optimized_time, 1e-9):.1f}x"
+            ]
+            print("".join(_pad(str(value), width, align) for value, (_, width, align) in zip(values, columns)))
+        for (check, engine), diverged in self.divergences.items():
+            print()
+            print(f"{check} / {engine}: {len(diverged)}处不一致")
+            for item, want, got in diverged[:MAX_EXAMPLES]:
+                print(f"  {item!r}: 参考实现={want!r} 引擎={got!r}")
+
+
+def _pad(text, width, align):
+    """按显示宽度（中文字符占两列）填充到width列"""
+    padding = " " * max(0, width - sum(2 if unicodedata.east_asian_width(char) in "WF" else 1 for char in text))
+    return text + padding if align == "<" else padding + text
+
+
+def run(sequences, params=None, weights=None, pair_count=40, design_count=20):
+    """在序列集合上比较参考实现和各个引擎
+
+    引物对排名在每个序列集合上分别检查两次：一次直接比较级联评分top_pairs，
+    一次由该集合的序列拼成片段和同源臂，经design_balanced_primer_pair完整设计。
+
+    参数:
+        sequences: make_sequences的结果
+        params: PrimerParams，默认使用默认参数
+        weights: ScoreWeights，默认使用默认权重
+        pair_count: 引物对排名检查中正向、反向候选引物各自的数量
+        design_count: 每个集合完整设计的片段数量
+
+    返回:
+        Report
+    """
+    params = params if params is not None else PrimerParams()
+    weights = weights if weights is not None else ScoreWeights()
+    tools = DNATools(params=params, score_weights=weights)
+    report = Report()
+
+    primers = [(primer,) for _, primer, _ in sequences]
+    sites = [(site,) for _, _, site in sequences]
+    pairs = list(zip([primer for primer, in primers], [primer for primer, in primers[1:]]))
+    scored = [(primer, site) for _, primer, site in sequences]
+    by_set = {}
+    for name, primer, site in sequences:
+        by_set.setdefault(name, []).append((primer, site))
+    designs = make_design_cases(sequences, design_count, 2 * params.max_size + 10)
+
+    # 3'端稳定性表：源码中的字面量与按最近邻参数重新计算的结果
+    built = build_end_stability_table()
+    report.compare("end_table", "literal", [(index,) for index in range(len(built))],
+                   built.__getitem__, END_STABILITY_TABLE.__getitem__)
+
+    # Tm：参考实现与增量计算、评分器窗口统计中的Tm
+    report.compare("tm", "running_tm", sites, tools.calculate_tm, lambda seq: RunningTm(seq).tm)
+
+    max_poly = params.max_poly_x + 1
+    for engine, scorer in _engines(params, weights):
+        report.compare("tm", engine, sites, tools.calculate_tm,
+                       lambda seq, evaluate=scorer.evaluate: evaluate(seq, seq)[1])
+        report.compare("poly_x", engine, primers, lambda seq: tools.check_poly_x(seq, max_poly),
+                       lambda seq, penalties=scorer.penalties: penalties(seq)["poly_x"] != 0)
+        report.compare("hairpin", engine, primers, tools.check_hairpin,
+                       lambda seq, penalties=scorer.penalties: penalties(seq)["hairpin"] != 0)
+        report.compare("self_dimer", engine, primers, tools.check_self_dimer,
+                       lambda seq, penalties=scorer.penalties: penalties(seq)["self_dimer"] != 0)
+        report.compare("primer_dimer", engine, pairs, tools.check_primer_dimer,
+                       lambda fw, rv, dimer=scorer.primers_dimer: dimer(fw.upper(), rv.upper()))
+        report.compare("quality", engine, scored,
+                       lambda primer, site: reference_quality(tools, primer, site, params, weights),
+                       scorer.score)
+        for name, items in by_set.items():
+            count = min(pair_count, len(items) // 2)
+            report.compare(f"ranking/{name}", engine, [tuple(items[:2 * count])],
+                           lambda *items, count=count: _reference_ranking(tools, items, params, weights, count),
+                           lambda *items, scorer=scorer, count=count: _cascade_ranking(scorer, items, count))
+            report.compare(f"design/{name}", engine, designs[name],
+                           lambda *case: _reference_design(tools, *case, params, weights),
+                           lambda *case, scorer=scorer: _engine_design(tools, scorer, *case))
+    return report
+
+
+def make_design_cases(sequences, count, min_length):
+    """用同一集合的序列拼出(片段, 左侧同源臂, 右侧同源臂)
+
+    片段由连续的几条序列拼接到不短于min_length，两端的结合区因此落在该集合的序列上；
+    同源臂取接下来的两条序列，引物的5'端尾巴也来自同一集合。
+
+    返回:
+        {集合名称: [(片段, 左侧同源臂, 右侧同源臂)]}
+    """
+    members = {}
+    for name, primer, _ in sequences:
+        members.setdefault(name, []).append(primer)
+    cases = {}
+    for name, primers in members.items():
+        cases[name] = []
+        position = 0
+        while len(cases[name]) < count and position < len(primers):
+            fragment = ""
+            while len(fragment) < min_length and position < len(primers):
+                fragment += primers[position]
+                position += 1
+            if len(fragment) < min_length or position + 2 > len(primers):
+                break
+            cases[name].append((fragment, primers[position], primers[position + 1]))
+            position += 2
+    return cases
+
+
+def _reference_design(tools, fragment, left, right, params, weights):
+    """按参考实现逐对计算片段两端所有结合区长度组成的引物对，返回第一个严格最高分的(正向引物, 反向引物, 分数)
+
+    与原有设计规则相同，引物对分数必须超过-1；否则退回分数最高的正向和反向引物。
+    """
+    rv_homology = tools.reverse_complement(right)
+    fw, rv = [], []
+    for length in range(params.min_size, min(params.max_size, len(fragment)) + 1):
+        site = fragment[:length]
+        fw.append((left + site, tools.calculate_tm(site), reference_quality(tools, left + site, site, params, weights)))
+        site = tools.reverse_complement(fragment[-length:])
+        rv.append((rv_homology + site, tools.calculate_tm(site),
+                   reference_quality(tools, rv_homology + site, site, params, weights)))
+    best = None
+    best_score = -1
+    for fw_candidate in fw:
+        for rv_candidate in rv:
+            score = reference_pair(tools, fw_candidate, rv_candidate, weights)
+            if score > best_score:
+                best_score = score
+                best = (fw_candidate[0], rv_candidate[0], score)
+    if best is None:
+        # 没有引物对分数超过-1时使用分数最高的单条引物，分数为两者的平均
+        fw_best = max(fw, key=lambda candidate: candidate[2])
+        rv_best = max(rv, key=lambda candidate: candidate[2])
+        best = (fw_best[0], rv_best[0], (fw_best[2] + rv_best[2]) / 2)
+    return best
+
+
+def _engine_design(tools, scorer, fragment, left, right):
+    """用design_balanced_primer_pair设计，返回(正向引物, 反向引物, 分数)"""
+    pair = tools.design_balanced_primer_pair(fragment, left, right, scorer=scorer)
+    return pair["fw_primer"], pair["rv_primer"], pair["score"]
+
+
+def end_stability_effect(sequences, params=None, weights=None):
+    """统计3'端稳定性查表与按3'端GC数近似打出不同分数的引物数量
+
+    查表阈值下被标出的5-mer都含有4个以上G/C，若两种方式对所有引物给出相同分数，
+    说明查表检查没有起作用。
+
+    返回:
+        分数不同的引物数量
+    """
+    params = params if params is not None else PrimerParams()
+    weights = weights if weights is not None else ScoreWeights()
+    table = PrimerScorer(params, weights)
+    approximate = PrimerScorer(dataclasses.replace(params, max_end_stability=None), weights)
+    return sum(
+        1 for _, primer, site in sequences
+        if table.score(primer, site) != approximate.score(primer, site)
+    )
+
+
+def _reference_ranking(tools, items, params, weights, pair_count):
+    """逐对计算所有引物对，返回第一个严格最高分的(正向引物, 反向引物, 分数)"""
+    scored = [
+        (primer, tools.calculate_tm(site), reference_quality(tools, primer, site, params, weights))
+        for primer, site in items
+    ]
+    best = None
+    for fw in scored[:pair_count]:
+        for rv in scored[pair_count:]:
+            score = reference_pair(tools, fw, rv, weights)
+            if best is None or score > best[2]:
+                best = (fw[0], rv[0], score)
+    return best
+
+
+def _cascade_ranking(scorer, items, pair_count):
+    """用级联评分找出最高分的(正向引物, 反向引物, 分数)"""
+    primers = [primer for primer, _ in items]
+    sites = [site for _, site in items]
+    fw = scorer.candidates(primers[:pair_count], sites[:pair_count])
+    rv = scorer.candidates(primers[pair_count:], sites[pair_count:])
+    ranked, _ = scorer.top_pairs(fw, rv)
+    if not ranked:
+        return None
+    fw_candidate, rv_candidate, score, _ = ranked[0]
+    return fw_candidate.primer, rv_candidate.primer, score
+
+
+def main():
+    parser = argparse.ArgumentParser(description="比较参考实现与优化评分引擎的结果，发现不一致时以状态码1退出")
+    parser.add_argument("--count", type=int, default=500, help="每个集合的序列数量（默认500）")
+    parser.add_argument("--seed", type=int, default=1, help="随机数种子（默认1）")
+    parser.add_argument("--set", action="append", choices=sorted(SEQUENCE_SETS),
+                        help="使用的序列集合（可重复，默认全部）")
+    args = parser.parse_args()
+
+    sequences = make_sequences(random.Random(args.seed), args.count, args.set)
+    if get_kernels("numba") is None:
+        print("未安装Numba：比较未编译的数组核心函数")
+    print(f"{len(sequences)}条序列，集合: {', '.join(args.set or SEQUENCE_SETS)}")
+    print()
+    report = run(sequences)
+    report.print()
+    changed = end_stability_effect(sequences)
+    print()
+    print(f"3'端稳定性查表与GC数近似分数不同的引物: {changed}")
+    if report.divergences or not changed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
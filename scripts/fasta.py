@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""纯Python的FASTA读取
+
+设计只需要FASTA中的名称和序列，不必为此在启动时导入Biopython（约占启动时间的大部分）。
+解析规则与Bio.SeqIO的'fasta'格式一致：标题行第一个空白之前为id，整行为description，
+序列行去掉所有空白后连接。第一条记录之前的非空行被忽略。
+"""
+
+
+class SequenceRecord:
+    """序列为str的序列记录，接口与SeqRecord的id/seq/description兼容"""
+
+    __slots__ = ('id', 'seq', 'description')
+
+    def __init__(self, seq, id="", description=""):
+        self.seq = seq
+        self.id = id
+        self.description = description
+
+    def __len__(self):
+        return len(self.seq)
+
+    def __repr__(self):
+        return f"SequenceRecord(id={self.id!r}, length={len(self.seq)})"
+
+    @property
+    def name(self):
+        """与SeqRecord兼容的名称属性"""
+        return self.id
+
+
+def parse_fasta(handle):
+    """逐条读取FASTA记录
+
+    参数:
+        handle: 以文本模式打开的文件或其他可迭代的行
+
+    返回:
+        SequenceRecord的生成器
+    """
+    title = None
+    lines = []
+    for line in handle:
+        if line.startswith(">"):
+            if title is not None:
+                yield _make_record(title, lines)
+            title = line[1:].rstrip()
+            lines = []
+        elif title is not None:
+            lines.append("".join(line.split()))
+    if title is not None:
+        yield _make_record(title, lines)
+
+
+def _make_record(title, lines):
+    """由标题行和序列行生成记录"""
+    parts = title.split(None, 1)
+    return SequenceRecord("".join(lines), parts[0] if parts else "", title)
@@ -5,7 +5,7 @@ import os
 import sys
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
-from dna_tools import DNATools, TEXTS
+from dna_tools import DNATools
 
 # 获取程序运行路径,兼容打包后的exe
 if getattr(sys, 'frozen', False):
@@ -35,10 +35,17 @@ TEXTS = {
         'linearization': "线性化方式",
         'restriction': "限制酶切",
         'enzyme': "限制酶",
+        'recommend_btn': "推荐",
         'pcr': "PCR扩增",
         'forward_primer': "正向引物",
         'reverse_primer': "反向引物",
+        'pcr_auto': "PCR扩增（自动设计引物）",
+        'insert_position': "插入到第N个碱基之后",
+        'delete_end': "删除到第M个碱基（可选）",
         'homology_length': "同源臂长度",
+        'split_overlaps': "在相邻引物间拆分重叠区（片段间重叠区减半为同源臂长度）",
+        'homology_tm': "按目标Tm确定同源臂长度 (°C)",
+        'top_k': "每个片段的候选引物对数",
         'design_btn': "设计引物",
         'export_csv': "导出为CSV",
         'export_txt': "导出为TXT",
@@ -65,7 +72,12 @@ TEXTS = {
         'poly_x': "连续重复碱基",
         'hairpin': "可能形成发夹结构",
         'dimer': "可能形成自二聚体",
+        'stable_end': "3'端过于稳定",
+        'end_stability': "3'端稳定性",
         'primer_dimer_warning': "警告: 正向和反向引物可能形成二聚体",
+        'junctions': "连接处重叠区:",
+        'alternatives': "备选引物对:",
+        'pair_score': "引物对分数",
         'about_title': "关于 Let's Gibson",
         'about_content': "Let's Gibson 是一个用于设计Gibson Assembly引物的工具。\n\n它可以帮助您轻松设计多片段连接的引物，\n确保引物具有良好的特性（如适当的Tm值和GC含量），\n并避免引物二聚体和发夹结构等问题。\n用户许可协议：https://creativecommons.org/licenses/by-nc/4.0/legalcode",
         'version': "版本",
@@ -76,6 +88,11 @@ TEXTS = {
         'select_fragments': "选择片段文件",
         'select_enzyme': "请选择限制酶",
         'enter_primers': "请输入PCR引物",
+        'enter_position': "请输入有效的插入位置",
+        'no_unique_cutter': "载体上没有单切位点的限制酶，请使用PCR线性化",
+        'recommend_title': "限制酶推荐",
+        'recommend_header': "按最差引物分数和Tm平衡排序（已选择第一个）:",
+        'recommend_line': "{0}. {1}（切割位置 {2}）：最差引物分数 {3:.1f}，最大Tm差 {4:.2f}°C",
         'incompatible_fasta': "无法读取FASTA文件，请确保文件使用UTF-8或GBK编码格式",
         'read_fasta_error': "读取FASTA文件时出错: {0}",
         'icon_error': "设置图标时出错: {0}",
@@ -108,10 +125,17 @@ TEXTS = {
         'linearization': "Linearization Method",
         'restriction': "Restriction Enzyme",
         'enzyme': "Enzyme",
+        'recommend_btn': "Recommend",
         'pcr': "PCR Amplification",
         'forward_primer': "Forward Primer",
         'reverse_primer': "Reverse Primer",
+        'pcr_auto': "PCR Amplification (auto-design primers)",
+        'insert_position': "Insert after base N",
+        'delete_end': "Delete through base M (optional)",
         'homology_length': "Homology Arm Length",
+        'split_overlaps': "Split overlaps between adjacent primers (halves fragment-fragment overlaps to the arm length)",
+        'homology_tm': "Size homology arms by target Tm (°C)",
+        'top_k': "Primer pairs per fragment",
         'design_btn': "Design Primers",
         'export_csv': "Export to CSV",
         'export_txt': "Export to TXT",
@@ -138,7 +162,12 @@ TEXTS = {
         'poly_x': "Consecutive Repeated Bases",
         'hairpin': "Possible Hairpin Structure",
         'dimer': "Possible Self-Dimer",
+        'stable_end': "3' End Too Stable",
+        'end_stability': "3' End Stability",
         'primer_dimer_warning': "Warning: Forward and reverse primers may form dimers",
+        'junctions': "Junction Overlaps:",
+        'alternatives': "Alternative Primer Pairs:",
+        'pair_score': "Pair score",
         'about_title': "About Let's Gibson",
         'about_content': "Let's Gibson is a tool for designing Gibson Assembly primers.\n\nIt helps you easily design primers for multi-fragment assembly,\nensuring primers have good properties (e.g., appropriate Tm and GC content),\nand avoiding issues like primer dimers and hairpin structures.\nEnd-User License Agreement:",
         'version': "Version",
@@ -149,6 +178,11 @@ TEXTS = {
         'select_fragments': "Select Fragment File",
         'select_enzyme': "Please select an enzyme",
         'enter_primers': "Please enter PCR primers",
+        'enter_position': "Please enter a valid insert position",
+        'no_unique_cutter': "No enzyme cuts the vector exactly once; please use PCR linearization",
+        'recommend_title': "Enzyme Recommendation",
+        'recommend_header': "Ranked by worst primer score and Tm balance (the first one has been selected):",
+        'recommend_line': "{0}. {1} (cuts at {2}): worst primer score {3:.1f}, max Tm difference {4:.2f}°C",
         'incompatible_fasta': "Cannot read FASTA file, please ensure file uses UTF-8 or GBK encoding",
         'read_fasta_error': "Error reading FASTA file: {0}",
         'icon_error': "Error setting icon: {0}",
@@ -238,10 +272,17 @@ class GibsonPrimerDesignApp:
         self.linearization_label.config(text=self.get_text('linearization'))
         self.restriction_radio.config(text=self.get_text('restriction'))
         self.enzyme_label.config(text=self.get_text('enzyme'))
+        self.recommend_btn.config(text=self.get_text('recommend_btn'))
         self.pcr_radio.config(text=self.get_text('pcr'))
         self.fw_primer_label.config(text=self.get_text('forward_primer'))
         self.rv_primer_label.config(text=self.get_text('reverse_primer'))
+        self.pcr_auto_radio.config(text=self.get_text('pcr_auto'))
+        self.insert_position_label.config(text=self.get_text('insert_position'))
+        self.delete_end_label.config(text=self.get_text('delete_end'))
         self.homology_label.config(text=self.get_text('homology_length'))
+        self.split_overlaps_check.config(text=self.get_text('split_overlaps'))
+        self.homology_tm_check.config(text=self.get_text('homology_tm'))
+        self.top_k_label.config(text=self.get_text('top_k'))
         
         self.design_btn.config(text=self.get_text('design_btn'))
         self.export_csv_btn.config(text=self.get_text('export_csv'))
@@ -357,6 +398,11 @@ class GibsonPrimerDesignApp:
         self.enzyme_combobox = ttk.Combobox(self.enzyme_frame, textvariable=self.enzyme_var, values=enzymes)
         self.enzyme_combobox.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
         
+        # 按设计质量推荐载体上的单切位点酶
+        self.recommend_btn = ttk.Button(self.enzyme_frame, text=self.get_text('recommend_btn'),
+                                        command=self.recommend_enzyme)
+        self.recommend_btn.pack(side=tk.LEFT, padx=5)
+        
         # PCR扩增
         self.pcr_radio = ttk.Radiobutton(linearization_frame, text=self.get_text('pcr'), 
                                         variable=self.linearization_var, value="pcr",
@@ -383,6 +429,28 @@ class GibsonPrimerDesignApp:
         self.rv_primer_entry = ttk.Entry(rv_primer_frame)
         self.rv_primer_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
         
+        # PCR扩增（根据插入位置自动设计载体引物）
+        self.pcr_auto_radio = ttk.Radiobutton(linearization_frame, text=self.get_text('pcr_auto'), 
+                                             variable=self.linearization_var, value="pcr_auto",
+                                             command=self.toggle_linearization)
+        self.pcr_auto_radio.pack(anchor=tk.W, padx=20, pady=2)
+        
+        # 插入位置和可选的删除终点
+        self.insert_site_frame = ttk.Frame(linearization_frame)
+        self.insert_site_frame.pack(fill=tk.X, padx=20, pady=2)
+        
+        self.insert_position_label = ttk.Label(self.insert_site_frame, text=self.get_text('insert_position'))
+        self.insert_position_label.pack(side=tk.LEFT, padx=5)
+        
+        self.insert_position_entry = ttk.Entry(self.insert_site_frame, width=10)
+        self.insert_position_entry.pack(side=tk.LEFT, padx=5)
+        
+        self.delete_end_label = ttk.Label(self.insert_site_frame, text=self.get_text('delete_end'))
+        self.delete_end_label.pack(side=tk.LEFT, padx=5)
+        
+        self.delete_end_entry = ttk.Entry(self.insert_site_frame, width=10)
+        self.delete_end_entry.pack(side=tk.LEFT, padx=5)
+        
         # 同源臂长度
         homology_frame = ttk.Frame(self.vector_label_frame)
         homology_frame.pack(fill=tk.X, padx=5, pady=10)
@@ -394,6 +462,44 @@ class GibsonPrimerDesignApp:
         self.homology_spinbox = ttk.Spinbox(homology_frame, from_=15, to=40, textvariable=self.homology_var, width=5)
         self.homology_spinbox.pack(side=tk.LEFT, padx=5)
         
+        # 在相邻引物间拆分重叠区
+        self.split_overlaps_var = tk.BooleanVar(value=False)
+        self.split_overlaps_check = ttk.Checkbutton(self.vector_label_frame, text=self.get_text('split_overlaps'),
+                                                    variable=self.split_overlaps_var)
+        self.split_overlaps_check.pack(anchor=tk.W, padx=10, pady=2)
+        
+        # 按目标Tm确定同源臂长度
+        homology_tm_frame = ttk.Frame(self.vector_label_frame)
+        homology_tm_frame.pack(fill=tk.X, padx=5, pady=2)
+        
+        self.homology_tm_var = tk.BooleanVar(value=False)
+        self.homology_tm_check = ttk.Checkbutton(homology_tm_frame, text=self.get_text('homology_tm'),
+                                                 variable=self.homology_tm_var)
+        self.homology_tm_check.pack(side=tk.LEFT, padx=5)
+        
+        self.homology_tm_low_var = tk.DoubleVar(value=48.0)
+        self.homology_tm_low_spinbox = ttk.Spinbox(homology_tm_frame, from_=40, to=70, increment=0.5,
+                                                   textvariable=self.homology_tm_low_var, width=5)
+        self.homology_tm_low_spinbox.pack(side=tk.LEFT, padx=2)
+        
+        ttk.Label(homology_tm_frame, text="-").pack(side=tk.LEFT)
+        
+        self.homology_tm_high_var = tk.DoubleVar(value=52.0)
+        self.homology_tm_high_spinbox = ttk.Spinbox(homology_tm_frame, from_=40, to=70, increment=0.5,
+                                                    textvariable=self.homology_tm_high_var, width=5)
+        self.homology_tm_high_spinbox.pack(side=tk.LEFT, padx=2)
+        
+        # 每个片段保留的引物对数量
+        top_k_frame = ttk.Frame(self.vector_label_frame)
+        top_k_frame.pack(fill=tk.X, padx=5, pady=2)
+        
+        self.top_k_label = ttk.Label(top_k_frame, text=self.get_text('top_k'))
+        self.top_k_label.pack(side=tk.LEFT, padx=5)
+        
+        self.top_k_var = tk.IntVar(value=1)
+        self.top_k_spinbox = ttk.Spinbox(top_k_frame, from_=1, to=10, textvariable=self.top_k_var, width=5)
+        self.top_k_spinbox.pack(side=tk.LEFT, padx=5)
+        
         # 设计引物按钮
         self.design_btn = ttk.Button(self.vector_label_frame, text=self.get_text('design_btn'), command=self.design_primers)
         self.design_btn.pack(fill=tk.X, padx=5, pady=10)
@@ -602,21 +708,71 @@ class GibsonPrimerDesignApp:
     
     def toggle_linearization(self):
         """根据线性化方式切换选项"""
-        if self.linearization_var.get() == "restriction":
-            # 显示酶切选项，隐藏PCR引物选项
-            self.enzyme_frame.pack(fill=tk.X, padx=20, pady=2)
-            # 隐藏PCR相关的框架
+        method = self.linearization_var.get()
+        primer_frames = [self.fw_primer_label.master, self.rv_primer_label.master]
+        
+        if method == "restriction":
+            # 显示酶切选项，紧跟在对应的单选按钮之后
+            self.enzyme_frame.pack(fill=tk.X, padx=20, pady=2, after=self.restriction_radio)
+        else:
+            self.enzyme_frame.pack_forget()
+            self.enzyme_var.set("")  # 清空酶选择
+        
+        if method == "pcr":
+            # 显示PCR引物输入框
+            previous = self.pcr_radio
+            for frame in primer_frames:
+                frame.pack(fill=tk.X, padx=20, pady=2, after=previous)
+                previous = frame
+        else:
             for widget in [self.fw_primer_entry, self.rv_primer_entry]:
                 widget.delete(0, tk.END)  # 清空输入
-            for frame in [self.fw_primer_label.master, self.rv_primer_label.master]:
+            for frame in primer_frames:
                 frame.pack_forget()
+        
+        if method == "pcr_auto":
+            # 显示插入位置输入框
+            self.insert_site_frame.pack(fill=tk.X, padx=20, pady=2, after=self.pcr_auto_radio)
         else:
-            # 显示PCR引物选项，隐藏酶切选项
-            self.enzyme_frame.pack_forget()
-            self.enzyme_var.set("")  # 清空酶选择
-            # 显示PCR相关的框架
-            for frame in [self.fw_primer_label.master, self.rv_primer_label.master]:
-                frame.pack(fill=tk.X, padx=20, pady=2)
+            self.insert_site_frame.pack_forget()
+    
+    def recommend_enzyme(self):
+        """为每个单切位点的限制酶完成设计，选中推荐的第一个酶并显示排名"""
+        if not self.fragments:
+            messagebox.showerror(self.get_text('error_header'), self.get_text('no_fragments'))
+            return
+        
+        if not self.vector:
+            messagebox.showerror(self.get_text('error_header'), self.get_text('no_vector'))
+            return
+        
+        homology_tm = None
+        if self.homology_tm_var.get():
+            homology_tm = (self.homology_tm_low_var.get(), self.homology_tm_high_var.get())
+        
+        try:
+            ordered_fragments = [self.fragments[i] for i in self.fragment_order]
+            recommendations = self.dna_tools.recommend_enzymes(
+                ordered_fragments,
+                self.vector,
+                self.homology_var.get(),
+                homology_tm=homology_tm
+            )
+        except Exception as e:
+            messagebox.showerror(self.get_text('error_header'), str(e))
+            return
+        
+        if not recommendations:
+            messagebox.showerror(self.get_text('error_header'), self.get_text('no_unique_cutter'))
+            return
+        
+        self.enzyme_var.set(recommendations[0]["enzyme"])
+        lines = [self.get_text('recommend_header')]
+        for rank, item in enumerate(recommendations[:10], start=1):
+            lines.append(self.get_text('recommend_line').format(
+                rank, item["enzyme"], item["cut_position"], item["worst_primer_score"], item["max_tm_difference"]
+            ))
+        messagebox.showinfo(self.get_text('recommend_title'), "\n".join(lines))
     
     def design_primers(self):
         """设计Gibson Assembly引物"""
@@ -632,6 +788,11 @@ class GibsonPrimerDesignApp:
         # 获取同源臂长度
         homology_length = self.homology_var.get()
         
+        # 获取同源臂目标Tm范围
+        homology_tm = None
+        if self.homology_tm_var.get():
+            homology_tm = (self.homology_tm_low_var.get(), self.homology_tm_high_var.get())
+        
         # 获取载体线性化信息
         linearization_method = self.linearization_var.get()
         linearization_info = {}
@@ -642,6 +803,22 @@ class GibsonPrimerDesignApp:
                 messagebox.showerror(self.get_text('error_header'), self.get_text('select_enzyme'))
                 return
             linearization_info["enzyme"] = enzyme
+        elif linearization_method == "pcr_auto":
+            try:
+                position = int(self.insert_position_entry.get().strip())
+                delete_end = self.delete_end_entry.get().strip()
+                delete_end = int(delete_end) if delete_end else None
+            except ValueError:
+                messagebox.showerror(self.get_text('error_header'), self.get_text('enter_position'))
+                return
+            
+            if position < 0 or (delete_end is not None and delete_end < 0):
+                messagebox.showerror(self.get_text('error_header'), self.get_text('enter_position'))
+                return
+            
+            linearization_info["position"] = position
+            if delete_end is not None:
+                linearization_info["delete_end"] = delete_end
         else:
             fw_primer = self.fw_primer_entry.get().strip()
             rv_primer = self.rv_primer_entry.get().strip()
@@ -663,7 +840,10 @@ class GibsonPrimerDesignApp:
                 self.vector, 
                 homology_length, 
                 linearization_method, 
-                linearization_info
+                linearization_info,
+                split_overlaps=self.split_overlaps_var.get(),
+                homology_tm=homology_tm,
+                top_k=self.top_k_var.get()
             )
             
             # 显示结果
@@ -679,7 +859,8 @@ class GibsonPrimerDesignApp:
         """显示引物设计结果"""
         self.result_text.delete(1.0, tk.END)
         
-        # 存储结果用于导出
+        # 为同名片段编号后存储结果副本用于导出，不修改设计结果本身
+        primer_results = self.dna_tools.with_display_names(primer_results)
         self.primer_results = primer_results
         
         # 添加标题
@@ -704,9 +885,6 @@ class GibsonPrimerDesignApp:
         # 显示引物信息
         self.result_text.insert(tk.END, self.get_text('primer_results') + "\n\n")
         
-        # 处理同名片段，记录每个名称出现的次数
-        fragment_name_counts = {}
-        
         # 载体引物
         if "vector_primers" in primer_results:
             self.result_text.insert(tk.END, self.get_text('vector_primers') + "\n")
@@ -734,36 +912,6 @@ class GibsonPrimerDesignApp:
         # 片段引物
         self.result_text.insert(tk.END, self.get_text('fragment_primers') + "\n")
         
-        # 首先处理片段名称，为重复的名称添加编号
-        for primer_info in primer_results["fragment_primers"]:
-            base_name = primer_info.get("name", "Fragment")
-            
-            # 记录名称出现次数
-            if base_name in fragment_name_counts:
-                fragment_name_counts[base_name] += 1
-            else:
-                fragment_name_counts[base_name] = 1
-            
-            # 如果名称重复，添加编号后缀
-            if fragment_name_counts[base_name] > 1:
-                # 添加编号后缀
-                fragment_name = f"{base_name}_{fragment_name_counts[base_name]}"
-            else:
-                # 如果只出现一次，检查是否之后会再次出现
-                total_count = sum(1 for p in primer_results["fragment_primers"] if p.get("name", "Fragment") == base_name)
-                if total_count > 1:
-                    # 如果之后会再次出现，第一次也添加编号
-                    fragment_name = f"{base_name}_1"
-                else:
-                    # 如果只出现一次，不添加编号
-                    fragment_name = base_name
-            
-            # 更新primer_info中的名称，用于导出
-            primer_info["display_name"] = fragment_name
-        
-        # 重置计数器，开始显示引物信息
-        fragment_name_counts = {}
-        
         for i, primer_info in enumerate(primer_results["fragment_primers"]):
             # 使用已经处理过的名称
             fragment_name = primer_info.get("display_name", f"Fragment_{i+1}")
@@ -772,14 +920,13 @@ class GibsonPrimerDesignApp:
             
             # 正向引物
             fw = primer_info["fw"]
-            fw_name = f"{fragment_name}-F"
-            # 更新引物名称用于导出
-            fw["name"] = fw_name
+            fw_name = fw["name"]
             
             self.result_text.insert(tk.END, f"{fw_name}: {fw['sequence']}\n")
             self.result_text.insert(tk.END, f"{self.get_text('tm')}: {fw['tm']:.2f}°C\n")
             self.result_text.insert(tk.END, f"{self.get_text('gc_content')}: {fw['gc_content']:.2f}%\n")
             self.result_text.insert(tk.END, f"{self.get_text('length')}: {fw['length']} bp\n")
+            self.result_text.insert(tk.END, f"{self.get_text('end_stability')}: {fw['end_stability']:.2f} kcal/mol\n")
             
             # 显示结构问题
             structure_issues = []
@@ -789,6 +936,8 @@ class GibsonPrimerDesignApp:
                 structure_issues.append(self.get_text('hairpin'))
             if fw.get('has_dimer', False):
                 structure_issues.append(self.get_text('dimer'))
+            if fw.get('has_stable_end', False):
+                structure_issues.append(self.get_text('stable_end'))
             
             if structure_issues:
                 self.result_text.insert(tk.END, f"{self.get_text('structure_issues')}: {', '.join(structure_issues)}\n")
@@ -797,14 +946,13 @@ class GibsonPrimerDesignApp:
             
             # 反向引物
             rv = primer_info["rv"]
-            rv_name = f"{fragment_name}-R"
-            # 更新引物名称用于导出
-            rv["name"] = rv_name
+            rv_name = rv["name"]
             
             self.result_text.insert(tk.END, f"{rv_name}: {rv['sequence']}\n")
             self.result_text.insert(tk.END, f"{self.get_text('tm')}: {rv['tm']:.2f}°C\n")
             self.result_text.insert(tk.END, f"{self.get_text('gc_content')}: {rv['gc_content']:.2f}%\n")
             self.result_text.insert(tk.END, f"{self.get_text('length')}: {rv['length']} bp\n")
+            self.result_text.insert(tk.END, f"{self.get_text('end_stability')}: {rv['end_stability']:.2f} kcal/mol\n")
             
             # 显示结构问题
             structure_issues = []
@@ -814,6 +962,8 @@ class GibsonPrimerDesignApp:
                 structure_issues.append(self.get_text('hairpin'))
             if rv.get('has_dimer', False):
                 structure_issues.append(self.get_text('dimer'))
+            if rv.get('has_stable_end', False):
+                structure_issues.append(self.get_text('stable_end'))
         
             if structure_issues:
                 self.result_text.insert(tk.END, f"{self.get_text('structure_issues')}: {', '.join(structure_issues)}\n")
@@ -821,8 +971,29 @@ class GibsonPrimerDesignApp:
             # 如果存在引物二聚体问题
             if primer_info.get('primer_dimer', False):
                 self.result_text.insert(tk.END, "\n" + self.get_text('primer_dimer_warning') + "\n")
+            
+            # 备选引物对
+            if primer_info.get("alternatives"):
+                self.result_text.insert(tk.END, "\n" + self.get_text('alternatives') + "\n")
+                for alternative in primer_info["alternatives"]:
+                    self.result_text.insert(tk.END, f"#{alternative['rank']} {self.get_text('pair_score')}: "
+                                                    f"{alternative['pair_score']:.2f}\n")
+                    for primer in (alternative["fw"], alternative["rv"]):
+                        self.result_text.insert(tk.END, f"  {primer['name']}: {primer['sequence']} "
+                                                        f"({self.get_text('tm')}: {primer['tm']:.2f}°C, "
+                                                        f"{primer['length']} bp)\n")
+                    if alternative.get('primer_dimer', False):
+                        self.result_text.insert(tk.END, "  " + self.get_text('primer_dimer_warning') + "\n")
         
             self.result_text.insert(tk.END, "\n" + "-" * 40 + "\n\n")
+        
+        # 连接处重叠区
+        if primer_results.get("junctions"):
+            self.result_text.insert(tk.END, self.get_text('junctions') + "\n")
+            for junction in primer_results["junctions"]:
+                self.result_text.insert(tk.END, f"{junction['left']} / {junction['right']}: "
+                                                f"{junction['overlap_length']} bp, "
+                                                f"{self.get_text('tm')} {junction['overlap_tm']:.2f}°C\n")
     
     def export_results(self, format_type):
         """导出引物设计结果"""
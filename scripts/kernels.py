@@ -0,0 +1,260 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""评分内循环的可选JIT后端
+
+连续重复碱基、k-mer发夹和二聚体检查是级联评分中最耗时的部分。scoring模块中的
+纯Python实现（"python"后端）在字符串上逐段切片比较；本模块提供同样逻辑的
+字节数组实现，安装了Numba时用numba.njit编译（"numba"后端）。
+
+后端按DNATools实例选择（DNATools(backend=...)）：
+    python  纯Python实现（默认）
+    numba   使用JIT编译的核心函数；没有安装Numba时自动退回python
+    auto    与numba相同
+
+数组实现对序列的ASCII字节逐一比较，IUPAC简并碱基的互补规则与scoring.reverse_complement相同；
+非ASCII字符统一替换为'?'。两种后端的分数完全一致，可以用compare_backends在固定种子的随机序列上
+核对单条引物评分、引物对评分、级联排名和完整的引物对设计，发现不一致时以状态码1退出；
+未安装Numba时跳过（加--interpreted则核对未编译的数组实现）：
+
+    python kernels.py --count 5000
+"""
+
+import sys
+
+BACKENDS = ("python", "numba", "auto")
+
+_array_kernels = {}
+
+
+def _numba_jit():
+    """返回numba.njit，没有安装Numba时返回None"""
+    try:
+        import numba
+    except ImportError:
+        return None
+    return numba.njit(cache=True, nogil=True)
+
+
+def resolve_backend(backend):
+    """确定实际使用的后端名称（"python"或"numba"）
+
+    参数:
+        backend: "python"、"numba"或"auto"
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"未知的评分后端: {backend}（可选: {', '.join(BACKENDS)}）")
+    if backend == "python":
+        return "python"
+    return "numba" if _numba_jit() is not None else "python"
+
+
+class ArrayKernels:
+    """在uint8字节数组上运行的核心函数
+
+    属性:
+        name: "numba"（JIT编译）或"interpreted"（未编译，只用于核对逻辑）
+    """
+
+    def __init__(self, jit=None):
+        """编译核心函数
+
+        参数:
+            jit: 编译装饰器（numba.njit(...)），为None时直接运行未编译的函数
+        """
+        import numpy as np
+
+        from scoring import reverse_complement
+
+        self.name = "interpreted" if jit is None else "numba"
+        compile_kernel = jit if jit is not None else (lambda function: function)
+        self._np = np
+        # 下标为字节值，值为其互补碱基的字节值
+        alphabet = "".join(chr(i) for i in range(256))
+        self._complement = np.frombuffer(reverse_complement(alphabet)[::-1].encode("latin-1"), dtype=np.uint8)
+
+        self._poly_x = compile_kernel(_has_poly_x)
+        self._hairpin = compile_kernel(_has_hairpin)
+        self.shares_kmer = compile_kernel(_shares_kmer)
+
+    def encode(self, seq):
+        """把大写序列转换为uint8数组"""
+        return self._np.frombuffer(seq.encode("ascii", "replace"), dtype=self._np.uint8)
+
+    def reverse_complement(self, codes):
+        """编码序列的反向互补"""
+        return self._complement[codes[::-1]]
+
+    def has_poly_x(self, codes, max_poly_x):
+        """是否有同一碱基（A/T/G/C）连续出现超过max_poly_x次"""
+        return self._poly_x(codes, max_poly_x)
+
+    def has_hairpin(self, codes):
+        """是否有3个碱基的茎在下游出现反向互补序列"""
+        return self._hairpin(codes, self._complement)
+
+
+def _has_poly_x(codes, max_run):
+    run = 0
+    previous = 0
+    for i in range(len(codes)):
+        code = codes[i]
+        if code == 65 or code == 67 or code == 71 or code == 84:
+            if code == previous:
+                run += 1
+            else:
+                run = 1
+            if run > max_run:
+                return True
+        else:
+            run = 0
+        previous = code
+    return False
+
+
+def _has_hairpin(codes, complement):
+    n = len(codes)
+    for i in range(n - 6):
+        # 茎codes[i:i+3]的反向互补
+        first = complement[codes[i + 2]]
+        second = complement[codes[i + 1]]
+        third = complement[codes[i]]
+        for j in range(i + 3, n - 2):
+            if codes[j] == first and codes[j + 1] == second and codes[j + 2] == third:
+                return True
+    return False
+
+
+def _shares_kmer(codes, other):
+    """两个编码序列是否共有长度为4的子串"""
+    for i in range(len(codes) - 3):
+        for j in range(len(other) - 3):
+            if (codes[i] == other[j] and codes[i + 1] == other[j + 1]
+                    and codes[i + 2] == other[j + 2] and codes[i + 3] == other[j + 3]):
+                return True
+    return False
+
+
+def get_kernels(backend):
+    """返回后端对应的ArrayKernels，python后端返回None（使用scoring中的纯Python实现）
+
+    参数:
+        backend: resolve_backend之前或之后的后端名称
+    """
+    backend = resolve_backend(backend)
+    if backend == "python":
+        return None
+    kernels = _array_kernels.get(backend)
+    if kernels is None:
+        kernels = ArrayKernels(_numba_jit())
+        _array_kernels[backend] = kernels
+    return kernels
+
+
+def _random_primer(rng, length, alphabet="ACGT"):
+    return "".join(rng.choice(alphabet) for _ in range(length))
+
+
+def compare_backends(count=2000, seed=0, params=None, weights=None):
+    """在随机序列上比较python后端与数组核心函数的评分结果
+
+    安装了Numba时比较JIT编译的版本，否则比较未编译的数组实现（核对逻辑是否一致）。
+    随机序列中混入低复杂度片段和少量简并碱基，以覆盖连续重复碱基和结构检查的各个分支。
+
+    参数:
+        count: 随机引物数量
+        seed: 随机数种子
+        params: PrimerParams，默认使用默认参数
+        weights: ScoreWeights，默认使用默认权重
+
+    返回:
+        (比较的数组实现名称, 不一致的结果列表)
+    """
+    import random
+
+    from dna_tools import DNATools, PrimerParams
+    from scoring import PrimerScorer
+
+    params = params if params is not None else PrimerParams()
+    rng = random.Random(seed)
+    primers = []
+    for _ in range(count):
+        primer = _random_primer(rng, rng.randint(1, 60), rng.choice(["ACGT", "ACGT", "AT", "GC", "ACGTNRY"]))
+        if rng.random() < 0.3:
+            # 插入一段重复碱基
+            position = rng.randint(0, len(primer))
+            primer = primer[:position] + rng.choice("ACGT") * rng.randint(2, 8) + primer[position:]
+        primers.append(primer)
+
+    reference = PrimerScorer(params, weights)
+    jit = _numba_jit()
+    candidate = PrimerScorer(params, weights, kernels=ArrayKernels(jit))
+    mismatches = []
+    for primer in primers:
+        site = primer[-rng.randint(1, len(primer)):]
+        expected = reference.evaluate(primer, site)
+        actual = candidate.evaluate(primer, site)
+        if expected != actual:
+            mismatches.append(("evaluate", primer, site, expected, actual))
+
+    for fw_seq, rv_seq in zip(primers, primers[1:]):
+        fw = {"primer": fw_seq, "binding_tm": 60.0, "score": 80}
+        rv = {"primer": rv_seq, "binding_tm": 61.0, "score": 70}
+        expected = reference.pair_score(fw, rv)
+        actual = candidate.pair_score(fw, rv)
+        if expected != actual:
+            mismatches.append(("pair_score", fw_seq, rv_seq, expected, actual))
+
+    # 级联排名：比较排名和分数
+    fw_primers = primers[:40]
+    rv_primers = primers[40:80]
+    results = []
+    for scorer in (reference, candidate):
+        ranked, _ = scorer.top_pairs(scorer.candidates(fw_primers, fw_primers),
+                                     scorer.candidates(rv_primers, rv_primers), top_k=5)
+        results.append([(fw.primer, rv.primer, score) for fw, rv, score, _ in ranked])
+    if results[0] != results[1]:
+        mismatches.append(("top_pairs", None, None, results[0], results[1]))
+
+    # 完整的引物对设计：随机片段加上随机同源臂，比较最佳引物对和备选引物对
+    tools = DNATools(params=params, score_weights=weights)
+    for _ in range(max(1, count // 50)):
+        fragment = _random_primer(rng, rng.randint(60, 600))
+        left = _random_primer(rng, rng.randint(0, 30))
+        right = _random_primer(rng, rng.randint(0, 30))
+        designs = []
+        for scorer in (reference, candidate):
+            pair = tools.design_balanced_primer_pair(fragment, left, right, scorer=scorer, top_k=3)
+            designs.append([
+                (p["fw_primer"], p["rv_primer"], p["score"]) for p in [pair] + pair["alternatives"]
+            ])
+        if designs[0] != designs[1]:
+            mismatches.append(("design", fragment, (left, right), designs[0], designs[1]))
+
+    return ("numba" if jit is not None else "interpreted"), mismatches
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="比较评分后端在随机序列上的结果，发现不一致时以状态码1退出")
+    parser.add_argument("--count", type=int, default=2000, help="随机引物数量")
+    parser.add_argument("--seed", type=int, default=0, help="随机数种子")
+    parser.add_argument("--interpreted", action="store_true",
+                        help="未安装Numba时比较未编译的数组实现（默认跳过）")
+    args = parser.parse_args()
+
+    if _numba_jit() is None and not args.interpreted:
+        print("未安装Numba，跳过后端比较（--interpreted可以核对未编译的数组实现）")
+        return 0
+    name, mismatches = compare_backends(args.count, args.seed)
+    if name != "numba":
+        print("未安装Numba，比较未编译的数组实现")
+    for kind, first, second, expected, actual in mismatches[:20]:
+        print(f"不一致 [{kind}] {first} {second}: python={expected} {name}={actual}")
+    print(f"{args.count}条随机引物，{len(mismatches)}处不一致")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,304 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""DNA最近邻热力学参数和3'端稳定性查找表
+
+参数来自SantaLucia (1998) 统一最近邻参数，供thermo模块的结构ΔG计算和
+3'端稳定性（PRIMER_MAX_END_STABILITY）检查共用。本模块不依赖NumPy。
+
+3'端稳定性是引物最后5个碱基与其完全互补链形成双链的 -ΔG（kcal/mol，37°C，1 M Na+），
+数值越大3'端越稳定，越容易在错误位置起始延伸。所有5-mer的值预先计算在一个
+1024项的表中，按2-bit编码的5-mer（A=0 C=1 G=2 T=3，5'端为最高位）下标查找。
+"""
+
+# 最近邻参数 5'-XY-3'/3'-X'Y'-5'：(ΔH kcal/mol, ΔS cal/(mol·K))
+NN_PARAMS = {
+    'AA': (-7.9, -22.2),
+    'AT': (-7.2, -20.4),
+    'TA': (-7.2, -21.3),
+    'CA': (-8.5, -22.7),
+    'GT': (-8.4, -22.4),
+    'CT': (-7.8, -21.0),
+    'GA': (-8.2, -22.2),
+    'CG': (-10.6, -27.2),
+    'GC': (-9.8, -24.4),
+    'GG': (-8.0, -19.9)
+}
+
+# 双链起始和末端A·T碱基对的罚分：(ΔH, ΔS)
+INIT = (0.2, -5.7)
+TERMINAL_AT = (2.2, 6.9)
+
+# 37°C对应的绝对温度
+T37 = 310.15
+
+# 计算3'端稳定性的碱基数
+END_STABILITY_LENGTH = 5
+
+# 把碱基转换为四进制数字，用int(..., 4)得到2-bit编码的下标；其他字符转换为无效数字
+_TO_DIGITS = str.maketrans({chr(i): {'A': '0', 'C': '1', 'G': '2', 'T': '3'}.get(chr(i), 'x') for i in range(256)})
+
+
+def nn_key(dinucleotide):
+    """最近邻参数表中对应的键（XY或其反向互补）"""
+    if dinucleotide in NN_PARAMS:
+        return dinucleotide
+    return dinucleotide[::-1].translate(str.maketrans('ACGT', 'TGCA'))
+
+
+def duplex_dg(seq, kelvin=T37):
+    """完全互补双链的ΔG（kcal/mol，1 M Na+），包括起始罚分和末端A·T罚分
+
+    参数:
+        seq: 大写的ACGT序列（不少于2个碱基）
+        kelvin: 绝对温度
+    """
+    dh, ds = INIT
+    for i in range(len(seq) - 1):
+        step_dh, step_ds = NN_PARAMS[nn_key(seq[i:i+2])]
+        dh += step_dh
+        ds += step_ds
+    for end in (seq[0], seq[-1]):
+        if end in 'AT':
+            dh += TERMINAL_AT[0]
+            ds += TERMINAL_AT[1]
+    return dh - kelvin * ds / 1000.0
+
+
+def build_end_stability_table():
+    """计算所有5-mer的3'端稳定性，下标为2-bit编码
+
+    END_STABILITY_TABLE就是本函数的结果；修改最近邻参数后用它重新生成该表。
+    """
+    table = []
+    for index in range(4 ** END_STABILITY_LENGTH):
+        pentamer = ''.join(
+            'ACGT'[(index >> (2 * (END_STABILITY_LENGTH - 1 - k))) & 3] for k in range(END_STABILITY_LENGTH)
+        )
+        table.append(-duplex_dg(pentamer))
+    return table
+
+
+# 3'端稳定性查找表（1024项，build_end_stability_table的结果）；
+# 直接写成字面量，避免导入时计算1024次ΔG
+END_STABILITY_TABLE = (
+    1.9708950000000058, 2.4688300000000076, 2.3030400000000064, 1.8291650000000104, 2.853790000000007,
+    3.2821750000000023, 3.618079999999999, 2.681045000000008, 2.5430750000000124, 3.5207100000000047,
+    3.1163850000000046, 2.6810450000000117, 1.4083000000000077, 2.1891300000000022, 2.3340550000000064,
+    1.8291650000000104, 2.853790000000007, 3.351725000000002, 3.185935000000004, 2.712060000000008,
+    3.6671350000000125, 4.095520000000008, 4.431425000000008, 3.4943900000000134, 3.8581150000000086,
+    4.835750000000001, 4.431425000000004, 3.9960850000000008, 2.260180000000009, 3.0410100000000035,
+    3.1859350000000113, 2.6810450000000117, 2.5430750000000124, 3.0410100000000035, 2.875220000000006,
+    2.4013450000000063, 3.905670000000004, 4.334055000000006, 4.66996, 3.7329250000000087,
+    3.356420000000007, 4.334055000000006, 3.9297300000000064, 3.49439000000001, 2.2601800000000054,
+    3.0410099999999964, 3.185935000000004, 2.6810450000000046, 1.4083000000000077, 1.906235000000006,
+    1.7404450000000082, 1.2665700000000086, 2.5740900000000053, 3.002475000000004, 3.338380000000008,
+    2.40134500000001, 2.5740900000000018, 3.5517250000000047, 3.147400000000001, 2.7120600000000046,
+    1.4083000000000077, 2.1891300000000022, 2.3340550000000064, 1.8291650000000104, 2.853790000000007,
+    3.351725000000002, 3.185935000000004, 2.712060000000008, 3.736685000000012, 4.165070000000011,
+    4.5009750000000075, 3.5639400000000094, 3.42597000000001, 4.4036050000000095, 3.999280000000006,
+    3.5639400000000165, 2.2911950000000125, 3.072025000000007, 3.216950000000015, 2.7120600000000152,
+    3.6671350000000054, 4.165070000000011, 3.9992800000000024, 3.52540500000001, 4.480480000000007,
+    4.908865000000006, 5.244770000000003, 4.3077350000000045, 4.67146, 5.64909500000001,
+    5.244770000000006, 4.80943000000001, 3.0735250000000107, 3.8543550000000053, 3.9992800000000024,
+    3.49439000000001, 3.8581150000000015, 4.35605, 4.190259999999995, 3.7163850000000025,
+    5.22071, 5.649095000000003, 5.9850000000000065, 5.047965000000005, 4.671460000000003,
+    5.649095000000003, 5.244769999999999, 4.80943000000001, 3.5752200000000123, 4.35605000000001,
+    4.5009750000000075, 3.9960850000000043, 2.260180000000009, 2.7581150000000108, 2.5923250000000095,
+    2.11845000000001, 3.42597000000001, 3.854355000000009, 4.190259999999995, 3.2532250000000076,
+    3.42597000000001, 4.403605000000002, 3.999280000000006, 3.5639400000000094, 2.2601800000000054,
+    3.0410099999999964, 3.185935000000004, 2.6810450000000046, 2.5430750000000124, 3.0410100000000035,
+    2.875220000000006, 2.4013450000000063, 3.42597000000001, 3.854355000000009, 4.190259999999995,
+    3.2532250000000076, 3.115255000000001, 4.092889999999997, 3.688564999999997, 3.253225000000004,
+    1.9804800000000071, 2.7613100000000053, 2.906235000000006, 2.4013450000000063, 3.905670000000004,
+    4.403605000000002, 4.237815000000001, 3.7639400000000123, 4.719015000000002, 5.147400000000001,
+    5.483305000000001, 4.54627, 4.909995000000006, 5.8876300000000015, 5.483305000000005,
+    5.047965000000005, 3.3120600000000096, 4.092890000000001, 4.237815000000008, 3.7329250000000087,
+    3.3564200000000035, 3.8543550000000018, 3.688565000000004, 3.214690000000008, 4.719015000000002,
+    5.147400000000001, 5.483305000000001, 4.54627, 4.169765000000005, 5.147400000000008,
+    4.743075000000005, 4.3077350000000045, 3.073525000000007, 3.8543550000000053, 3.9992800000000024,
+    3.4943900000000028, 2.260180000000009, 2.7581150000000108, 2.5923250000000095, 2.11845000000001,
+    3.42597000000001, 3.854355000000009, 4.190259999999995, 3.2532250000000076, 3.42597000000001,
+    4.403605000000002, 3.999280000000006, 3.5639400000000094, 2.2601800000000054, 3.0410099999999964,
+    3.185935000000004, 2.6810450000000046, 1.4083000000000077, 1.906235000000006, 1.7404450000000082,
+    1.2665700000000086, 2.291195000000009, 2.7195800000000077, 3.055485000000008, 2.1184500000000064,
+    1.9804800000000036, 2.958115000000003, 2.553790000000003, 2.1184499999999993, 0.8457050000000059,
+    1.6265350000000005, 1.7714600000000011, 1.266570000000005, 2.5740900000000053, 3.0720250000000036,
+    2.906235000000006, 2.4323600000000027, 3.3874350000000106, 3.8158200000000058, 4.1517250000000026,
+    3.2146900000000116, 3.578415000000007, 4.5560499999999955, 4.151724999999999, 3.716384999999999,
+    1.9804800000000071, 2.7613100000000053, 2.906235000000006, 2.4013450000000063, 2.5740900000000053,
+    3.0720250000000036, 2.906235000000006, 2.4323600000000027, 3.9366850000000078, 4.3650700000000064,
+    4.700975000000003, 3.7639400000000123, 3.3874350000000106, 4.3650700000000064, 3.9607450000000064,
+    3.5254050000000063, 2.291195000000009, 3.072025, 3.2169500000000077, 2.712060000000008,
+    1.4083000000000077, 1.906235000000006, 1.7404450000000082, 1.2665700000000086, 2.5740900000000053,
+    3.002475000000004, 3.338380000000008, 2.40134500000001, 2.5740900000000018, 3.5517250000000047,
+    3.147400000000001, 2.7120600000000046, 1.4083000000000077, 2.1891300000000022, 2.3340550000000064,
+    1.8291650000000104, 2.4757850000000055, 2.9737200000000037, 2.807930000000006, 2.33405500000001,
+    3.3586800000000068, 3.7870649999999983, 4.122970000000002, 3.185935000000004, 3.0479650000000085,
+    4.025600000000008, 3.6212750000000007, 3.1859350000000113, 1.9131900000000073, 2.694020000000002,
+    2.8389450000000025, 2.33405500000001, 3.3586800000000068, 3.8566150000000015, 3.6908250000000002,
+    3.2169500000000077, 4.1720250000000085, 4.600410000000007, 4.936315000000011, 3.999280000000006,
+    4.363005000000001, 5.340640000000008, 4.936315000000004, 4.500975000000004, 2.765070000000012,
+    3.545900000000003, 3.6908250000000002, 3.1859350000000113, 3.0479650000000085, 3.545900000000003,
+    3.3801100000000055, 2.906235000000006, 4.410560000000007, 4.838945000000013, 5.174850000000003,
+    4.237815000000008, 3.861310000000003, 4.838945000000013, 4.434620000000006, 3.999280000000006,
+    2.7650700000000086, 3.545900000000003, 3.6908250000000002, 3.185935000000004, 1.9131900000000073,
+    2.4111250000000055, 2.2453350000000043, 1.7714600000000011, 3.0789800000000085, 3.507365,
+    3.843269999999997, 2.906235000000006, 3.0789800000000085, 4.056614999999997, 3.6522900000000007,
+    3.2169500000000006, 1.9131900000000037, 2.6940199999999983, 2.838944999999999, 2.334055000000003,
+    3.2891300000000037, 3.7870649999999983, 3.6212750000000007, 3.1474000000000046, 4.1720250000000085,
+    4.600410000000007, 4.936315000000011, 3.999280000000006, 3.861310000000003, 4.838945000000013,
+    4.434620000000006, 3.999280000000006, 2.7265350000000055, 3.5073650000000036, 3.6522900000000043,
+    3.1474000000000046, 4.102475000000005, 4.600410000000007, 4.4346200000000024, 3.9607450000000064,
+    4.9158199999999965, 5.344204999999999, 5.680109999999999, 4.743075000000005, 5.106799999999993,
+    6.084435000000006, 5.680110000000003, 5.244769999999999, 3.5088650000000072, 4.289695000000002,
+    4.4346200000000024, 3.929730000000003, 4.293454999999998, 4.79139, 4.625600000000002,
+    4.151724999999999, 5.656050000000008, 6.084435000000006, 6.420340000000003, 5.483305000000005,
+    5.1068, 6.084435000000006, 5.680110000000003, 5.244769999999999, 4.010560000000009,
+    4.791390000000003, 4.936315000000004, 4.431425000000001, 2.695520000000009, 3.193455000000011,
+    3.027665000000006, 2.55379000000001, 3.861310000000003, 4.289695000000005, 4.625600000000002,
+    3.688565000000004, 3.861310000000003, 4.838945000000013, 4.434620000000006, 3.999280000000006,
+    2.6955200000000055, 3.47635, 3.6212750000000007, 3.116385000000001, 3.48011,
+    3.978045000000005, 3.8122550000000004, 3.3383800000000114, 4.363005000000001, 4.79139,
+    5.127295000000004, 4.190259999999995, 4.052290000000003, 5.029925000000006, 4.625600000000009,
+    4.190260000000002, 2.917515000000005, 3.6983449999999998, 3.843269999999997, 3.338380000000008,
+    4.842704999999999, 5.3406400000000005, 5.174850000000003, 4.700975000000007, 5.656050000000008,
+    6.084435000000006, 6.42034000000001, 5.483305000000005, 5.84703, 6.82466500000001,
+    6.420340000000003, 5.985000000000003, 4.249095000000004, 5.029925000000006, 5.174850000000003,
+    4.669960000000007, 4.293454999999998, 4.79139, 4.625600000000002, 4.151724999999999,
+    5.656050000000008, 6.084435000000006, 6.420340000000003, 5.483305000000005, 5.1068,
+    6.084435000000006, 5.680110000000003, 5.244769999999999, 4.010560000000009, 4.791390000000003,
+    4.936315000000004, 4.431425000000001, 3.1972150000000035, 3.6951500000000017, 3.5293600000000005,
+    3.055485000000008, 4.363005000000001, 4.79139, 5.127295000000004, 4.190259999999995,
+    4.363005000000001, 5.3406400000000005, 4.936314999999997, 4.500975000000004, 3.1972150000000106,
+    3.9780450000000087, 4.122970000000002, 3.618079999999999, 1.8821750000000037, 2.3801100000000055,
+    2.2143200000000043, 1.7404450000000082, 2.765070000000005, 3.193455, 3.529360000000004,
+    2.592325000000006, 2.454355000000003, 3.431990000000006, 3.0276650000000025, 2.5923250000000024,
+    1.319580000000002, 2.10041, 2.2453350000000007, 1.7404449999999976, 3.0479650000000014,
+    3.545899999999996, 3.3801099999999984, 2.9062350000000023, 3.861310000000003, 4.289695000000005,
+    4.625600000000002, 3.688565000000004, 4.052289999999996, 5.029925000000006, 4.625600000000002,
+    4.190259999999995, 2.4543549999999996, 3.235184999999994, 3.380109999999995, 2.8752200000000023,
+    3.0479650000000085, 3.545900000000003, 3.3801100000000055, 2.906235000000006, 4.410560000000007,
+    4.838945000000013, 5.174850000000003, 4.237815000000008, 3.861310000000003, 4.838945000000013,
+    4.434620000000006, 3.999280000000006, 2.7650700000000086, 3.545900000000003, 3.6908250000000002,
+    3.185935000000004, 1.8821750000000037, 2.3801100000000055, 2.2143200000000007, 1.7404450000000047,
+    3.0479650000000085, 3.47635, 3.8122550000000004, 2.875220000000006, 3.0479650000000085,
+    4.025600000000001, 3.6212750000000007, 3.185935000000004, 1.8821750000000037, 2.663005000000002,
+    2.8079300000000025, 2.303040000000003, 2.3308600000000013, 2.8287949999999995, 2.663005000000002,
+    2.189130000000006, 3.2137550000000026, 3.6421399999999977, 3.9780450000000016, 3.0410099999999964,
+    2.9030400000000043, 3.8806750000000036, 3.47635, 3.0410100000000035, 1.7682649999999995,
+    2.5490949999999977, 2.6940199999999983, 2.1891300000000022, 3.2137550000000026, 3.7116899999999973,
+    3.545899999999996, 3.0720250000000036, 4.027100000000004, 4.455485000000003, 4.791390000000003,
+    3.8543550000000018, 4.2180800000000005, 5.195714999999996, 4.79139, 4.35605,
+    2.6201450000000044, 3.4009750000000025, 3.545900000000003, 3.0410100000000035, 2.9030400000000043,
+    3.4009750000000025, 3.235185000000005, 2.7613100000000053, 4.265635000000003, 4.694020000000005,
+    5.029925000000006, 4.092890000000001, 3.716384999999999, 4.694019999999998, 4.289695000000005,
+    3.8543550000000018, 2.6201450000000044, 3.4009750000000025, 3.545900000000003, 3.0410100000000035,
+    1.7682649999999995, 2.2661999999999978, 2.1004100000000037, 1.6265350000000005, 2.9340550000000043,
+    3.362439999999996, 3.6983449999999998, 2.7613100000000053, 2.9340550000000043, 3.91169,
+    3.507365, 3.0720250000000036, 1.768265000000003, 2.549095000000001, 2.694020000000002,
+    2.1891300000000022, 3.693455, 4.191389999999998, 4.025600000000001, 3.5517250000000047,
+    4.5763500000000015, 5.004735000000004, 5.340640000000008, 4.403605000000002, 4.265635000000003,
+    5.243270000000006, 4.838945000000013, 4.4036050000000095, 3.130860000000009, 3.911690000000007,
+    4.056615000000001, 3.5517250000000082, 4.506800000000002, 5.004735000000004, 4.838944999999999,
+    4.3650700000000136, 5.320145000000004, 5.748529999999999, 6.084435000000003, 5.147400000000001,
+    5.511125000000007, 6.488760000000006, 6.084435000000006, 5.649095000000003, 3.9131900000000073,
+    4.694020000000002, 4.838945000000006, 4.33405500000001, 4.697780000000005, 5.195715000000003,
+    5.029925000000006, 4.556050000000003, 6.060375000000004, 6.488760000000006, 6.82466500000001,
+    5.887630000000009, 5.5111250000000105, 6.488760000000006, 6.084435000000006, 5.649095000000003,
+    4.414885000000012, 5.195715, 5.340640000000008, 4.835750000000004, 3.0998450000000055,
+    3.5977800000000073, 3.4319900000000025, 2.95811500000001, 4.265635000000003, 4.694020000000005,
+    5.029925000000006, 4.092890000000001, 4.265635000000003, 5.243270000000006, 4.838945000000013,
+    4.4036050000000095, 3.0998450000000126, 3.8806750000000036, 4.025600000000008, 3.5207100000000047,
+    3.1442049999999995, 3.6421399999999977, 3.47635, 3.0024750000000004, 4.027100000000004,
+    4.455485000000003, 4.791390000000003, 3.8543550000000018, 3.7163850000000025, 4.694020000000005,
+    4.289695000000009, 3.854355000000009, 2.5816100000000084, 3.362440000000003, 3.5073650000000036,
+    3.0024750000000076, 4.506800000000002, 5.004735000000004, 4.838944999999999, 4.3650700000000136,
+    5.320145000000004, 5.748529999999999, 6.084435000000003, 5.147400000000001, 5.511125000000007,
+    6.488760000000006, 6.084435000000006, 5.649095000000003, 3.9131900000000073, 4.694020000000002,
+    4.838945000000006, 4.33405500000001, 3.9575500000000012, 4.455485000000003, 4.289695000000002,
+    3.8158200000000058, 5.320145000000004, 5.748529999999999, 6.084435000000003, 5.147400000000001,
+    4.770894999999999, 5.748529999999999, 5.344204999999999, 4.908865000000006, 3.674655000000005,
+    4.455485000000007, 4.600410000000004, 4.095520000000004, 2.861310000000003, 3.359245000000005,
+    3.193455, 2.719580000000004, 4.027100000000001, 4.455485000000003, 4.79139,
+    3.854354999999998, 4.027100000000001, 5.004735000000004, 4.600410000000007, 4.165070000000011,
+    2.8613100000000067, 3.6421399999999977, 3.7870649999999983, 3.2821750000000023, 2.0479650000000085,
+    2.545900000000003, 2.380110000000009, 1.9062350000000094, 2.93086000000001, 3.359245000000012,
+    3.695150000000009, 2.7581150000000108, 2.6201450000000044, 3.59778, 3.193455,
+    2.7581150000000036, 1.4853700000000067, 2.2662000000000013, 2.4111250000000055, 1.906235000000006,
+    3.2137550000000026, 3.7116899999999973, 3.545899999999996, 3.0720250000000036, 4.027100000000004,
+    4.455485000000003, 4.791390000000003, 3.8543550000000018, 4.2180800000000005, 5.195714999999996,
+    4.79139, 4.35605, 2.6201450000000044, 3.4009750000000025, 3.545900000000003,
+    3.0410100000000035, 3.2137550000000097, 3.7116900000000044, 3.545900000000003, 3.0720250000000036,
+    4.5763500000000015, 5.004735000000004, 5.340640000000008, 4.4036050000000095, 4.0271000000000114,
+    5.004735000000004, 4.600410000000007, 4.165070000000011, 2.9308600000000133, 3.7116900000000044,
+    3.856615000000005, 3.3517250000000054, 2.0479650000000085, 2.545900000000003, 2.3801100000000055,
+    1.906235000000006, 3.2137550000000026, 3.6421399999999977, 3.9780450000000016, 3.0410100000000035,
+    3.2137550000000026, 4.1913900000000055, 3.7870649999999983, 3.351725000000002, 2.047965000000005,
+    2.828795000000003, 2.97372, 2.4688300000000005, 1.5500300000000067, 2.047965000000005,
+    1.8821750000000037, 1.408300000000004, 2.432925000000008, 2.8613100000000067, 3.1972150000000035,
+    2.260180000000009, 2.1222100000000026, 3.0998450000000055, 2.6955200000000055, 2.260180000000009,
+    0.987435000000012, 1.768265000000003, 1.9131900000000073, 1.4083000000000077, 2.4329250000000044,
+    2.9308600000000027, 2.7650700000000086, 2.2911950000000054, 3.2462700000000027, 3.674655000000005,
+    4.010560000000005, 3.073525000000007, 3.4372500000000095, 4.414885000000002, 4.010560000000005,
+    3.5752200000000016, 1.8393150000000063, 2.620145000000001, 2.7650700000000015, 2.2601800000000054,
+    2.1222100000000026, 2.6201450000000044, 2.454355000000003, 1.9804800000000071, 3.484805000000005,
+    3.91319, 4.2490950000000005, 3.312060000000006, 2.9355550000000044, 3.91319,
+    3.5088650000000037, 3.073525000000007, 1.8393150000000098, 2.6201450000000044, 2.765070000000005,
+    2.2601800000000054, 0.987435000000005, 1.4853700000000032, 1.319580000000002, 0.8457050000000059,
+    2.153225000000006, 2.581610000000005, 2.917515000000005, 1.9804800000000071, 2.153225000000006,
+    3.1308600000000055, 2.726535000000002, 2.291195000000009, 0.987435000000012, 1.768265000000003,
+    1.9131900000000073, 1.4083000000000077, 2.7158200000000043, 3.213755000000006, 3.0479650000000014,
+    2.5740900000000053, 3.598715000000002, 4.027100000000001, 4.363005000000001, 3.425970000000003,
+    3.2880000000000074, 4.265635000000003, 3.861310000000003, 3.42597000000001, 2.153225000000006,
+    2.9340550000000043, 3.0789800000000085, 2.5740900000000053, 3.529165000000006, 4.027100000000001,
+    3.861310000000003, 3.387435000000007, 4.342510000000011, 4.7708950000000065, 5.106800000000007,
+    4.169765000000012, 4.5334900000000005, 5.511125000000007, 5.1068, 4.67146,
+    2.935555000000008, 3.7163850000000025, 3.861310000000003, 3.3564200000000106, 3.7201449999999987,
+    4.2180800000000005, 4.052289999999996, 3.5784150000000103, 5.082739999999998, 5.511125,
+    5.84703, 4.9099949999999986, 4.5334900000000005, 5.511125, 5.106799999999993,
+    4.67146, 3.4372500000000095, 4.2180800000000005, 4.363005000000001, 3.8581150000000015,
+    2.1222100000000026, 2.6201450000000044, 2.454355000000003, 1.9804800000000071, 3.2880000000000074,
+    3.7163850000000025, 4.052290000000003, 3.115255000000012, 3.2880000000000074, 4.265634999999996,
+    3.861310000000003, 3.425970000000003, 2.122210000000006, 2.9030400000000043, 3.0479650000000085,
+    2.5430750000000124, 2.7158200000000043, 3.213755000000006, 3.0479650000000014, 2.5740900000000053,
+    3.598715000000002, 4.027100000000001, 4.363005000000001, 3.425970000000003, 3.2880000000000074,
+    4.265635000000003, 3.861310000000003, 3.42597000000001, 2.153225000000006, 2.9340550000000043,
+    3.0789800000000085, 2.5740900000000053, 4.078415000000003, 4.576349999999998, 4.41056,
+    3.9366850000000113, 4.8917600000000085, 5.320145000000007, 5.656050000000008, 4.7190150000000095,
+    5.082740000000005, 6.0603750000000005, 5.656050000000004, 5.220709999999997, 3.484805000000012,
+    4.265635000000003, 4.410560000000007, 3.9056700000000113, 3.529165000000006, 4.027100000000001,
+    3.861310000000003, 3.387435000000007, 4.8917600000000085, 5.320145000000007, 5.656050000000008,
+    4.7190150000000095, 4.342510000000011, 5.320145000000007, 4.915820000000004, 4.480480000000011,
+    3.2462700000000133, 4.0271000000000114, 4.1720250000000085, 3.6671350000000125, 2.4329250000000116,
+    2.93086000000001, 2.765070000000012, 2.291195000000009, 3.598715000000009, 4.027100000000008,
+    4.363005000000001, 3.42597000000001, 3.598715000000009, 4.576349999999998, 4.172025000000005,
+    3.7366850000000085, 2.432925000000008, 3.2137550000000026, 3.3586800000000068, 2.853790000000007,
+    1.5500300000000067, 2.047965000000005, 1.8821750000000037, 1.408300000000004, 2.432925000000008,
+    2.8613100000000067, 3.1972150000000035, 2.260180000000009, 2.1222100000000026, 3.0998450000000055,
+    2.6955200000000055, 2.260180000000009, 0.987435000000012, 1.768265000000003, 1.9131900000000073,
+    1.4083000000000077, 2.7158200000000043, 3.213755000000006, 3.0479650000000014, 2.5740900000000053,
+    3.529165000000006, 3.9575500000000012, 4.293454999999998, 3.356420000000007, 3.720145000000006,
+    4.697780000000002, 4.293455000000005, 3.858115000000005, 2.122210000000006, 2.9030400000000043,
+    3.0479650000000085, 2.5430750000000124, 2.7158200000000043, 3.213755000000006, 3.0479650000000014,
+    2.5740900000000053, 4.078415000000003, 4.506800000000002, 4.842704999999999, 3.905670000000004,
+    3.529165000000006, 4.506800000000002, 4.102475000000005, 3.6671350000000054, 2.432925000000008,
+    3.2137550000000026, 3.3586800000000068, 2.853790000000007, 1.5500300000000102, 2.047965000000012,
+    1.8821750000000073, 1.4083000000000112, 2.7158200000000043, 3.14420500000001, 3.48011,
+    2.5430750000000124, 2.7158200000000043, 3.6934550000000144, 3.2891300000000108, 2.8537900000000107,
+    1.5500300000000067, 2.330860000000005, 2.4757850000000055, 1.9708950000000058,
+)
+
+
+def end_stability(seq):
+    """返回序列最后5个碱基的3'端稳定性（-ΔG，kcal/mol）
+
+    序列短于5个碱基或末端含有ACGT以外的碱基时返回0.0。
+    """
+    pentamer = seq[-END_STABILITY_LENGTH:].upper()
+    if len(pentamer) < END_STABILITY_LENGTH:
+        return 0.0
+    try:
+        return END_STABILITY_TABLE[int(pentamer.translate(_TO_DIGITS), 4)]
+    except ValueError:
+        return 0.0
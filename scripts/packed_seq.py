@@ -0,0 +1,280 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""2-bit压缩的DNA序列
+
+批量设计时内存中同时保存数千条片段和多个载体。PackedSeq每个碱基只占2 bit，
+N等IUPAC简并碱基记录在例外列表中，小写（软屏蔽）区段记录为区间，
+因此可以无损还原原始序列，常驻内存约为普通字符串的四分之一。
+
+切片返回SeqWindow视图，不复制数据；只有在str()时才解码对应的片段。
+设计函数只对片段两端的短窗口调用str()，因此不会产生整条序列的副本。
+"""
+
+from bisect import bisect_left
+import re
+
+# 碱基编码
+_ENCODE = {'A': 0, 'C': 1, 'G': 2, 'T': 3}
+_BASES = 'ACGT'
+
+# 把大写碱基映射为0-3的编码，其他字符映射为0（记录在例外列表中）
+_CODE_TABLE = bytes(_ENCODE.get(chr(i), 0) for i in range(256))
+
+# 每个字节解码为4个碱基的查找表（低位在前）
+_BYTE_TO_BASES = [
+    ''.join(_BASES[(byte >> shift) & 3] for shift in (0, 2, 4, 6))
+    for byte in range(256)
+]
+
+_NON_ACGT = re.compile(r'[^ACGT]')
+_LOWER_RUN = re.compile(r'[a-z]+')
+
+
+class PackedSeq:
+    """每个碱基2 bit存储的DNA序列"""
+
+    __slots__ = ('_data', '_length', '_exception_pos', '_exception_chars', '_lower_starts', '_lower_ends')
+
+    def __init__(self, sequence=""):
+        """压缩一条序列
+
+        参数:
+            sequence: 序列字符串（或可以转换为字符串的序列对象）
+        """
+        sequence = str(sequence)
+        upper = sequence.upper()
+        self._length = len(sequence)
+
+        # N等非ACGT字符记录在例外列表中
+        self._exception_pos = []
+        self._exception_chars = []
+        for match in _NON_ACGT.finditer(upper):
+            self._exception_pos.append(match.start())
+            self._exception_chars.append(match.group())
+
+        # 小写区段记录为[起点, 终点)区间
+        self._lower_starts = []
+        self._lower_ends = []
+        if upper != sequence:
+            for match in _LOWER_RUN.finditer(sequence):
+                self._lower_starts.append(match.start())
+                self._lower_ends.append(match.end())
+
+        # 每4个碱基压缩为1个字节
+        codes = upper.encode('ascii', 'replace').translate(_CODE_TABLE)
+        padding = (-len(codes)) % 4
+        codes += bytes(padding)
+        self._data = bytes(
+            a | (b << 2) | (c << 4) | (d << 6)
+            for a, b, c, d in zip(codes[0::4], codes[1::4], codes[2::4], codes[3::4])
+        )
+
+    def __len__(self):
+        return self._length
+
+    def __str__(self):
+        return self.decode()
+
+    def __repr__(self):
+        preview = self.decode(0, 20)
+        suffix = "..." if self._length > 20 else ""
+        return f"PackedSeq('{preview}{suffix}', length={self._length})"
+
+    def __eq__(self, other):
+        if isinstance(other, (PackedSeq, SeqWindow)):
+            return len(self) == len(other) and str(self) == str(other)
+        if isinstance(other, str):
+            return len(self) == len(other) and str(self) == other
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def __getitem__(self, index):
+        """整数下标返回单个碱基，切片返回不复制数据的SeqWindow"""
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._length)
+            if step != 1:
+                return self.decode(0, self._length)[index]
+            return SeqWindow(self, start, max(start, stop))
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("序列下标超出范围")
+        return self.decode(index, index + 1)
+
+    def __iter__(self):
+        # 分块解码，避免一次生成整条序列
+        for start in range(0, self._length, 4096):
+            yield from self.decode(start, min(self._length, start + 4096))
+
+    def __reversed__(self):
+        for end in range(self._length, 0, -4096):
+            yield from reversed(self.decode(max(0, end - 4096), end))
+
+    @property
+    def nbytes(self):
+        """压缩数据及例外列表占用的字节数（近似值）"""
+        return len(self._data) + 8 * (len(self._exception_pos) + 2 * len(self._lower_starts))
+
+    def window(self, start, end):
+        """返回[start, end)区间的视图"""
+        return SeqWindow(self, start, end)
+
+    def decode(self, start=0, end=None):
+        """解码[start, end)区间为字符串"""
+        if end is None:
+            end = self._length
+        start = max(0, start)
+        end = min(self._length, end)
+        if start >= end:
+            return ""
+
+        first_byte = start >> 2
+        last_byte = (end + 3) >> 2
+        table = _BYTE_TO_BASES
+        text = ''.join([table[byte] for byte in self._data[first_byte:last_byte]])
+        offset = start - (first_byte << 2)
+        text = text[offset:offset + end - start]
+
+        # 还原例外字符
+        i = bisect_left(self._exception_pos, start)
+        if i < len(self._exception_pos) and self._exception_pos[i] < end:
+            chars = list(text)
+            while i < len(self._exception_pos) and self._exception_pos[i] < end:
+                chars[self._exception_pos[i] - start] = self._exception_chars[i]
+                i += 1
+            text = ''.join(chars)
+
+        # 还原小写区段
+        i = bisect_left(self._lower_ends, start + 1)
+        if i < len(self._lower_starts) and self._lower_starts[i] < end:
+            pieces = []
+            pos = start
+            while i < len(self._lower_starts) and self._lower_starts[i] < end:
+                low = max(start, self._lower_starts[i])
+                high = min(end, self._lower_ends[i])
+                pieces.append(text[pos - start:low - start])
+                pieces.append(text[low - start:high - start].lower())
+                pos = high
+                i += 1
+            pieces.append(text[pos - start:])
+            text = ''.join(pieces)
+
+        return text
+
+    def upper(self):
+        """返回大写字符串"""
+        return self.decode().upper()
+
+
+class SeqWindow:
+    """PackedSeq上[start, end)区间的只读视图，str()时才解码"""
+
+    __slots__ = ('_parent', '_start', '_end')
+
+    def __init__(self, parent, start, end):
+        self._parent = parent
+        self._start = start
+        self._end = end
+
+    def __len__(self):
+        return self._end - self._start
+
+    def __str__(self):
+        return self._parent.decode(self._start, self._end)
+
+    def __repr__(self):
+        return f"SeqWindow({self._start}, {self._end})"
+
+    def __eq__(self, other):
+        if isinstance(other, (PackedSeq, SeqWindow, str)):
+            return len(self) == len(other) and str(self) == str(other)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def __getitem__(self, index):
+        length = self._end - self._start
+        if isinstance(index, slice):
+            start, stop, step = index.indices(length)
+            if step != 1:
+                return str(self)[index]
+            return SeqWindow(self._parent, self._start + start, self._start + max(start, stop))
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("序列下标超出范围")
+        return self._parent.decode(self._start + index, self._start + index + 1)
+
+    def __iter__(self):
+        return iter(str(self))
+
+    def upper(self):
+        return str(self).upper()
+
+
+class PackedRecord:
+    """使用PackedSeq保存序列的序列记录，接口与SeqRecord的id/seq/description兼容"""
+
+    __slots__ = ('id', 'seq', 'description', '__weakref__')
+
+    def __init__(self, seq, id="", description=""):
+        self.seq = seq if isinstance(seq, PackedSeq) else PackedSeq(seq)
+        self.id = id
+        self.description = description
+
+    def __len__(self):
+        return len(self.seq)
+
+    @classmethod
+    def from_record(cls, record):
+        """从SeqRecord等带有id/seq属性的记录转换"""
+        return cls(PackedSeq(str(record.seq)), record.id, getattr(record, 'description', ""))
+
+
+class EndWindows:
+    """只保存序列两端的视图
+
+    记录序列全长和两端各size个碱基，只支持从两端截取的切片（seq[:n]、seq[-n:]），
+    用于把片段发送到其他进程评分时只传递引物结合区需要的短序列。
+    """
+
+    __slots__ = ('_head', '_tail', '_length')
+
+    def __init__(self, seq, size):
+        """截取两端
+
+        参数:
+            seq: 序列（str、Seq、PackedSeq等支持切片的对象）
+            size: 两端各保留的碱基数
+        """
+        length = len(seq)
+        size = min(size, length)
+        self._head = str(seq[:size])
+        self._tail = str(seq[length-size:])
+        self._length = length
+
+    def __len__(self):
+        return self._length
+
+    def __str__(self):
+        if len(self._head) == self._length:
+            return self._head
+        raise ValueError("只保存了序列两端，无法还原整条序列")
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            index = slice(index, index + 1 if index != -1 else None)
+        start, stop, step = index.indices(self._length)
+        if step != 1:
+            raise ValueError("只支持连续的切片")
+        stop = max(start, stop)
+        if stop <= len(self._head):
+            return self._head[start:stop]
+        tail_start = self._length - len(self._tail)
+        if start >= tail_start:
+            return self._tail[start - tail_start:stop - tail_start]
+        raise IndexError("只保存了序列两端，切片超出了保存的范围")
@@ -0,0 +1,603 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""可配置的引物评分
+
+把PrimerParams中的长度、Tm、GC含量、连续重复碱基限制和ScoreWeights中的罚分权重
+编译为一个PrimerScorer。所有阈值和权重在编译时绑定为局部常量，
+评分内循环中不再查字典或读取对象属性；同一组参数的评分器由DNATools缓存复用。
+
+挑选引物对时按代价从低到高分阶段评分（级联）：先做只需要碱基计数和查表的窗口统计
+（长度、3'端、3'端稳定性、GC含量、Tm），再查连续重复碱基，最后做基于k-mer的发夹和二聚体检查。
+每个阶段只会扣分，因此未完成的候选引物的当前分数就是其最终分数的上界；
+一旦某个引物对的上界不能超过当前最佳分数，就不再继续评估。
+
+PrimerParams.thermo_alignment为True时，发夹和二聚体改用thermo模块的最近邻ΔG判断
+（阈值为max_hairpin_dg、max_dimer_dg和3'端锚定结构的max_end_dg），罚分权重不变。
+
+连续重复碱基和k-mer结构检查可以改用kernels模块中JIT编译的核心函数，分数与纯Python实现相同。
+"""
+
+import dataclasses
+import heapq
+from dataclasses import dataclass
+
+from nn_params import end_stability
+
+# 反向互补使用的碱基对应表（包括IUPAC简并碱基）
+_COMPLEMENT = str.maketrans('ACGTURYKMBVDHSWNacgturykmbvdhswn', 'TGCAAYRMKVBHDSWNtgcaayrmkvbhdswn')
+
+# 罚分权重名与ScoreWeights字段的对应关系
+_WEIGHT_KEYS = {
+    'LENGTH': 'length',
+    'NO_GC_CLAMP': 'no_gc_clamp',
+    'END_T': 'end_t',
+    'END_GC_RICH': 'end_gc_rich',
+    'MAX_END_GC': 'max_end_gc',
+    'END_STABILITY': 'end_stability',
+    'POLY_X': 'poly_x',
+    'HAIRPIN': 'hairpin',
+    'SELF_DIMER': 'self_dimer',
+    'GC_OUT_OF_RANGE': 'gc_base',
+    'GC_PER_PERCENT': 'gc_slope',
+    'TM_OUT_OF_RANGE': 'tm_base',
+    'TM_PER_DEGREE': 'tm_slope',
+    'PAIR_BASE': 'pair_base',
+    'PAIR_TM_DIFF_GOOD': 'tm_diff_good',
+    'PAIR_TM_DIFF_GOOD_BONUS': 'tm_diff_good_bonus',
+    'PAIR_TM_DIFF_OK': 'tm_diff_ok',
+    'PAIR_TM_DIFF_OK_BONUS': 'tm_diff_ok_bonus',
+    'PAIR_TM_DIFF_BAD': 'tm_diff_bad',
+    'PAIR_DIMER': 'pair_dimer'
+}
+
+# 级联评分的阶段，按代价从低到高排列
+STAGE_WINDOW = 1       # 窗口统计：长度、3'端、3'端稳定性、GC含量、Tm
+STAGE_POLY_X = 2       # 连续重复碱基
+STAGE_STRUCTURE = 3    # 发夹和自二聚体（k-mer比较或ΔG），完成后分数是精确值
+
+STAGE_NAMES = {
+    STAGE_WINDOW: "window",
+    STAGE_POLY_X: "poly_x",
+    STAGE_STRUCTURE: "structure"
+}
+
+
+def tm_from_counts(at_count, gc_count, length):
+    """根据碱基计数计算Tm值，公式与DNATools.calculate_tm一致"""
+    # 对于短引物（≤14bp），使用Wallace规则
+    if length <= 14:
+        return 2 * at_count + 4 * gc_count
+    # 对于长引物，使用修正的公式
+    return 64.9 + 41 * (gc_count - 16.4) / length
+
+
+@dataclass(frozen=True)
+class ScoreWeights:
+    """引物评分的罚分权重
+
+    单条引物从100分开始扣分；引物对的分数为pair_base加上Tm差异奖惩、
+    二聚体罚分和两条引物的平均分。默认值与原有的评分规则相同。
+    """
+    length: float = 10                   # 结合区长度超出范围
+    no_gc_clamp: float = 10              # 3'端不是G或C
+    end_t: float = 15                    # 3'端为T（额外罚分）
+    end_gc_rich: float = 15              # 3'端最后5个碱基中GC过多（仅在max_end_stability为None时使用）
+    max_end_gc: int = 3                  # 3'端最后5个碱基中允许的GC数
+    end_stability: float = 15            # 3'端稳定性超过max_end_stability
+    poly_x: float = 20                   # 连续重复碱基超过max_poly_x
+    hairpin: float = 15                  # 可能形成发夹结构
+    self_dimer: float = 15               # 可能形成自二聚体
+    gc_base: float = 10                  # GC含量超出范围的基础罚分
+    gc_slope: float = 2                  # GC含量每超出1%的罚分
+    tm_base: float = 10                  # Tm超出范围的基础罚分
+    tm_slope: float = 2                  # Tm每超出1°C的罚分
+    pair_base: float = 100               # 引物对基础分
+    tm_diff_good: float = 2.0            # 结合区Tm差异不超过该值时为"非常好"
+    tm_diff_good_bonus: float = 50
+    tm_diff_ok: float = 4.0              # 结合区Tm差异不超过该值时为"可接受"
+    tm_diff_ok_bonus: float = 30
+    tm_diff_bad: float = 50              # 结合区Tm差异过大的罚分
+    pair_dimer: float = 100              # 正反向引物可能形成二聚体
+
+    def __post_init__(self):
+        # 级联评分依赖"每个阶段只扣分"，权重不能为负
+        negative = [field.name for field in dataclasses.fields(self) if getattr(self, field.name) < 0]
+        if negative:
+            raise ValueError(f"评分权重不能为负: {', '.join(negative)}")
+
+    @classmethod
+    def from_dict(cls, weights):
+        """从权重名（如'HAIRPIN'）或字段名的字典创建，未提供的权重使用默认值"""
+        fields = {field.name for field in dataclasses.fields(cls)}
+        values = {}
+        for key, value in weights.items():
+            name = _WEIGHT_KEYS.get(key, key)
+            if name not in fields:
+                raise ValueError(f"未知的评分权重: {key}")
+            values[name] = value
+        return cls(**values)
+
+    def as_dict(self):
+        """返回权重名的字典副本"""
+        return {key: getattr(self, name) for key, name in _WEIGHT_KEYS.items()}
+
+
+class Candidate:
+    """级联评分中的候选引物
+
+    stage记录已经完成的评分阶段；bound是当前分数（最终分数的上界），
+    stage为STAGE_STRUCTURE时bound即为精确分数。
+    """
+
+    __slots__ = ('primer', 'binding_site', 'binding_tm', 'seq', 'head', 'poly_x', 'gc_term', 'tm_term',
+                 'stage', 'bound', 'kmers', 'rc_kmers')
+
+    @property
+    def score(self):
+        """精确分数，尚未完成所有阶段时为None"""
+        return self.bound if self.stage == STAGE_STRUCTURE else None
+
+    def as_dict(self):
+        """转换为_binding_candidates使用的候选引物字典"""
+        return {
+            "primer": self.primer,
+            "binding_site": self.binding_site,
+            "binding_tm": self.binding_tm,
+            "score": self.score
+        }
+
+
+class PrimerScorer:
+    """由引物设计参数和罚分权重编译得到的评分器
+
+    属性:
+        params: 编译时使用的PrimerParams
+        weights: 编译时使用的ScoreWeights
+        binding_lengths: 候选结合区长度范围（min_size到max_size）
+        backend: 连续重复碱基和结构检查使用的实现（"python"或kernels.ArrayKernels的name）
+    """
+
+    def __init__(self, params, weights=None, kernels=None):
+        self.params = params
+        self.weights = weights if weights is not None else ScoreWeights()
+        self.binding_lengths = range(params.min_size, params.max_size + 1)
+        self.backend = kernels.name if kernels is not None else "python"
+        self._window, self._poly_x, self._structure = _compile_stages(params, self.weights, kernels)
+        self.evaluate = _compile_evaluate(self._window, self._poly_x, self._structure)
+        self._candidate_dimer, self.primers_dimer = _compile_dimer_checks(params, kernels)
+        self.pair_score = _compile_pair_score(self.weights, self.primers_dimer)
+
+    def evaluate_many(self, primers, binding_sites):
+        """批量评分，返回[(分数, 结合区Tm)]
+
+        参数:
+            primers: 完整引物序列列表
+            binding_sites: 对应的结合区序列列表
+        """
+        evaluate = self.evaluate
+        return [evaluate(primer, binding_site) for primer, binding_site in zip(primers, binding_sites)]
+
+    def score(self, primer_seq, binding_site=None):
+        """返回单条引物的质量分数"""
+        return self.evaluate(primer_seq, primer_seq if binding_site is None else binding_site)[0]
+
+    def penalties(self, primer_seq):
+        """返回引物的连续重复碱基、发夹和自二聚体罚分（按大写序列计算）"""
+        seq = primer_seq.upper()
+        hairpin, dimer, _, _ = self._structure(seq)
+        return {"poly_x": self._poly_x(seq), "hairpin": hairpin, "self_dimer": dimer}
+
+    def candidates(self, primers, binding_sites):
+        """批量完成第一阶段（窗口统计），返回Candidate列表"""
+        window = self._window
+        result = []
+        for primer, binding_site in zip(primers, binding_sites):
+            candidate = Candidate()
+            candidate.primer = primer
+            candidate.binding_site = binding_site
+            seq, head, gc_term, tm_term, tm = window(primer, binding_site)
+            candidate.seq = seq
+            candidate.head = head
+            candidate.poly_x = 0
+            candidate.gc_term = gc_term
+            candidate.tm_term = tm_term
+            candidate.binding_tm = tm
+            candidate.stage = STAGE_WINDOW
+            candidate.bound = max(0, head - gc_term - tm_term)
+            result.append(candidate)
+        return result
+
+    def extend(self, candidates, tail):
+        """在候选引物的5'端加上tail，返回只完成窗口统计的新Candidate列表
+
+        窗口统计只依赖结合区和引物3'端的最后5个碱基，结合区不短于5个碱基时直接复用，
+        只有更短的结合区重新计算。用于同一组结合区与不同长度的同源臂组合。
+        """
+        window = self._window
+        result = []
+        for base in candidates:
+            candidate = Candidate()
+            candidate.primer = tail + base.primer
+            candidate.binding_site = base.binding_site
+            if len(base.binding_site) >= 5:
+                candidate.seq = tail.upper() + base.seq
+                candidate.head = base.head
+                candidate.gc_term = base.gc_term
+                candidate.tm_term = base.tm_term
+                candidate.binding_tm = base.binding_tm
+            else:
+                (candidate.seq, candidate.head, candidate.gc_term, candidate.tm_term,
+                 candidate.binding_tm) = window(candidate.primer, base.binding_site)
+            candidate.poly_x = 0
+            candidate.stage = STAGE_WINDOW
+            candidate.bound = max(0, candidate.head - candidate.gc_term - candidate.tm_term)
+            result.append(candidate)
+        return result
+
+    def refine(self, candidate):
+        """把候选引物推进到下一个评分阶段，返回新的分数上界"""
+        if candidate.stage == STAGE_WINDOW:
+            candidate.poly_x = self._poly_x(candidate.seq)
+            candidate.stage = STAGE_POLY_X
+            candidate.bound = max(0, candidate.head - candidate.poly_x - candidate.gc_term - candidate.tm_term)
+        elif candidate.stage == STAGE_POLY_X:
+            hairpin, dimer, candidate.kmers, candidate.rc_kmers = self._structure(candidate.seq)
+            candidate.stage = STAGE_STRUCTURE
+            # 扣分顺序与evaluate相同，保证分数完全一致
+            candidate.bound = max(
+                0, candidate.head - candidate.poly_x - hairpin - dimer - candidate.gc_term - candidate.tm_term
+            )
+        return candidate.bound
+
+    def top_pairs(self, fw_candidates, rv_candidates, top_k=1, best_score=-1):
+        """按级联评分找出分数最高的top_k个引物对
+
+        排名第一的引物对与按正向引物、反向引物的顺序逐对计算pair_score，
+        并保留第一个严格更高分数的引物对完全相同（分数相同时顺序靠前的排在前面）。
+        引物对按窗口统计得到的分数上界从高到低处理，保留的引物对放在大小为top_k的堆中；
+        上界不能胜过堆中最差的引物对时就不再继续评估，候选引物也不会完成全部评分阶段。
+
+        参数:
+            fw_candidates: 正向候选引物（Candidate列表）
+            rv_candidates: 反向候选引物（Candidate列表）
+            top_k: 保留的引物对数量
+            best_score: 引物对分数必须严格超过该值才会被保留
+
+        返回:
+            ([(正向Candidate, 反向Candidate, 引物对分数, 结合区Tm差异)]按分数从高到低排列, 统计信息)
+        """
+        weights = self.weights
+        pair_base = weights.pair_base
+        good = weights.tm_diff_good
+        good_bonus = weights.tm_diff_good_bonus
+        ok = weights.tm_diff_ok
+        ok_bonus = weights.tm_diff_ok_bonus
+        bad_penalty = weights.tm_diff_bad
+        dimer_penalty = weights.pair_dimer
+        refine = self.refine
+        candidate_dimer = self._candidate_dimer
+
+        # 每个引物对的基础分（Tm差异奖惩）只依赖窗口统计中的Tm值
+        pairs = []
+        index = 0
+        for fw in fw_candidates:
+            for rv in rv_candidates:
+                tm_diff = abs(fw.binding_tm - rv.binding_tm)
+                base = pair_base
+                if tm_diff <= good:
+                    base += good_bonus
+                elif tm_diff <= ok:
+                    base += ok_bonus
+                else:
+                    base -= bad_penalty
+                pairs.append((base + (fw.bound + rv.bound) / 2, index, base, tm_diff, fw, rv))
+                index += 1
+        pairs.sort(key=lambda pair: (-pair[0], pair[1]))
+
+        # 堆中保存(分数, -序号, ...)，堆顶是保留的引物对中最差的一个；
+        # 堆未满时引物对的分数必须严格超过best_score
+        heap = []
+        threshold = (best_score, 1)
+        scored = 0
+        for bound, index, base, tm_diff, fw, rv in pairs:
+            # 按上界排序，之后的引物对都无法进入前top_k
+            if (bound, -index) <= threshold:
+                break
+
+            # 逐步细化两条引物的分数，直到能确定胜负
+            while True:
+                bound = base + (fw.bound + rv.bound) / 2
+                if (bound, -index) <= threshold:
+                    break
+                if fw.stage != STAGE_STRUCTURE:
+                    refine(fw)
+                elif rv.stage != STAGE_STRUCTURE:
+                    refine(rv)
+                else:
+                    break
+            if fw.stage != STAGE_STRUCTURE or rv.stage != STAGE_STRUCTURE:
+                continue
+
+            # 两条引物都已精确评分，检查引物二聚体
+            scored += 1
+            score = base
+            if candidate_dimer(fw, rv):
+                score -= dimer_penalty
+            score += (fw.score + rv.score) / 2
+            if (score, -index) > threshold:
+                entry = (score, -index, fw, rv, tm_diff)
+                if len(heap) < top_k:
+                    heapq.heappush(heap, entry)
+                else:
+                    heapq.heapreplace(heap, entry)
+                if len(heap) == top_k:
+                    threshold = heap[0][:2]
+
+        ranked = [(fw, rv, score, tm_diff) for score, _, fw, rv, tm_diff in sorted(heap, reverse=True)]
+
+        # 统计每个阶段淘汰的候选引物数量
+        kept = {id(candidate) for fw, rv, _, _ in ranked for candidate in (fw, rv)}
+        rejected = {name: 0 for name in STAGE_NAMES.values()}
+        for candidate in fw_candidates + rv_candidates:
+            if id(candidate) not in kept:
+                rejected[STAGE_NAMES[candidate.stage]] += 1
+        stats = {
+            "candidates": len(fw_candidates) + len(rv_candidates),
+            "rejected": rejected,
+            "pairs": len(pairs),
+            "pairs_pruned": len(pairs) - scored,
+            "dimer_checks": scored
+        }
+        return ranked, stats
+
+
+def reverse_complement(seq):
+    """返回序列的反向互补序列（不经过Biopython，保留大小写）"""
+    return seq.translate(_COMPLEMENT)[::-1]
+
+
+def _kmers(seq, k):
+    """返回序列中所有长度为k的子串集合"""
+    return {seq[i:i+k] for i in range(len(seq) - k + 1)}
+
+
+def _compile_stages(params, weights, kernels=None):
+    """生成三个评分阶段的函数
+
+    参数:
+        params: PrimerParams
+        weights: ScoreWeights
+        kernels: kernels.ArrayKernels，为None时使用纯Python实现
+
+    返回:
+        window(primer, binding_site) -> (大写引物, 3'端相关扣分后的分数, GC罚分, Tm罚分, 结合区Tm)
+        poly_x(seq) -> 连续重复碱基罚分
+        structure(seq) -> (发夹罚分, 自二聚体罚分, 引物的4-mer集合, 反向互补序列的4-mer集合)
+                          使用kernels时为两个编码数组，按ΔG判断时为None
+    """
+    min_size = params.min_size
+    max_size = params.max_size
+    min_tm = params.min_tm
+    max_tm = params.max_tm
+    min_gc = params.min_gc
+    max_gc = params.max_gc
+    poly_runs = tuple(base * (params.max_poly_x + 1) for base in 'ATGC')
+    length_penalty = weights.length
+    no_clamp_penalty = weights.no_gc_clamp
+    end_t_penalty = weights.end_t
+    end_gc_penalty = weights.end_gc_rich
+    max_end_gc = weights.max_end_gc
+    max_end_stability = params.max_end_stability
+    stability_penalty = weights.end_stability
+    stability_of = end_stability
+    poly_penalty = weights.poly_x
+    hairpin_penalty = weights.hairpin
+    dimer_penalty = weights.self_dimer
+    gc_base = weights.gc_base
+    gc_slope = weights.gc_slope
+    tm_base = weights.tm_base
+    tm_slope = weights.tm_slope
+    complement = _COMPLEMENT
+    kmers = _kmers
+    tm_of = tm_from_counts
+
+    def window(primer, binding_site):
+        score = 100
+        seq = primer.upper()
+
+        # 检查结合区长度
+        length = len(binding_site)
+        if length < min_size or length > max_size:
+            score -= length_penalty
+
+        # 检查3'端是否为G或C（GC夹），3'端为T时额外扣分
+        last = seq[-1]
+        if last != 'G' and last != 'C':
+            score -= no_clamp_penalty
+        if last == 'T':
+            score -= end_t_penalty
+
+        # 3'端稳定性：按2-bit编码的最后5个碱基查表；未设置阈值时退回按3'端GC数近似
+        if max_end_stability is None:
+            last_5 = seq[-5:]
+            if last_5.count('G') + last_5.count('C') > max_end_gc:
+                score -= end_gc_penalty
+        elif stability_of(seq) > max_end_stability:
+            score -= stability_penalty
+
+        # 结合区的GC含量和Tm值
+        site = binding_site.upper()
+        at_count = site.count('A') + site.count('T')
+        gc_count = site.count('G') + site.count('C')
+        gc_content = (gc_count / length) * 100
+        gc_term = 0
+        if gc_content < min_gc:
+            gc_term = gc_base + (min_gc - gc_content) * gc_slope
+        elif gc_content > max_gc:
+            gc_term = gc_base + (gc_content - max_gc) * gc_slope
+
+        tm = tm_of(at_count, gc_count, length)
+        tm_term = 0
+        if tm < min_tm:
+            tm_term = tm_base + (min_tm - tm) * tm_slope
+        elif tm > max_tm:
+            tm_term = tm_base + (tm - max_tm) * tm_slope
+
+        return seq, score, gc_term, tm_term, tm
+
+    if kernels is not None:
+        encode = kernels.encode
+        encoded_rc = kernels.reverse_complement
+        has_poly_x = kernels.has_poly_x
+        has_hairpin = kernels.has_hairpin
+        shares_kmer = kernels.shares_kmer
+        max_poly_x = params.max_poly_x
+
+        def poly_x(seq):
+            return poly_penalty if has_poly_x(encode(seq), max_poly_x) else 0
+    else:
+        def poly_x(seq):
+            for run in poly_runs:
+                if run in seq:
+                    return poly_penalty
+            return 0
+
+    if params.thermo_alignment:
+        from thermo import get_engine
+
+        hairpin_dg = get_engine().hairpin
+        dimer_dg = get_engine().dimer
+        max_hairpin_dg = params.max_hairpin_dg
+        max_dimer_dg = params.max_dimer_dg
+        max_end_dg = params.max_end_dg
+
+        def structure(seq):
+            hairpin = hairpin_dg(seq)
+            self_dimer = dimer_dg(seq, seq)
+            return (
+                hairpin_penalty if hairpin.dg < max_hairpin_dg or hairpin.end_dg < max_end_dg else 0,
+                dimer_penalty if self_dimer.dg < max_dimer_dg or self_dimer.end_dg < max_end_dg else 0,
+                None,
+                None
+            )
+    elif kernels is not None:
+        def structure(seq):
+            codes = encode(seq)
+            rc_codes = encoded_rc(codes)
+            hairpin = hairpin_penalty if has_hairpin(codes) else 0
+            dimer = dimer_penalty if shares_kmer(codes, rc_codes) else 0
+            return hairpin, dimer, codes, rc_codes
+    else:
+        def structure(seq):
+            # 发夹结构：3个碱基的茎在下游出现反向互补序列
+            hairpin = 0
+            for i in range(len(seq) - 6):
+                if seq[i:i+3].translate(complement)[::-1] in seq[i+3:]:
+                    hairpin = hairpin_penalty
+                    break
+
+            # 自二聚体：序列与其反向互补序列共有长度为4的子串
+            seq_kmers = kmers(seq, 4)
+            rc_kmers = kmers(seq.translate(complement)[::-1], 4)
+            dimer = 0 if seq_kmers.isdisjoint(rc_kmers) else dimer_penalty
+            return hairpin, dimer, seq_kmers, rc_kmers
+
+    return window, poly_x, structure
+
+
+def _compile_dimer_checks(params, kernels=None):
+    """生成引物二聚体检查函数，kernels的含义与_compile_stages相同
+
+    返回:
+        candidate_dimer(fw, rv) -> 两个已完成结构评分的Candidate是否可能形成二聚体
+        primers_dimer(fw_seq, rv_seq) -> 两条大写引物序列是否可能形成二聚体
+    """
+    if params.thermo_alignment:
+        from thermo import get_engine
+
+        dimer_dg = get_engine().dimer
+        max_dimer_dg = params.max_dimer_dg
+        max_end_dg = params.max_end_dg
+
+        def primers_dimer(fw_seq, rv_seq):
+            dimer = dimer_dg(fw_seq, rv_seq)
+            return dimer.dg < max_dimer_dg or dimer.end_dg < max_end_dg
+
+        def candidate_dimer(fw, rv):
+            return primers_dimer(fw.seq, rv.seq)
+
+        return candidate_dimer, primers_dimer
+
+    if kernels is not None:
+        encode = kernels.encode
+        encoded_rc = kernels.reverse_complement
+        shares_kmer = kernels.shares_kmer
+
+        def primers_dimer(fw_seq, rv_seq):
+            return shares_kmer(encode(fw_seq), encoded_rc(encode(rv_seq)))
+
+        def candidate_dimer(fw, rv):
+            return shares_kmer(fw.kmers, rv.rc_kmers)
+
+        return candidate_dimer, primers_dimer
+
+    complement = _COMPLEMENT
+    kmers = _kmers
+
+    # 正向引物与反向引物的反向互补序列共有长度为4的子串
+    def primers_dimer(fw_seq, rv_seq):
+        return not kmers(fw_seq, 4).isdisjoint(kmers(rv_seq.translate(complement)[::-1], 4))
+
+    def candidate_dimer(fw, rv):
+        return not fw.kmers.isdisjoint(rv.rc_kmers)
+
+    return candidate_dimer, primers_dimer
+
+
+def _compile_evaluate(window, poly_x, structure):
+    """生成单条引物评分函数: evaluate(primer, binding_site) -> (分数, 结合区Tm)"""
+
+    def evaluate(primer, binding_site):
+        seq, head, gc_term, tm_term, tm = window(primer, binding_site)
+        hairpin, dimer, _, _ = structure(seq)
+        # 扣分顺序与原评分规则相同；确保分数不为负
+        return max(0, head - poly_x(seq) - hairpin - dimer - gc_term - tm_term), tm
+
+    return evaluate
+
+
+def _compile_pair_score(weights, primers_dimer):
+    """生成引物对评分函数: pair_score(fw, rv) -> (分数, 结合区Tm差异)
+
+    fw和rv为候选引物字典，需要包含primer、binding_tm和score；
+    primers_dimer为_compile_dimer_checks生成的序列二聚体检查函数。
+    """
+    pair_base = weights.pair_base
+    good = weights.tm_diff_good
+    good_bonus = weights.tm_diff_good_bonus
+    ok = weights.tm_diff_ok
+    ok_bonus = weights.tm_diff_ok_bonus
+    bad_penalty = weights.tm_diff_bad
+    dimer_penalty = weights.pair_dimer
+
+    def pair_score(fw, rv):
+        tm_diff = abs(fw["binding_tm"] - rv["binding_tm"])
+
+        # 优先考虑Tm差异小的引物对，其次考虑引物质量
+        score = pair_base
+        if tm_diff <= good:
+            score += good_bonus
+        elif tm_diff <= ok:
+            score += ok_bonus
+        else:
+            score -= bad_penalty
+
+        # 引物二聚体
+        if primers_dimer(fw["primer"].upper(), rv["primer"].upper()):
+            score -= dimer_penalty
+
+        score += (fw["score"] + rv["score"]) / 2
+        return score, tm_diff
+
+    return pair_score
@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""共享内存序列存储
+
+进程池中的每个工作进程都需要同一个载体的序列和k-mer索引。通过任务参数传递时，
+每个进程都要反序列化出一份完整副本（200 kb的BAC连同k-mer索引在内存中约占几十MB）。
+SharedStore把序列和索引一次性写入一块multiprocessing.shared_memory共享内存，
+工作进程只凭名称附加，直接在共享内存上读取，不复制数据。
+
+布局:
+    头部       魔数（8字节）+ 目录长度（8字节，小端）
+    目录       JSON，记录每条序列和每个载体预计算信息在数据区中的偏移
+    数据区     序列为ASCII字节；k-mer索引为按k-mer排序的起始位置数组（uint32），
+               同一k-mer的位置按升序排列，查找时二分定位
+每个数据块按8字节对齐。
+"""
+
+import json
+import struct
+from array import array
+from multiprocessing import shared_memory
+
+from vector_profile import VectorProfile
+
+_MAGIC = b"LGSTORE1"
+_HEADER = struct.Struct("<8sQ")
+_ALIGN = 8
+
+
+def _aligned(size):
+    """向上对齐到_ALIGN字节"""
+    return (size + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _attach_memory(name):
+    """按名称附加共享内存
+
+    Python 3.13起可以不向resource_tracker登记；更早的版本中进程池工作进程与创建者
+    共用同一个resource_tracker，登记不会导致共享内存在工作进程退出时被删除。
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedSequence:
+    """共享内存中一条序列的只读视图，切片时才解码对应的片段"""
+
+    __slots__ = ('_view',)
+
+    def __init__(self, view):
+        self._view = view
+
+    def __len__(self):
+        return len(self._view)
+
+    def __str__(self):
+        return self._view.tobytes().decode("ascii")
+
+    def __repr__(self):
+        return f"SharedSequence({len(self._view)})"
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self._view))
+            if step != 1:
+                return str(self)[index]
+            return self._view[start:max(start, stop)].tobytes().decode("ascii")
+        return chr(self._view[index])
+
+    def upper(self):
+        return str(self).upper()
+
+
+class SharedRecord:
+    """使用SharedSequence保存序列的序列记录，接口与SeqRecord的id/seq/description兼容"""
+
+    __slots__ = ('id', 'seq', 'description')
+
+    def __init__(self, seq, id="", description=""):
+        self.seq = seq
+        self.id = id
+        self.description = description
+
+    def __len__(self):
+        return len(self.seq)
+
+
+class SharedVectorProfile(VectorProfile):
+    """直接读取共享内存的载体预计算信息
+
+    接口与VectorProfile相同，k-mer位置数组的布局也相同；window、find和kmer_positions
+    只读取需要的字节。sequence和kmer_index会生成完整副本，只在需要整条序列时使用。
+    """
+
+    def __init__(self, name, sequence_view, seq_hash, sites, linearized, kmer_size, positions_view):
+        self.id = name
+        self.seq_hash = seq_hash
+        self.sites = sites
+        self.linearized = linearized
+        self.kmer_size = kmer_size
+        self.positions = positions_view
+        self._sequence = sequence_view
+
+    def __len__(self):
+        return len(self._sequence)
+
+    @property
+    def sequence(self):
+        """完整的载体序列（复制）"""
+        return self._sequence.tobytes().decode("ascii")
+
+    def _bytes_at(self, start, length):
+        """环状序列上从start开始的length个字节"""
+        total = len(self._sequence)
+        start %= total
+        end = start + length
+        if end <= total:
+            return self._sequence[start:end].tobytes()
+        return self._sequence[start:].tobytes() + self._sequence[:end - total].tobytes()
+
+    def window(self, start, length):
+        """截取环状载体上从start开始的length个碱基，start可以为负或超过载体长度"""
+        total = len(self._sequence)
+        if total == 0:
+            return ""
+        return self._bytes_at(start, min(length, total)).decode("ascii")
+
+    def _key(self, query):
+        return query.upper().encode("ascii", "replace")
+
+    def _key_at(self, start, length):
+        if not self._sequence:
+            return b""
+        return self._bytes_at(start, length)
+
+
+class SharedStore:
+    """保存序列和载体预计算信息的共享内存块
+
+    由一个进程用create创建并负责unlink，其他进程用attach按名称附加。
+    """
+
+    def __init__(self, memory, owner):
+        self._memory = memory
+        self._owner = owner
+        self._views = []
+
+        buf = memory.buf
+        magic, directory_size = _HEADER.unpack_from(buf, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"共享内存{memory.name}不是序列存储")
+        directory = json.loads(bytes(buf[_HEADER.size:_HEADER.size + directory_size]).decode("utf-8"))
+        self._data_start = _aligned(_HEADER.size + directory_size)
+
+        self._sequences = {
+            name: self._view(offset, length)
+            for name, (offset, length) in directory["sequences"].items()
+        }
+        self._profiles = []
+        for entry in directory["profiles"]:
+            offset, length = entry["sequence"]
+            positions_offset, count = entry["kmer_positions"]
+            self._profiles.append(SharedVectorProfile(
+                entry["id"], self._view(offset, length), entry["seq_hash"], entry["sites"],
+                entry["linearized"], entry["kmer_size"], self._view(positions_offset, 4 * count, "I")
+            ))
+
+    def _view(self, offset, length, fmt=None):
+        """返回数据区中一段的memoryview，关闭时统一释放"""
+        start = self._data_start + offset
+        view = self._memory.buf[start:start + length]
+        self._views.append(view)
+        if fmt:
+            view = view.cast(fmt)
+            self._views.append(view)
+        return view
+
+    @property
+    def name(self):
+        """共享内存名称，工作进程用它附加"""
+        return self._memory.name
+
+    @property
+    def size(self):
+        """共享内存的字节数"""
+        return self._memory.size
+
+    @classmethod
+    def create(cls, sequences=None, profiles=(), name=None):
+        """把序列和载体预计算信息写入新的共享内存块
+
+        参数:
+            sequences: 可选的{名称: 序列}字典，序列为str或支持str()的对象
+            profiles: VectorProfile列表
+            name: 共享内存名称，默认由系统生成
+
+        返回:
+            SharedStore（创建者，负责unlink）
+        """
+        blocks = []
+        data_size = 0
+
+        def add(data):
+            nonlocal data_size
+            offset = data_size
+            blocks.append((offset, data))
+            data_size = _aligned(data_size + len(data))
+            return offset
+
+        directory = {"sequences": {}, "profiles": []}
+        for seq_name, seq in (sequences or {}).items():
+            data = str(seq).encode("ascii", "replace")
+            directory["sequences"][seq_name] = [add(data), len(data)]
+
+        for profile in profiles:
+            data = profile.sequence.encode("ascii", "replace")
+            positions = array("I", profile.positions)
+            directory["profiles"].append({
+                "id": profile.id,
+                "seq_hash": profile.seq_hash,
+                "sites": profile.sites,
+                "linearized": profile.linearized,
+                "kmer_size": profile.kmer_size,
+                "sequence": [add(data), len(data)],
+                "kmer_positions": [add(positions.tobytes()), len(positions)]
+            })
+
+        directory_bytes = json.dumps(directory, separators=(",", ":")).encode("utf-8")
+        data_start = _aligned(_HEADER.size + len(directory_bytes))
+        memory = shared_memory.SharedMemory(name=name, create=True, size=max(1, data_start + data_size))
+        try:
+            buf = memory.buf
+            _HEADER.pack_into(buf, 0, _MAGIC, len(directory_bytes))
+            buf[_HEADER.size:_HEADER.size + len(directory_bytes)] = directory_bytes
+            for offset, data in blocks:
+                buf[data_start + offset:data_start + offset + len(data)] = data
+            del buf
+            return cls(memory, owner=True)
+        except BaseException:
+            memory.close()
+            memory.unlink()
+            raise
+
+    @classmethod
+    def attach(cls, name):
+        """按名称附加已有的共享内存块（不复制数据）"""
+        return cls(_attach_memory(name), owner=False)
+
+    def sequence(self, name):
+        """返回名称对应的SharedSequence"""
+        return SharedSequence(self._sequences[name])
+
+    def record(self, name):
+        """返回名称对应的序列记录"""
+        return SharedRecord(self.sequence(name), name)
+
+    def sequence_names(self):
+        """返回保存的序列名称"""
+        return list(self._sequences)
+
+    def profiles(self):
+        """返回保存的载体预计算信息（SharedVectorProfile列表）"""
+        return list(self._profiles)
+
+    def close(self):
+        """释放本进程的视图并断开共享内存，创建者同时删除共享内存
+
+        之后不能再使用从本对象取得的序列和预计算信息。
+        """
+        if self._memory is None:
+            return
+        self._sequences = {}
+        self._profiles = []
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
+        self._memory = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""载体插入位点扫描
+
+把插入片段放在环状载体的位置p（p-1与p之间）时，载体用一对反向PCR引物线性化：
+正向引物为p下游的opt_size个碱基，反向引物为p上游opt_size个碱基的反向互补；
+插入片段引物携带的同源臂为p两侧各homology_length个碱基。
+
+对每个位置计算:
+    - 两条载体引物的质量分数（与PrimerScorer相同的评分规则）
+    - 两侧同源臂的GC含量（和可选的Tm范围）罚分
+    - 引物3'端k-mer在载体两条链上出现的次数（只出现一次的引物才能特异性扩增）
+
+所有位置的碱基计数、3'端检查和k-mer计数都用NumPy在整条序列上按滚动窗口一次算出，
+得到每个位置的分数上界；再按上界从高到低只对可能进入前top_n的位置做完整评分
+（连续重复碱基、发夹、自二聚体），与scoring模块的级联评分思路相同。
+"""
+
+import heapq
+
+import numpy as np
+
+from nn_params import END_STABILITY_LENGTH, END_STABILITY_TABLE
+from scoring import reverse_complement
+
+# 碱基编码：A=0 C=1 G=2 T=3，其他为4
+_CODES = bytes(
+    {ord('A'): 0, ord('C'): 1, ord('G'): 2, ord('T'): 3}.get(i, 4) for i in range(256)
+)
+
+_END_STABILITY = np.array(END_STABILITY_TABLE)
+
+
+def encode(sequence):
+    """把大写序列编码为uint8数组"""
+    return np.frombuffer(sequence.encode("ascii", "replace").translate(_CODES), dtype=np.uint8)
+
+
+def _rolling_sum(mask, width, count):
+    """环状序列上从每个位置开始、长度为width的窗口中mask为真的个数（共count个位置）"""
+    extended = np.concatenate([mask, mask[:width]]) if width else mask
+    totals = np.concatenate([[0], np.cumsum(extended, dtype=np.int64)])
+    return totals[width:width + count] - totals[:count]
+
+
+def _kmer_codes(codes, k):
+    """环状序列上每个位置开始的k-mer的2-bit编码，含有ACGT以外碱基的k-mer为-1"""
+    length = len(codes)
+    extended = np.concatenate([codes, codes[:k]]).astype(np.int64)
+    result = np.zeros(length, dtype=np.int64)
+    for offset in range(k):
+        result = result * 4 + (extended[offset:offset + length] & 3)
+    result[_rolling_sum(codes == 4, k, length) > 0] = -1
+    return result
+
+
+def _gc_penalty(gc_content, params, weights):
+    """GC含量罚分，公式与评分器相同"""
+    return np.where(
+        gc_content < params.min_gc, weights.gc_base + (params.min_gc - gc_content) * weights.gc_slope,
+        np.where(gc_content > params.max_gc, weights.gc_base + (gc_content - params.max_gc) * weights.gc_slope, 0.0)
+    )
+
+
+def _tm_penalty(tm, min_tm, max_tm, weights):
+    """Tm罚分，公式与评分器相同"""
+    return np.where(
+        tm < min_tm, weights.tm_base + (min_tm - tm) * weights.tm_slope,
+        np.where(tm > max_tm, weights.tm_base + (tm - max_tm) * weights.tm_slope, 0.0)
+    )
+
+
+def _tm(at_count, gc_count, length):
+    """按碱基计数批量计算Tm，公式与tm_from_counts相同"""
+    if length <= 14:
+        return 2 * at_count + 4 * gc_count
+    return 64.9 + 41 * (gc_count - 16.4) / length
+
+
+def primer_bounds(codes, length, params, weights):
+    """从每个位置开始、长度为length的引物的窗口统计分数（完整分数的上界）和Tm
+
+    引物序列即结合区（载体引物不带尾巴）。
+
+    返回:
+        (分数上界数组, Tm数组)
+    """
+    count = len(codes)
+    is_gc = (codes == 1) | (codes == 2)
+    at_count = _rolling_sum((codes == 0) | (codes == 3), length, count)
+    gc_count = _rolling_sum(is_gc, length, count)
+
+    score = np.full(count, 100.0)
+    if length < params.min_size or length > params.max_size:
+        score -= weights.length
+
+    # 3'端碱基
+    last = codes[(np.arange(count) + length - 1) % count]
+    score -= np.where((last != 1) & (last != 2), weights.no_gc_clamp, 0)
+    score -= np.where(last == 3, weights.end_t, 0)
+
+    # 3'端最后5个碱基的GC数和稳定性（从引物起点后length-5处开始的窗口）
+    tail = min(5, length)
+    tail_starts = (np.arange(count) + length - tail) % count
+    end_gc = _rolling_sum(is_gc, tail, count)[tail_starts]
+    if params.max_end_stability is None:
+        score -= np.where(end_gc > weights.max_end_gc, weights.end_gc_rich, 0)
+    elif length >= END_STABILITY_LENGTH:
+        pentamers = _kmer_codes(codes, END_STABILITY_LENGTH)[tail_starts]
+        stability = np.where(pentamers >= 0, _END_STABILITY[np.maximum(pentamers, 0)], 0.0)
+        score -= np.where(stability > params.max_end_stability, weights.end_stability, 0)
+
+    tm = _tm(at_count, gc_count, length)
+    score = score - _gc_penalty(gc_count / length * 100, params, weights) - _tm_penalty(
+        tm, params.min_tm, params.max_tm, weights
+    )
+    return np.maximum(score, 0), tm
+
+
+def kmer_matches(codes, rc_codes, k):
+    """每个k-mer在两条链上的结合位点数
+
+    返回:
+        (正向链上从每个位置开始的k-mer的位点数, 反向互补链上从每个位置开始的k-mer的位点数)
+        含有ACGT以外碱基的k-mer为0
+    """
+    length = len(codes)
+    forward = _kmer_codes(codes, k)
+    reverse = _kmer_codes(rc_codes, k)
+    valid = np.concatenate([forward[forward >= 0], reverse[reverse >= 0]])
+    unique, counts = np.unique(valid, return_counts=True)
+
+    # 回文k-mer在两条链上的两次出现是同一个位点
+    mirror = (-np.arange(length) - k) % length
+    results = []
+    for kmers, other in ((forward, reverse), (reverse, forward)):
+        matches = np.zeros(length, dtype=np.int64)
+        if len(unique):
+            index = np.minimum(np.searchsorted(unique, kmers), len(unique) - 1)
+            found = (kmers >= 0) & (unique[index] == kmers)
+            matches[found] = counts[index[found]]
+        palindrome = (kmers >= 0) & (kmers == other[mirror])
+        results.append(np.where(palindrome, matches // 2, matches))
+    return results[0], results[1]
+
+
+def scan_sites(sequence, scorer, homology_length=25, homology_tm=None, positions=None, kmer_size=12, top_n=20):
+    """扫描环状载体上的插入位点，返回按质量排列的位点列表
+
+    参数:
+        sequence: 大写的环状载体序列
+        scorer: PrimerScorer，载体引物长度为其params.opt_size
+        homology_length: 插入片段引物携带的同源臂长度
+        homology_tm: 可选的同源臂目标Tm范围(最低, 最高)
+        positions: 要扫描的插入位置（整数数组），默认为所有位置
+        kmer_size: 检查引物特异性的3'端k-mer长度
+        top_n: 返回的位点数量
+
+    返回:
+        位点字典列表；引物3'端唯一的位点排在前面，其次按分数从高到低、位置从小到大排列
+    """
+    if top_n < 1:
+        return []
+    params = scorer.params
+    weights = scorer.weights
+    primer_length = params.opt_size
+    total = len(sequence)
+    if total < 2 * max(primer_length, homology_length, kmer_size):
+        raise ValueError(f"载体过短（{total} bp），无法扫描插入位点")
+    kmer_size = min(kmer_size, primer_length)
+
+    codes = encode(sequence)
+    rc_sequence = reverse_complement(sequence)
+    rc_codes = encode(rc_sequence)
+    if positions is None:
+        positions = np.arange(total)
+    positions = np.asarray(positions, dtype=np.int64) % total
+
+    # 载体引物：正向引物从p开始；反向引物是反向互补链上从total-p开始的一段
+    fw_bounds, _ = primer_bounds(codes, primer_length, params, weights)
+    rv_bounds, _ = primer_bounds(rc_codes, primer_length, params, weights)
+    rv_starts = (total - positions) % total
+    fw_bound = fw_bounds[positions]
+    rv_bound = rv_bounds[rv_starts]
+
+    # 同源臂：p上游和下游各homology_length个碱基
+    is_gc = (codes == 1) | (codes == 2)
+    arm_gc = _rolling_sum(is_gc, homology_length, total)
+    left_starts = (positions - homology_length) % total
+    homology_penalty = (
+        _gc_penalty(arm_gc[left_starts] / homology_length * 100, params, weights)
+        + _gc_penalty(arm_gc[positions] / homology_length * 100, params, weights)
+    ) / 2
+    if homology_tm:
+        arm_at = _rolling_sum((codes == 0) | (codes == 3), homology_length, total)
+        arm_tm = _tm(arm_at, arm_gc, homology_length)
+        homology_penalty = homology_penalty + (
+            _tm_penalty(arm_tm[left_starts], homology_tm[0], homology_tm[1], weights)
+            + _tm_penalty(arm_tm[positions], homology_tm[0], homology_tm[1], weights)
+        ) / 2
+
+    # 引物3'端k-mer的结合位点数
+    fw_kmer_matches, rc_kmer_matches = kmer_matches(codes, rc_codes, kmer_size)
+    fw_matches = fw_kmer_matches[(positions + primer_length - kmer_size) % total]
+    rv_matches = rc_kmer_matches[(rv_starts + primer_length - kmer_size) % total]
+    unique = (fw_matches == 1) & (rv_matches == 1)
+
+    # 按(唯一, 分数上界)从高到低依次完整评分；上界不能胜过已保留的最差位点时停止
+    bounds = (fw_bound + rv_bound) / 2 - homology_penalty
+    order = np.lexsort((positions, -bounds, -unique.astype(np.int8)))
+    evaluate = scorer.evaluate
+    fw_windows = sequence + sequence[:primer_length]
+    rv_windows = rc_sequence + rc_sequence[:primer_length]
+    heap = []
+    threshold = None
+    for i in order.tolist():
+        position = int(positions[i])
+        key = (bool(unique[i]), float(bounds[i]), -position)
+        if threshold is not None and key <= threshold:
+            break
+        fw_primer = fw_windows[position:position + primer_length]
+        rv_start = int(rv_starts[i])
+        rv_primer = rv_windows[rv_start:rv_start + primer_length]
+        fw_score, fw_tm = evaluate(fw_primer, fw_primer)
+        rv_score, rv_tm = evaluate(rv_primer, rv_primer)
+        score = (fw_score + rv_score) / 2 - float(homology_penalty[i])
+        entry = ((bool(unique[i]), score, -position), i, fw_primer, rv_primer, fw_score, rv_score, fw_tm, rv_tm)
+        if len(heap) < top_n:
+            heapq.heappush(heap, entry)
+        elif entry[0] > heap[0][0]:
+            heapq.heapreplace(heap, entry)
+        if len(heap) == top_n:
+            threshold = heap[0][0]
+
+    doubled = sequence + sequence
+    sites = []
+    for (is_unique, score, _), i, fw_primer, rv_primer, fw_score, rv_score, fw_tm, rv_tm in sorted(heap, reverse=True):
+        position = int(positions[i])
+        left_start = (position - homology_length) % total
+        sites.append({
+            "position": position,
+            "score": score,
+            "unique": is_unique,
+            "fw_primer": fw_primer,
+            "rv_primer": rv_primer,
+            "fw_score": fw_score,
+            "rv_score": rv_score,
+            "fw_tm": fw_tm,
+            "rv_tm": rv_tm,
+            "fw_matches": int(fw_matches[i]),
+            "rv_matches": int(rv_matches[i]),
+            "left_homology": doubled[left_start:left_start + homology_length],
+            "right_homology": doubled[position:position + homology_length],
+            "homology_penalty": float(homology_penalty[i])
+        })
+    return sites
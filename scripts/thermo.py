@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""基于最近邻热力学参数的发夹和二聚体ΔG
+
+按位置逐对检查互补k-mer的方法会把几乎所有引物都标记为"可能形成发夹"。
+ThermoEngine用SantaLucia (1998) 统一最近邻参数和SantaLucia & Hicks (2004)
+的环区罚分，对引物长度的序列做简化的动态规划，求最稳定的发夹和二聚体结构的ΔG：
+
+    - 双链只由Watson-Crick碱基对组成，相邻碱基对之间可以有不超过3个碱基的凸环，
+      或每侧不超过2个碱基的内环（单个错配按1x1内环处理）
+    - 不考虑悬垂末端、共轴堆积和多分支环
+    - 盐浓度只校正熵（每个最近邻 0.368·ln[Na+]）
+
+除最稳定结构的ΔG外，还给出3'端碱基参与配对的结构中最稳定的ΔG（3'端锚定），
+只有这种结构能被聚合酶延伸，对引物二聚体产物影响最大。最近邻参数在nn_params模块中。
+
+动态规划按行（第一条链的位置）用NumPy数组向量化，每条序列（或序列对）的结果
+在ThermoEngine实例中缓存，评分大量候选引物时重复出现的序列只计算一次。
+"""
+
+import math
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+from nn_params import INIT, NN_PARAMS, T37, TERMINAL_AT, nn_key
+
+# 37°C下的环区起始罚分（kcal/mol），SantaLucia & Hicks 2004；
+# 表中没有的长度按 ΔG(n) = ΔG(x) + 2.44·R·T·ln(n/x) 外推。
+# 长度为2的内环是单个错配，取各错配的平均值近似
+_HAIRPIN_LOOP = {3: 3.5, 4: 3.5, 5: 3.3, 6: 4.0, 7: 4.2, 8: 4.3, 9: 4.5, 10: 4.6,
+                 12: 5.0, 14: 5.1, 16: 5.3, 18: 5.5, 20: 5.7, 25: 6.1, 30: 6.3}
+_BULGE_LOOP = {1: 4.0, 2: 2.9, 3: 3.1}
+_INTERNAL_LOOP = {2: 0.5, 3: 3.2, 4: 3.6}
+
+# 动态规划中允许的环形状：(第一条链跳过的碱基数, 第二条链跳过的碱基数)
+_LOOP_SHAPES = [(1, 0), (0, 1), (2, 0), (0, 2), (3, 0), (0, 3), (1, 1), (1, 2), (2, 1), (2, 2)]
+
+# 发夹环至少3个碱基
+_MIN_HAIRPIN_LOOP = 3
+
+_GAS_CONSTANT = 1.9872e-3   # kcal/(mol·K)
+
+# 碱基编码：A=0 C=1 G=2 T=3，其他为4；互补碱基的编码之和为3
+_CODES = bytes(
+    {ord('A'): 0, ord('C'): 1, ord('G'): 2, ord('T'): 3}.get(i, 4) for i in range(256)
+)
+
+StructureDG = namedtuple("StructureDG", ["dg", "end_dg"])
+StructureDG.__doc__ = """结构的ΔG（kcal/mol）：dg为最稳定结构，end_dg为3'端锚定的最稳定结构；没有稳定结构时为0"""
+
+
+def _loop_dg(table, size, temperature):
+    """环区起始罚分（kcal/mol），按温度缩放（环区罚分视为纯熵）"""
+    if size in table:
+        dg = table[size]
+    else:
+        known = max(length for length in table if length < size)
+        dg = table[known] + 2.44 * _GAS_CONSTANT * T37 * math.log(size / known)
+    return dg * temperature / T37
+
+
+class ThermoEngine:
+    """发夹和二聚体ΔG计算
+
+    属性:
+        temperature: 计算温度（°C）
+        na_mm: 一价阳离子浓度（mM）
+    """
+
+    def __init__(self, temperature=37.0, na_mm=50.0, cache_size=65536):
+        """初始化参数表
+
+        参数:
+            temperature: 计算温度（°C）
+            na_mm: 一价阳离子浓度（mM）
+            cache_size: 每种计算缓存的序列（或序列对）数量
+        """
+        self.temperature = temperature
+        self.na_mm = na_mm
+        kelvin = temperature + 273.15
+        salt = 0.368 * math.log(na_mm / 1000.0)
+
+        # 第一条链上相邻两个碱基（编码a、b）都与对侧配对时的堆积自由能
+        self._stack = np.full((5, 5), np.inf)
+        for first in 'ACGT':
+            for second in 'ACGT':
+                dh, ds = NN_PARAMS[nn_key(first + second)]
+                self._stack[_CODES[ord(first)], _CODES[ord(second)]] = dh - kelvin * (ds + salt) / 1000.0
+
+        self._init = INIT[0] - kelvin * INIT[1] / 1000.0
+        terminal = TERMINAL_AT[0] - kelvin * TERMINAL_AT[1] / 1000.0
+        self._terminal = np.array([terminal, 0.0, 0.0, terminal, 0.0])
+
+        self._loops = []
+        for skip_a, skip_b in _LOOP_SHAPES:
+            if skip_a and skip_b:
+                penalty = _loop_dg(_INTERNAL_LOOP, skip_a + skip_b, kelvin)
+            else:
+                penalty = _loop_dg(_BULGE_LOOP, skip_a + skip_b, kelvin)
+            self._loops.append((skip_a, skip_b, penalty))
+        self._hairpin_loop = [0.0] * _MIN_HAIRPIN_LOOP + [
+            _loop_dg(_HAIRPIN_LOOP, size, kelvin) for size in range(_MIN_HAIRPIN_LOOP, 128)
+        ]
+
+        self.hairpin = lru_cache(maxsize=cache_size)(self._hairpin)
+        self.dimer = lru_cache(maxsize=cache_size)(self._dimer)
+
+    def _table(self, a, b, start_dg, mask, anchored):
+        """动态规划：G[i, j]为以a[i]·b[j]为最后一个碱基对的最稳定双链的ΔG
+
+        b是另一条链的逆序（b[j]与a[i]反向平行配对），链的延伸方向为i、j同时增大。
+
+        参数:
+            a, b: 编码后的numpy数组
+            start_dg: 双链起始罚分
+            mask: 允许配对的(i, j)布尔矩阵
+            anchored: 为True时双链必须从b[0]开始（b所在链的3'端参与配对）
+        """
+        rows, cols = len(a), len(b)
+        stack = self._stack
+        terminal = self._terminal
+        table = np.full((rows, cols), np.inf)
+        for i in range(rows):
+            allowed = mask[i]
+            if not allowed.any():
+                continue
+            row = np.full(cols, np.inf)
+            # 从这个碱基对开始一段新的双链
+            if anchored:
+                row[0] = start_dg + terminal[a[i]]
+            else:
+                row[:] = start_dg + terminal[a[i]]
+            if i > 0:
+                # 与上一个碱基对直接堆积
+                step = stack[a[i - 1], a[i]]
+                np.minimum(row[1:], table[i - 1, :-1] + step, out=row[1:])
+                # 隔着凸环或内环与之前的碱基对相连
+                for skip_a, skip_b, penalty in self._loops:
+                    previous = i - 1 - skip_a
+                    if previous < 0 or skip_b + 1 >= cols:
+                        continue
+                    np.minimum(row[skip_b + 1:], table[previous, :cols - skip_b - 1] + penalty,
+                               out=row[skip_b + 1:])
+            row[~allowed] = np.inf
+            table[i] = row
+        return table
+
+    def _encode(self, seq):
+        return np.frombuffer(seq.upper().encode("ascii", "replace").translate(_CODES), dtype=np.uint8)
+
+    def _pairs(self, a, b):
+        """a[i]与b[j]是否为Watson-Crick碱基对"""
+        return ((a[:, None] + b[None, :]) == 3) & (a[:, None] < 4) & (b[None, :] < 4)
+
+    def _hairpin(self, seq):
+        """单链发夹结构的ΔG，返回StructureDG"""
+        a = self._encode(seq)
+        length = len(a)
+        if length < 2 * 2 + _MIN_HAIRPIN_LOOP:
+            return StructureDG(0.0, 0.0)
+        b = a[::-1]
+        i_index = np.arange(length)[:, None]
+        j_index = np.arange(length)[None, :]
+        # b[j]是序列中第length-1-j个碱基；配对的两个碱基之间至少隔着发夹环
+        loop_size = length - 2 - i_index - j_index
+        mask = self._pairs(a, b) & (loop_size >= _MIN_HAIRPIN_LOOP)
+        # 最内侧的碱基对闭合发夹环
+        closing = np.array(self._hairpin_loop)[np.clip(loop_size, 0, len(self._hairpin_loop) - 1)]
+        closing = closing + self._terminal[a][:, None]
+
+        best = (self._table(a, b, 0.0, mask, False) + closing)[mask]
+        # 序列的3'端（b[0]）参与配对的发夹
+        end = (self._table(a, b, 0.0, mask, True) + closing)[mask]
+        return StructureDG(
+            min(0.0, float(best.min())) if best.size else 0.0,
+            min(0.0, float(end.min())) if end.size else 0.0
+        )
+
+    def _dimer(self, seq1, seq2):
+        """两条链形成的二聚体的ΔG，返回StructureDG；end_dg考虑任意一条链的3'端参与配对"""
+        a = self._encode(seq1)
+        b = self._encode(seq2)[::-1]
+        if not len(a) or not len(b):
+            return StructureDG(0.0, 0.0)
+        mask = self._pairs(a, b)
+        closing = self._terminal[a][:, None]
+
+        table = self._table(a, b, self._init, mask, False) + closing
+        best = float(table.min())
+        # seq1的3'端（a的最后一位）或seq2的3'端（b[0]）参与配对
+        end = min(float(table[-1].min()),
+                  float((self._table(a, b, self._init, mask, True) + closing).min()))
+        return StructureDG(min(0.0, best), min(0.0, end))
+
+
+_default_engine = None
+
+
+def get_engine():
+    """返回默认条件（37°C，50 mM Na+）的共享ThermoEngine"""
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = ThermoEngine()
+    return _default_engine
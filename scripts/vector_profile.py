@@ -0,0 +1,306 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""载体预计算信息
+
+同一个载体骨架常被用于成千上万次设计。VectorProfile把与插入片段无关的计算
+（序列规范化、所有限制酶的酶切位点和线性化切割位置、k-mer索引）
+按序列哈希只计算一次，并可以保存到磁盘重复使用。
+"""
+
+import base64
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from array import array
+
+# 酶切位点数据，格式为：'酶名': ('识别序列', 切割位置)
+# 切割位置表示在识别序列中从5'端开始计数的切割位置
+# 例如：EcoRI (G^AATTC) 在第1个位置切割，表示为1
+ENZYME_SITES = {
+    'EcoRI': ('GAATTC', 1),     # G^AATTC
+    'BamHI': ('GGATCC', 1),     # G^GATCC
+    'HindIII': ('AAGCTT', 1),   # A^AGCTT
+    'XhoI': ('CTCGAG', 1),      # C^TCGAG
+    'NdeI': ('CATATG', 2),      # CA^TATG
+    'XbaI': ('TCTAGA', 1),      # T^CTAGA
+    'PstI': ('CTGCAG', 5),      # CTGCA^G
+    'SalI': ('GTCGAC', 1),      # G^TCGAC
+    'SmaI': ('CCCGGG', 3),      # CCC^GGG
+    'KpnI': ('GGTACC', 5),      # GGTAC^C
+    'SacI': ('GAGCTC', 5),      # GAGCT^C
+    'SphI': ('GCATGC', 5),      # GCATG^C
+    'NotI': ('GCGGCCGC', 2),    # GC^GGCCGC
+    'BglII': ('AGATCT', 1),     # A^GATCT
+    'NcoI': ('CCATGG', 1)       # C^CATGG
+}
+
+# 磁盘缓存格式版本，格式变化时递增
+PROFILE_VERSION = 2
+
+# 默认k-mer索引长度
+DEFAULT_KMER_SIZE = 12
+
+
+def sequence_hash(sequence):
+    """计算规范化（大写）序列的SHA-256哈希"""
+    return hashlib.sha256(sequence.encode("ascii", "replace")).hexdigest()
+
+
+def sorted_kmer_positions(sequence, kmer_size):
+    """返回环状序列上所有k-mer起始位置组成的数组，按k-mer的字节顺序排序，同一k-mer的位置按升序排列
+
+    每个k-mer按序列中出现的字符编号转换为整数（整数顺序与字节顺序一致），
+    与起始位置合并成一个整数后排序，不为每个k-mer生成字符串和列表。
+
+    参数:
+        sequence: 规范化（大写）的序列
+        kmer_size: k-mer长度
+
+    返回:
+        array('I')；序列短于k-mer长度时为空
+    """
+    data = sequence.encode("ascii", "replace")
+    length = len(data)
+    positions = array("I")
+    if length < kmer_size:
+        return positions
+
+    alphabet = sorted(set(data))
+    base = len(alphabet)
+    table = bytearray(256)
+    for rank, byte in enumerate(alphabet):
+        table[byte] = rank
+    ranks = (data + data[:kmer_size - 1]).translate(table)
+
+    # 滚动计算每个位置的k-mer编码，高位为编码、低32位为位置
+    scale = base ** (kmer_size - 1)
+    code = 0
+    for rank in ranks[:kmer_size - 1]:
+        code = code * base + rank
+    keys = []
+    for pos in range(length):
+        code = code * base + ranks[pos + kmer_size - 1]
+        keys.append((code << 32) | pos)
+        code -= ranks[pos] * scale
+    keys.sort()
+    positions.extend(key & 0xFFFFFFFF for key in keys)
+    return positions
+
+
+class VectorProfile:
+    """载体的预计算信息
+
+    属性:
+        id: 载体名称
+        sequence: 规范化（大写）的环状载体序列
+        seq_hash: 规范化序列的哈希
+        sites: 每种限制酶在环状载体上所有识别位点的起始位置（包括跨越序列起点的位点）
+        linearized: 有识别位点的限制酶线性化时使用的识别位点和切割位置
+        kmer_size: k-mer索引长度
+        positions: 正向链上所有k-mer的起始位置（array('I')），按k-mer排序，查找时二分定位；
+                   与shared_store的共享内存布局相同
+    """
+
+    def __init__(self, name, sequence, seq_hash, sites, linearized, kmer_size, positions):
+        self.id = name
+        self.sequence = sequence
+        self.seq_hash = seq_hash
+        self.sites = sites
+        self.linearized = linearized
+        self.kmer_size = kmer_size
+        self.positions = positions
+
+    def __len__(self):
+        return len(self.sequence)
+
+    @property
+    def seq(self):
+        """与SeqRecord兼容的序列属性"""
+        return self.sequence
+
+    @classmethod
+    def build(cls, name, sequence, kmer_size=DEFAULT_KMER_SIZE):
+        """根据载体序列计算所有预计算信息
+
+        参数:
+            name: 载体名称
+            sequence: 载体序列（任意大小写）
+            kmer_size: k-mer索引长度
+        """
+        sequence = str(sequence).upper()
+        length = len(sequence)
+
+        # 在首尾相接的序列中查找，才能找到跨越序列起点的位点
+        longest_site = max(len(site) for site, _ in ENZYME_SITES.values())
+        circular = sequence + sequence[:longest_site - 1]
+
+        sites = {}
+        linearized = {}
+        for enzyme, (site_seq, cut_pos) in ENZYME_SITES.items():
+            positions = []
+            pos = circular.find(site_seq)
+            while pos != -1 and pos < length:
+                positions.append(pos)
+                pos = circular.find(site_seq, pos + 1)
+            sites[enzyme] = positions
+
+            if positions:
+                linearized[enzyme] = {
+                    "site_position": positions[0],
+                    "cut_position": (positions[0] + cut_pos) % length
+                }
+
+        return cls(name, sequence, sequence_hash(sequence), sites, linearized, kmer_size,
+                   sorted_kmer_positions(sequence, kmer_size))
+
+    def window(self, start, length):
+        """截取环状载体上从start开始的length个碱基，start可以为负或超过载体长度"""
+        return _circular_window(self.sequence, start, length)
+
+    def unique_cutters(self):
+        """返回在载体上只有一个识别位点的限制酶名称（按ENZYME_SITES中的顺序）"""
+        return [enzyme for enzyme in ENZYME_SITES if len(self.sites.get(enzyme, ())) == 1]
+
+    def linear_ends(self, cut_position, length):
+        """返回在cut_position处线性化后载体5'端和3'端各length个碱基"""
+        return self.window(cut_position, length), self.window(cut_position - length, length)
+
+    def _key(self, query):
+        """把查询序列转换为与_key_at相同类型的比较键"""
+        return query.upper()
+
+    def _key_at(self, start, length):
+        """环状序列上从start（0 <= start < 序列长度）开始的length个碱基，作为k-mer的比较键"""
+        end = start + length
+        if end <= len(self.sequence):
+            return self.sequence[start:end]
+        return _circular_window(self.sequence, start, length)
+
+    def _kmer_range(self, prefix):
+        """返回以prefix开头的k-mer在位置数组中的区间[lo, hi)"""
+        size = len(prefix)
+        positions = self.positions
+
+        def bound(upper):
+            lo, hi = 0, len(positions)
+            while lo < hi:
+                mid = (lo + hi) // 2
+                key = self._key_at(positions[mid], size)
+                if key < prefix or (upper and key == prefix):
+                    lo = mid + 1
+                else:
+                    hi = mid
+            return lo
+
+        return bound(False), bound(True)
+
+    def find(self, query):
+        """返回query在载体（线性坐标，不跨越起点）中第一次出现的位置，找不到返回-1
+
+        在排序的k-mer位置数组上二分查找query的前k个碱基，再逐一核对候选位置。
+        query短于k-mer长度时，以它开头的所有k-mer都是候选，取其中最小的位置。
+        """
+        query = self._key(query)
+        total = len(self)
+        if not query:
+            return 0
+        if total < self.kmer_size:
+            return self._key_at(0, total).find(query)
+
+        last_start = total - len(query)
+        lo, hi = self._kmer_range(query[:self.kmer_size])
+        if len(query) < self.kmer_size:
+            starts = [pos for pos in self.positions[lo:hi] if pos <= last_start]
+            return min(starts) if starts else -1
+
+        for pos in self.positions[lo:hi]:
+            if pos > last_start:
+                break
+            if self._key_at(pos, len(query)) == query:
+                return pos
+        return -1
+
+    def kmer_positions(self, kmer):
+        """返回k-mer在正向链上出现的所有起始位置"""
+        kmer = self._key(kmer)
+        if len(kmer) != self.kmer_size or len(self) < self.kmer_size:
+            return []
+        lo, hi = self._kmer_range(kmer)
+        return self.positions[lo:hi].tolist()
+
+    @property
+    def kmer_index(self):
+        """{k-mer: 起始位置列表}形式的完整k-mer索引（按需生成的副本）"""
+        index = {}
+        for pos in self.positions:
+            index.setdefault(self.window(pos, self.kmer_size), []).append(pos)
+        return index
+
+    def to_dict(self):
+        """转换为可以保存为JSON的字典；位置数组按小端uint32存为base64"""
+        positions = array("I", self.positions)
+        if sys.byteorder != "little":
+            positions.byteswap()
+        return {
+            "version": PROFILE_VERSION,
+            "id": self.id,
+            "sequence": self.sequence,
+            "seq_hash": self.seq_hash,
+            "sites": self.sites,
+            "linearized": self.linearized,
+            "kmer_size": self.kmer_size,
+            "kmer_positions": base64.b64encode(positions.tobytes()).decode("ascii")
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """从to_dict生成的字典恢复"""
+        if data.get("version") != PROFILE_VERSION:
+            raise ValueError("载体预计算缓存的版本不匹配")
+        positions = array("I")
+        positions.frombytes(base64.b64decode(data["kmer_positions"]))
+        if sys.byteorder != "little":
+            positions.byteswap()
+        return cls(
+            data["id"], data["sequence"], data["seq_hash"], data["sites"],
+            data["linearized"], data["kmer_size"], positions
+        )
+
+    def save(self, path):
+        """保存到磁盘；先写同目录下唯一命名的临时文件并fsync，再原子替换，
+        避免并发写入同一缓存的进程互相覆盖临时文件或留下不完整的缓存"""
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self.to_dict(), f, separators=(",", ":"))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    @classmethod
+    def load(cls, path):
+        """从磁盘读取"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+def _circular_window(sequence, start, length):
+    """截取环状序列上从start开始的length个碱基（不超过序列全长）"""
+    total = len(sequence)
+    if total == 0:
+        return ""
+    length = min(length, total)
+    start %= total
+    end = start + length
+    if end <= total:
+        return sequence[start:end]
+    return sequence[start:] + sequence[:end - total]